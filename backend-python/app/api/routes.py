@@ -1,23 +1,37 @@
-from fastapi import APIRouter, HTTPException, Request
-from typing import List
+from dataclasses import asdict
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import asyncio
 import uuid
 
 from app.schemas import (
     SourceItem,
     MaskingRequest, MaskingResponse,
+    MaskingBatchRequest, MaskingBatchResponse,
+    CacheStatsResponse,
     TriageRequest, TriageResponse,
+    TriageBatchRequest, TriageBatchResponse,
     RAGRequest, RAGResponse,
     GenerateRequest, GenerateResponse,
-    ReviewActionRequest, ReviewActionResponse
+    ReviewActionRequest, ReviewActionResponse,
+    ReviewQueueItem, ReviewQueueResponse,
+    IndexComplaintRequest, SimilarComplaintsResponse,
+    IndexComplaintsBatchRequest, IndexComplaintsBatchResponse, IndexComplaintResult,
+    PipelineRequest, PipelineResponse,
 )
+from app.core.constants import BATCH_MAX_ITEMS
 from app.core.logging import get_logger
+from app.core.metrics import render_metrics, stage_timer
 from app.services.masking_service import masker
 from app.services.triage_service import triage_engine
 from app.services.review_service import review_store
 from app.services.rag_service import rag_manager
 from app.services.llm_service import llm_client
 from app.services.similarity_service import similarity_service
-from app.services.pii_scan import scan_text, scan_texts
+from app.services.embedding_cache import embedding_cache
+from app.services.pii_scan import scan_text, scan_text_batch, scan_texts
 
 router = APIRouter()
 logger = get_logger("complaintops.api")
@@ -39,45 +53,31 @@ def sanitize_input(text: str, request_id: str) -> dict:
         "masked_entities": all_entities,
     }
 
-def log_sanitized_request(
-    endpoint: str,
-    masked_text: str,
-    masked_entities: List[str],
-    request_id: str,
-) -> None:
-    logger.info(
-        "request_received endpoint=%s request_id=%s masked_text_length=%s masked_entity_types=%s",
-        endpoint,
-        request_id,
-        len(masked_text),
-        ",".join(masked_entities),
-    )
+def sanitize_inputs(texts: List[str], request_id: str) -> List[dict]:
+    """Batch variant of sanitize_input; spaCy runs once over the whole batch."""
+    try:
+        batch = masker.mask_with_double_pass_batch(texts)
+    except Exception as exc:
+        logger.error(
+            "masking_failed request_id=%s batch_size=%s error=%s",
+            request_id,
+            len(texts),
+            exc,
+        )
+        raise HTTPException(status_code=503, detail="MASKING_FAILED") from exc
+    return [
+        {
+            "masked_text": masked_text,
+            "masked_entities": [e["type"] for e in presidio_entities] + [e["type"] for e in regex_entities],
+        }
+        for masked_text, presidio_entities, regex_entities in batch
+    ]
 
-@router.post("/mask", response_model=MaskingResponse)
-def mask_pii(payload: MaskingRequest, request: Request):
-    result = sanitize_input(payload.text, request.state.request_id)
-    log_sanitized_request(
-        "/mask",
-        result["masked_text"],
-        result["masked_entities"],
-        request.state.request_id,
-    )
-    # SECURITY: Never return original_text - removed ALLOW_RAW_PII_RESPONSE vulnerability
-    return MaskingResponse(
-        masked_text=result["masked_text"],
-        masked_entities=result["masked_entities"]
-    )
+def triage_masked_text(masked_text: str) -> TriageResponse:
+    """Run triage on already-masked text, queueing low-confidence results for review."""
+    return build_triage_response(masked_text, triage_engine.predict(masked_text))
 
-@router.post("/predict", response_model=TriageResponse)
-def predict_triage(payload: TriageRequest, request: Request):
-    sanitized = sanitize_input(payload.text, request.state.request_id)
-    log_sanitized_request(
-        "/predict",
-        sanitized["masked_text"],
-        sanitized["masked_entities"],
-        request.state.request_id,
-    )
-    result = triage_engine.predict(sanitized["masked_text"])
+def build_triage_response(masked_text: str, result: dict) -> TriageResponse:
     needs_human_review = (
         result["category_confidence"] < 0.60
         or result["urgency_confidence"] < 0.60
@@ -88,7 +88,7 @@ def predict_triage(payload: TriageRequest, request: Request):
         review_id = str(uuid.uuid4())
         review_store.create_review(
             review_id=review_id,
-            masked_text=sanitized["masked_text"],
+            masked_text=masked_text,
             category=result["category"],
             category_confidence=result["category_confidence"],
             urgency=result["urgency"],
@@ -106,34 +106,29 @@ def predict_triage(payload: TriageRequest, request: Request):
         review_id=review_id,
     )
 
-@router.post("/retrieve", response_model=RAGResponse)
-def retrieve_docs(payload: RAGRequest, request: Request):
-    sanitized = sanitize_input(payload.text, request.state.request_id)
-    log_sanitized_request(
-        "/retrieve",
-        sanitized["masked_text"],
-        sanitized["masked_entities"],
-        request.state.request_id,
-    )
-    sources = rag_manager.retrieve(sanitized["masked_text"], category=payload.category)
-    return RAGResponse(relevant_sources=sources)
+async def generate_for_masked_text(
+    masked_text: str,
+    category: str,
+    urgency: str,
+    sources: Optional[list],
+    request_id: str,
+    risk_flags: Optional[List[str]] = None,
+) -> GenerateResponse:
+    """
+    Draft an LLM response for already-masked text and block PII in the output.
 
-@router.post("/generate", response_model=GenerateResponse)
-def generate_response(payload: GenerateRequest, request: Request):
-    sanitized = sanitize_input(payload.text, request.state.request_id)
-    log_sanitized_request(
-        "/generate",
-        sanitized["masked_text"],
-        sanitized["masked_entities"],
-        request.state.request_id,
-    )
-    risk_flags = []
-    sources = payload.relevant_sources
-    if not sources:
+    sources=None retrieves them here; an empty list means retrieval already
+    ran (see /pipeline) and is not repeated.
+    """
+    risk_flags = list(risk_flags or [])
+    if sources is not None and not sources and "RAG_UNAVAILABLE" not in risk_flags:
+        risk_flags.append("RAG_EMPTY_SOURCES")
+    if sources is None:
         try:
-            sources = rag_manager.retrieve(
-                sanitized["masked_text"],
-                category=payload.category,
+            sources = await run_in_threadpool(
+                rag_manager.retrieve,
+                masked_text,
+                category=category,
             )
             if not sources:
                 risk_flags.append("RAG_EMPTY_SOURCES")
@@ -154,22 +149,23 @@ def generate_response(payload: GenerateRequest, request: Request):
             # Fallback for unknown type
             snippets.append(source)
 
-    result = llm_client.generate_response(
-        text=sanitized["masked_text"],
-        category=payload.category,
-        urgency=payload.urgency,
+    result = await llm_client.agenerate_response(
+        text=masked_text,
+        category=category,
+        urgency=urgency,
         snippets=snippets
     )
 
-    output_scan = scan_texts([
-        " ".join(result.get("action_plan", [])),
-        result.get("customer_reply_draft", "")
-    ])
+    with stage_timer("output_pii_scan"):
+        output_scan = await run_in_threadpool(scan_texts, [
+            " ".join(result.get("action_plan", [])),
+            result.get("customer_reply_draft", "")
+        ])
 
     if output_scan.contains_pii:
         logger.error(
             "PII_LEAK_BLOCKED request_id=%s entity_types=%s",
-            request.state.request_id,
+            request_id,
             ",".join(sorted(set(output_scan.entity_types))),
         )
         return GenerateResponse(
@@ -194,6 +190,215 @@ def generate_response(payload: GenerateRequest, request: Request):
         error_code=result.get("error_code"),
     )
 
+def log_sanitized_request(
+    endpoint: str,
+    masked_text: str,
+    masked_entities: List[str],
+    request_id: str,
+) -> None:
+    logger.info(
+        "request_received endpoint=%s request_id=%s masked_text_length=%s masked_entity_types=%s",
+        endpoint,
+        request_id,
+        len(masked_text),
+        ",".join(masked_entities),
+    )
+
+@router.post("/mask", response_model=MaskingResponse)
+def mask_pii(payload: MaskingRequest, request: Request):
+    result = sanitize_input(payload.text, request.state.request_id)
+    log_sanitized_request(
+        "/mask",
+        result["masked_text"],
+        result["masked_entities"],
+        request.state.request_id,
+    )
+    # SECURITY: Never return original_text - removed ALLOW_RAW_PII_RESPONSE vulnerability
+    return MaskingResponse(
+        masked_text=result["masked_text"],
+        masked_entities=result["masked_entities"]
+    )
+
+@router.post("/mask/batch", response_model=MaskingBatchResponse)
+def mask_pii_batch(payload: MaskingBatchRequest, request: Request):
+    results = sanitize_inputs(payload.texts, request.state.request_id)
+    logger.info(
+        "request_received endpoint=%s request_id=%s batch_size=%s masked_entity_types=%s",
+        "/mask/batch",
+        request.state.request_id,
+        len(results),
+        ",".join(sorted({t for r in results for t in r["masked_entities"]})),
+    )
+    return MaskingBatchResponse(
+        results=[
+            MaskingResponse(
+                masked_text=r["masked_text"],
+                masked_entities=r["masked_entities"],
+            )
+            for r in results
+        ]
+    )
+
+@router.get("/mask/cache/stats", response_model=CacheStatsResponse)
+def mask_cache_stats():
+    return CacheStatsResponse(**masker.cache_stats())
+
+@router.get("/embeddings/cache/stats", response_model=CacheStatsResponse)
+def embedding_cache_stats():
+    return CacheStatsResponse(**embedding_cache.stats())
+
+@router.get("/retrieve/cache/stats", response_model=CacheStatsResponse)
+def retrieve_cache_stats():
+    return CacheStatsResponse(**rag_manager.cache_stats())
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-stage and per-route latency histograms in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@router.post("/predict", response_model=TriageResponse)
+def predict_triage(payload: TriageRequest, request: Request):
+    sanitized = sanitize_input(payload.text, request.state.request_id)
+    log_sanitized_request(
+        "/predict",
+        sanitized["masked_text"],
+        sanitized["masked_entities"],
+        request.state.request_id,
+    )
+    return triage_masked_text(sanitized["masked_text"])
+
+@router.post("/predict/batch", response_model=TriageBatchResponse)
+def predict_triage_batch(payload: TriageBatchRequest, request: Request):
+    sanitized = sanitize_inputs(payload.texts, request.state.request_id)
+    logger.info(
+        "request_received endpoint=%s request_id=%s batch_size=%s masked_entity_types=%s",
+        "/predict/batch",
+        request.state.request_id,
+        len(sanitized),
+        ",".join(sorted({t for s in sanitized for t in s["masked_entities"]})),
+    )
+    masked_texts = [s["masked_text"] for s in sanitized]
+    results = triage_engine.predict_batch(masked_texts).to_records()
+    return TriageBatchResponse(
+        results=[
+            build_triage_response(masked_text, result)
+            for masked_text, result in zip(masked_texts, results)
+        ]
+    )
+
+@router.post("/retrieve", response_model=RAGResponse)
+def retrieve_docs(payload: RAGRequest, request: Request):
+    sanitized = sanitize_input(payload.text, request.state.request_id)
+    log_sanitized_request(
+        "/retrieve",
+        sanitized["masked_text"],
+        sanitized["masked_entities"],
+        request.state.request_id,
+    )
+    sources = rag_manager.retrieve(
+        sanitized["masked_text"],
+        category=payload.category,
+        mode=payload.retrieval_mode,
+    )
+    return RAGResponse(relevant_sources=sources)
+
+@router.post("/generate", response_model=GenerateResponse)
+async def generate_response(payload: GenerateRequest, request: Request):
+    sanitized = await run_in_threadpool(sanitize_input, payload.text, request.state.request_id)
+    log_sanitized_request(
+        "/generate",
+        sanitized["masked_text"],
+        sanitized["masked_entities"],
+        request.state.request_id,
+    )
+    return await generate_for_masked_text(
+        masked_text=sanitized["masked_text"],
+        category=payload.category,
+        urgency=payload.urgency,
+        sources=payload.relevant_sources or None,
+        request_id=request.state.request_id,
+    )
+
+@router.post("/pipeline", response_model=PipelineResponse)
+async def run_pipeline(payload: PipelineRequest, request: Request):
+    """
+    Mask once, then run triage, RAG retrieval and similarity search
+    concurrently on the masked text. Optionally drafts an LLM response
+    from the triage result and the retrieved sources.
+
+    Masking failures fail the request (fail-closed); a failing stage after
+    it is reported in risk_flags and its result left empty.
+    """
+    request_id = request.state.request_id
+    sanitized = await run_in_threadpool(sanitize_input, payload.text, request_id)
+    masked_text = sanitized["masked_text"]
+    log_sanitized_request(
+        "/pipeline",
+        masked_text,
+        sanitized["masked_entities"],
+        request_id,
+    )
+
+    triage, sources, similar = await asyncio.gather(
+        run_in_threadpool(triage_masked_text, masked_text),
+        run_in_threadpool(
+            rag_manager.retrieve,
+            masked_text,
+            category=payload.category,
+            mode=payload.retrieval_mode,
+        ),
+        run_in_threadpool(
+            similarity_service.find_similar,
+            query_text=masked_text,
+            n_results=payload.similar_limit,
+            exclude_id=payload.complaint_id,
+        ),
+        return_exceptions=True,
+    )
+
+    risk_flags = []
+    for stage, flag, result in (
+        ("triage", "TRIAGE_UNAVAILABLE", triage),
+        ("rag", "RAG_UNAVAILABLE", sources),
+        ("similarity", "SIMILARITY_UNAVAILABLE", similar),
+    ):
+        if isinstance(result, Exception):
+            logger.error(
+                "pipeline_stage_failed stage=%s request_id=%s error=%s",
+                stage,
+                request_id,
+                type(result).__name__,
+            )
+            risk_flags.append(flag)
+    if isinstance(triage, Exception):
+        triage = None
+    if isinstance(sources, Exception):
+        sources = []
+    if isinstance(similar, Exception):
+        similar = []
+
+    generation = None
+    # The draft needs the triage category and urgency
+    if payload.include_generation and triage is not None:
+        generation = await generate_for_masked_text(
+            masked_text=masked_text,
+            category=payload.category or triage.category,
+            urgency=triage.urgency,
+            sources=sources,
+            request_id=request_id,
+            risk_flags=[flag for flag in risk_flags if flag == "RAG_UNAVAILABLE"],
+        )
+
+    return PipelineResponse(
+        masked_text=masked_text,
+        masked_entities=sanitized["masked_entities"],
+        triage=triage,
+        relevant_sources=sources,
+        similar_complaints=similar,
+        generation=generation,
+        risk_flags=risk_flags,
+    )
+
 @router.post("/review/approve", response_model=ReviewActionResponse)
 def approve_review(payload: ReviewActionRequest):
     record = review_store.update_review(payload.review_id, "APPROVED", payload.notes)
@@ -208,28 +413,38 @@ def reject_review(payload: ReviewActionRequest):
         raise HTTPException(status_code=404, detail="Review not found")
     return ReviewActionResponse(review_id=record.review_id, status=record.status, notes=record.notes)
 
-# ============== SIMILARITY SEARCH ENDPOINTS ==============
-
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
-
-class IndexComplaintRequest(BaseModel):
-    complaint_id: str
-    masked_text: str
-    category: Optional[str] = None
-    status: Optional[str] = None
-    created_at: Optional[str] = None
+@router.get("/review/queue", response_model=ReviewQueueResponse)
+def review_queue(
+    status: Optional[str] = "PENDING_REVIEW",
+    category: Optional[str] = None,
+    urgency: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=BATCH_MAX_ITEMS),
+):
+    """Reviews oldest first, one keyset page at a time. An empty status lists every status."""
+    try:
+        records, next_cursor = review_store.list_reviews(
+            status=status or None,
+            category=category,
+            urgency=urgency,
+            after_cursor=cursor,
+            limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="INVALID_CURSOR")
+    return ReviewQueueResponse(
+        items=[ReviewQueueItem(**asdict(record)) for record in records],
+        next_cursor=next_cursor,
+    )
 
-class SimilarComplaintItem(BaseModel):
-    id: str
-    masked_text: str
-    similarity_score: float
-    category: Optional[str] = None
-    status: Optional[str] = None
+# ============== SIMILARITY SEARCH ENDPOINTS ==============
 
-class SimilarComplaintsResponse(BaseModel):
-    similar_complaints: list[SimilarComplaintItem]
-    total_indexed: int
+def complaint_metadata(payload: IndexComplaintRequest) -> dict:
+    return {
+        "category": payload.category or "",
+        "status": payload.status or "",
+        "created_at": payload.created_at or ""
+    }
 
 @router.post("/index-complaint")
 def index_complaint(payload: IndexComplaintRequest, request: Request):
@@ -242,20 +457,65 @@ def index_complaint(payload: IndexComplaintRequest, request: Request):
             ",".join(sorted(set(scan_result.entity_types))),
         )
         raise HTTPException(status_code=400, detail="RAW_TEXT_REJECTED")
-    metadata = {
-        "category": payload.category or "",
-        "status": payload.status or "",
-        "created_at": payload.created_at or ""
-    }
     success = similarity_service.index_complaint(
         complaint_id=payload.complaint_id,
         masked_text=payload.masked_text,
-        metadata=metadata
+        metadata=complaint_metadata(payload)
     )
     if not success:
         raise HTTPException(status_code=500, detail="Failed to index complaint")
     return {"status": "indexed", "complaint_id": payload.complaint_id}
 
+@router.post("/index-complaint/batch", response_model=IndexComplaintsBatchResponse)
+def index_complaints_batch(payload: IndexComplaintsBatchRequest, request: Request):
+    """
+    Index many complaints for similarity search (e.g. backfills).
+
+    Each text is PII-scanned (one spaCy pass for the batch); texts that still
+    contain PII are rejected individually, the rest are embedded and upserted
+    in chunks. Per-item results are returned in request order.
+    """
+    complaints = payload.complaints
+    scans = scan_text_batch([c.masked_text for c in complaints])
+    results: List[IndexComplaintResult] = [None] * len(complaints)
+    accepted = []
+    for index, (complaint, scan_result) in enumerate(zip(complaints, scans)):
+        if scan_result.contains_pii:
+            results[index] = IndexComplaintResult(
+                complaint_id=complaint.complaint_id,
+                status="rejected",
+                error="RAW_TEXT_REJECTED",
+            )
+        else:
+            accepted.append(index)
+
+    rejected_types = sorted({t for s in scans if s.contains_pii for t in s.entity_types})
+    if rejected_types:
+        logger.error(
+            "raw_text_rejected request_id=%s rejected_count=%s entity_types=%s",
+            request.state.request_id,
+            len(complaints) - len(accepted),
+            ",".join(rejected_types),
+        )
+
+    errors = similarity_service.index_complaints([
+        (complaints[i].complaint_id, complaints[i].masked_text, complaint_metadata(complaints[i]))
+        for i in accepted
+    ]) if accepted else []
+    for index, error in zip(accepted, errors):
+        results[index] = IndexComplaintResult(
+            complaint_id=complaints[index].complaint_id,
+            status="indexed" if error is None else "failed",
+            error=error,
+        )
+
+    return IndexComplaintsBatchResponse(
+        results=results,
+        indexed=sum(1 for r in results if r.status == "indexed"),
+        rejected=sum(1 for r in results if r.status == "rejected"),
+        failed=sum(1 for r in results if r.status == "failed"),
+    )
+
 @router.get("/similar/{complaint_id}")
 def find_similar_complaints(
     complaint_id: str,
@@ -0,0 +1,120 @@
+"""Dynamic micro-batching for model calls made from concurrent request threads."""
+from concurrent.futures import Future
+from queue import Empty, Queue
+import contextvars
+from threading import Lock, Thread
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+import logging
+import os
+import time
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+logger = logging.getLogger("complaintops.batching")
+
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "0"))
+MICROBATCH_MAX_ITEMS = int(os.getenv("MICROBATCH_MAX_ITEMS", "32"))
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesces single-item calls from many threads into batched calls.
+
+    Callers block in submit(). A worker thread takes the first queued item,
+    keeps collecting until max_items are queued or max_wait_ms has passed,
+    runs batch_fn once on the whole batch and hands each caller its result.
+    batch_fn must return one result per input, in order. It runs in the
+    context of the first caller in the batch, so stage metrics are attributed
+    to that request.
+
+    With max_wait_ms <= 0 or max_items <= 1 batching is off and submit()
+    calls batch_fn directly on a batch of one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[T]], List[R]],
+        max_items: int = MICROBATCH_MAX_ITEMS,
+        max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+    ) -> None:
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_items = max_items
+        self.max_wait_ms = max_wait_ms
+        self._queue: "Queue[Tuple[T, Future, contextvars.Context]]" = Queue()
+        self._lock = Lock()
+        self._worker: Optional[Thread] = None
+        self._worker_pid: Optional[int] = None
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait_ms > 0 and self.max_items > 1
+
+    def submit(self, item: T) -> R:
+        if not self.enabled:
+            return self.batch_fn([item])[0]
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future, contextvars.copy_context()))
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork; restart the worker in each process
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                self._queue = Queue()
+            self._worker = Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect(self) -> List[Tuple[T, Future, contextvars.Context]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for item, _, _ in batch]
+            context = batch[0][2]
+            try:
+                results = context.run(self.batch_fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as exc:
+                logger.error("microbatch_failed name=%s batch_size=%d error=%s", self.name, len(items), exc)
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
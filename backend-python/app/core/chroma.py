@@ -0,0 +1,13 @@
+"""Chroma client creation shared by the services that use the chroma_db path."""
+from threading import Lock
+
+import chromadb
+
+# Clients for one path opened concurrently race on Chroma's system setup
+# (SQLite schema migration); services built in parallel take turns here
+_client_lock = Lock()
+
+
+def open_persistent_client(path: str):
+    with _client_lock:
+        return chromadb.PersistentClient(path=path)
@@ -24,3 +24,6 @@ CategoryLiteral = Literal[
 
 TriageStatus = Literal["OK", "FAILED", "FALLBACK"]
 RiskLevel = Literal["LOW", "MEDIUM", "HIGH"]
+
+# Upper bound on items accepted by batch endpoints in a single request
+BATCH_MAX_ITEMS = 500
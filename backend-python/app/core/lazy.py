@@ -0,0 +1,189 @@
+"""
+Deferred construction of the service singletons.
+
+Each service module exposes its singleton as a LazyService proxy. The real
+object is built on first attribute access, or ahead of time by
+load_services(), which builds every registered service in parallel and keeps
+per-component state and timings for the /ready endpoint.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+import logging
+import os
+import time
+
+T = TypeVar("T")
+
+logger = logging.getLogger("complaintops.lazy")
+
+# lazy: build on first use; background: start building at app startup and
+# serve /ready 503 until done; startup: block app startup until built;
+# preload: build while app.main is imported (gunicorn --preload)
+SERVICE_LOAD_MODE = os.getenv("SERVICE_LOAD_MODE", "background").lower()
+# A failed build is not retried for this long; accesses in between fail fast
+SERVICE_RETRY_SECONDS = float(os.getenv("SERVICE_RETRY_SECONDS", "30"))
+
+_registry: Dict[str, "LazyService"] = {}
+
+
+class ServiceUnavailableError(RuntimeError):
+    """The service (or one it depends on) failed to build and is not retried yet."""
+
+
+class LazyService(Generic[T]):
+    """
+    Proxy that builds its service on first use.
+
+    Attribute reads, writes and deletes are forwarded to the built instance,
+    so callers use it exactly like the service itself; the proxy's own
+    methods are prefixed (load_service, service_status) to stay out of the
+    way. `warm` runs once after construction for work the constructor defers
+    (e.g. loading a model). Services in `depends_on` are built first; if one
+    fails, this service is marked failed with its error. A failed build is
+    recorded, and accesses within retry_seconds (SERVICE_RETRY_SECONDS) raise
+    ServiceUnavailableError instead of rebuilding; the next access after that
+    retries.
+    """
+
+    __slots__ = (
+        "_name", "_factory", "_warm", "_depends_on", "_instance", "_lock",
+        "_state", "_load_seconds", "_error", "_failed_at", "_retry_seconds",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        warm: Optional[Callable[[T], Any]] = None,
+        depends_on: Iterable["LazyService"] = (),
+        retry_seconds: Optional[float] = None,
+    ) -> None:
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_warm", warm)
+        object.__setattr__(self, "_depends_on", tuple(depends_on))
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", Lock())
+        object.__setattr__(self, "_state", "pending")
+        object.__setattr__(self, "_load_seconds", None)
+        object.__setattr__(self, "_error", None)
+        object.__setattr__(self, "_failed_at", None)
+        object.__setattr__(
+            self, "_retry_seconds", SERVICE_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        )
+        _registry[name] = self
+
+    def _check_backoff(self) -> None:
+        failed_at = self._failed_at
+        if failed_at is not None and time.monotonic() - failed_at < self._retry_seconds:
+            raise ServiceUnavailableError(f"{self._name} unavailable: {self._error}")
+
+    def _record_failure(self, error: str, start: float) -> None:
+        object.__setattr__(self, "_state", "failed")
+        object.__setattr__(self, "_error", error)
+        object.__setattr__(self, "_load_seconds", time.perf_counter() - start)
+        object.__setattr__(self, "_failed_at", time.monotonic())
+        logger.error("service_load_failed name=%s error=%s", self._name, error)
+
+    def load_service(self) -> T:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        self._check_backoff()
+        start = time.perf_counter()
+        for dependency in self._depends_on:
+            try:
+                dependency.load_service()
+            except Exception as exc:
+                with self._lock:
+                    if self._instance is None:
+                        self._record_failure(f"dependency {dependency._name} failed: {exc}", start)
+                raise
+        with self._lock:
+            if self._instance is not None:
+                return self._instance
+            # Another thread may have just failed the build
+            self._check_backoff()
+            object.__setattr__(self, "_state", "loading")
+            start = time.perf_counter()
+            try:
+                instance = self._factory()
+                if self._warm is not None:
+                    self._warm(instance)
+            except Exception as exc:
+                self._record_failure(str(exc), start)
+                raise
+            object.__setattr__(self, "_load_seconds", time.perf_counter() - start)
+            object.__setattr__(self, "_error", None)
+            object.__setattr__(self, "_failed_at", None)
+            object.__setattr__(self, "_instance", instance)
+            object.__setattr__(self, "_state", "ready")
+            logger.info("service_loaded name=%s seconds=%.2f", self._name, self._load_seconds)
+            return instance
+
+    @property
+    def service_loaded(self) -> bool:
+        return self._instance is not None
+
+    def service_status(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "error": self._error,
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load_service(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.load_service(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self.load_service(), name)
+
+    def __repr__(self) -> str:
+        return f"<LazyService {self._name} state={self._state}>"
+
+
+def registered_services() -> Dict[str, LazyService]:
+    return dict(_registry)
+
+
+def load_services(names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the registered services in parallel and return their status.
+
+    Failures are recorded in the status rather than raised, so one broken
+    component does not stop the others from loading.
+    """
+    services = [
+        service for name, service in _registry.items()
+        if names is None or name in names
+    ]
+    start = time.perf_counter()
+
+    def load(service: LazyService) -> None:
+        try:
+            service.load_service()
+        except Exception:
+            pass
+
+    if services:
+        with ThreadPoolExecutor(max_workers=len(services), thread_name_prefix="service-load") as pool:
+            list(pool.map(load, services))
+    logger.info(
+        "services_loaded count=%d seconds=%.2f",
+        len(services),
+        time.perf_counter() - start,
+    )
+    return readiness()["components"]
+
+
+def readiness() -> Dict[str, Any]:
+    components = {name: service.service_status() for name, service in _registry.items()}
+    return {
+        "ready": all(status["state"] == "ready" for status in components.values()),
+        "mode": SERVICE_LOAD_MODE,
+        "components": components,
+    }
@@ -0,0 +1,143 @@
+"""
+Per-stage latency histograms exposed in the Prometheus text format.
+
+Stages are timed with stage_timer(). Inside a request the time is summed per
+stage and recorded when the request finishes, labelled with the matched route
+template; slow requests are logged with that breakdown and their request_id.
+Stages may nest (the output PII scan includes a Presidio analyze).
+"""
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+import bisect
+import contextvars
+import logging
+import os
+import time
+
+from app.core.logging import request_id_var
+
+logger = logging.getLogger("complaintops.metrics")
+
+# Prometheus client default buckets, in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "2000"))
+
+# Stage name -> seconds spent in that stage for the current request
+stage_timings_var: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "stage_timings", default=None
+)
+_timings_lock = Lock()
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, +Inf count, sum)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = [[0] * len(self.buckets), 0, 0.0]
+                self._series[label_values] = series
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, (list(b), c, s)) for labels, (b, c, s) in self._series.items())
+        for label_values, (bucket_counts, count, total) in series:
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_DURATION = Histogram(
+    "complaintops_stage_duration_seconds",
+    "Time spent in one pipeline stage per request.",
+    ("stage", "route"),
+)
+REQUEST_DURATION = Histogram(
+    "complaintops_request_duration_seconds",
+    "End-to-end request latency.",
+    ("route", "status"),
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    timings = stage_timings_var.get()
+    if timings is None:
+        # Outside a request (startup, scripts)
+        STAGE_DURATION.observe(seconds, stage, "-")
+        return
+    # Stages of one request can run in parallel threads (/pipeline)
+    with _timings_lock:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one observation of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def start_request() -> Dict[str, float]:
+    """Bind a fresh stage-timings dict to the current context."""
+    timings: Dict[str, float] = {}
+    stage_timings_var.set(timings)
+    return timings
+
+
+def finish_request(route: str, status: int, seconds: float, timings: Dict[str, float]) -> None:
+    REQUEST_DURATION.observe(seconds, route, str(status))
+    with _timings_lock:
+        stages = list(timings.items())
+    for stage, stage_seconds in stages:
+        STAGE_DURATION.observe(stage_seconds, stage, route)
+    if seconds * 1000 >= SLOW_REQUEST_MS:
+        breakdown = ",".join(f"{stage}:{value * 1000:.1f}" for stage, value in sorted(stages))
+        logger.warning(
+            "slow_request route=%s request_id=%s status=%s duration_ms=%.1f stages_ms=%s",
+            route,
+            request_id_var.get(),
+            status,
+            seconds * 1000,
+            breakdown or "-",
+        )
+
+
+def render_metrics() -> str:
+    lines = STAGE_DURATION.render() + REQUEST_DURATION.render()
+    return "\n".join(lines) + "\n"
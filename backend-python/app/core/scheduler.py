@@ -0,0 +1,54 @@
+"""Periodic background jobs running in daemon threads of each worker."""
+from threading import Event, Thread
+from typing import Callable, Optional
+import logging
+import random
+
+logger = logging.getLogger("complaintops.scheduler")
+
+
+class PeriodicJob:
+    """
+    Calls fn every interval_seconds until stop() is called.
+
+    The first run happens after a random delay of up to one interval (at
+    most initial_delay_max seconds), so workers started together do not all
+    fire at once. Exceptions are logged and the job keeps its schedule.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], object],
+        interval_seconds: float,
+        initial_delay_max: float = 60.0,
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.interval_seconds = interval_seconds
+        self.initial_delay_max = initial_delay_max
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "PeriodicJob":
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return self
+        self._thread = Thread(target=self._run, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+        logger.info("job_scheduled name=%s interval_seconds=%s", self.name, self.interval_seconds)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = random.uniform(0, min(self.interval_seconds, self.initial_delay_max))
+        while not self._stop.wait(delay):
+            try:
+                self.fn()
+            except Exception:
+                logger.exception("job_failed name=%s", self.name)
+            delay = self.interval_seconds
@@ -0,0 +1,120 @@
+"""Per-thread SQLite connections for stores shared by several gunicorn workers."""
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Iterator, List
+import logging
+import os
+import sqlite3
+import weakref
+
+logger = logging.getLogger("complaintops.sqlite_pool")
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+# Prepared statements kept per connection (sqlite3 compiles each SQL string once)
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "64"))
+
+
+class _ThreadConnection:
+    """Holds one thread's connection in thread-local storage; its finalizer closes it."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+
+class SQLitePool:
+    """
+    One long-lived connection per thread, in WAL mode.
+
+    WAL lets readers run alongside the single writer, and workers in other
+    processes wait on the busy timeout instead of failing with "database is
+    locked". Writes go through write(), which takes the write lock up front
+    with BEGIN IMMEDIATE so a read-then-write transaction never has to
+    upgrade its lock (and deadlock) halfway through. Connections stay open
+    for the life of the thread, so sqlite3's statement cache turns repeated
+    SQL into prepared statements, and are closed when the thread exits
+    (threadpool workers come and go).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS,
+        synchronous: str = SQLITE_SYNCHRONOUS,
+    ) -> None:
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self._local = local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = Lock()
+        # Connections inherited over fork: never used, never closed (closing
+        # would release locks and WAL state that belong to the parent)
+        self._inherited: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,  # transactions are explicit, see write()
+            cached_statements=SQLITE_STATEMENT_CACHE,
+            # Only the owning thread uses it; close_all() may run elsewhere
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _ThreadConnection(self._connect())
+            self._local.holder = holder
+            with self._connections_lock:
+                self._connections.append(holder.conn)
+            # Thread-local storage is cleared when the thread exits, which
+            # drops the holder and runs this
+            weakref.finalize(holder, self._release, holder.conn, os.getpid())
+        return holder.conn
+
+    def _release(self, conn: sqlite3.Connection, pid: int) -> None:
+        if os.getpid() != pid:
+            return  # inherited over fork: see reset_after_fork
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction on this thread's connection; commits on success."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def close_all(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = local()
+
+    def reset_after_fork(self) -> None:
+        """Forget connections opened by the parent process; this process opens its own."""
+        # A lock held by another thread at fork time would never be released here
+        self._connections_lock = Lock()
+        self._inherited.extend(self._connections)
+        self._connections = []
+        self._local = local()
+        if self._inherited:
+            logger.info("sqlite_connections_inherited count=%d path=%s", len(self._inherited), self.path)
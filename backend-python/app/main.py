@@ -1,19 +1,60 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+import threading
+import time
 import uuid
 from app.api.routes import router as api_router
+from app.core.lazy import SERVICE_LOAD_MODE, load_services, readiness
 from app.core.logging import configure_logging, request_id_var
+from app.core.metrics import finish_request, start_request
+from app.core.preload import memory_report, prepare_preload
+from app.services.review_service import review_store, start_reencryption_job, start_retention_scheduler
+
+configure_logging()
+
+if SERVICE_LOAD_MODE == "preload":
+    # Build models at import so a gunicorn --preload master holds them before fork
+    prepare_preload()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if SERVICE_LOAD_MODE == "startup":
+        await run_in_threadpool(load_services)
+    elif SERVICE_LOAD_MODE == "background":
+        threading.Thread(target=load_services, name="service-load", daemon=True).start()
+    # Rows still under a rotated-out key are re-encrypted in the background
+    start_reencryption_job()
+    retention = start_retention_scheduler()
+    yield
+    retention.stop(timeout=5)
+    if review_store.service_loaded:
+        # Closing the last connection checkpoints the WAL into reviews.db
+        review_store.close()
 
 # Initialize FastAPI app
-app = FastAPI(title="ComplaintOps AI Service", version="0.1.0")
+app = FastAPI(title="ComplaintOps AI Service", version="0.1.0", lifespan=lifespan)
 
-configure_logging()
+def route_template(request: Request) -> str:
+    """Matched route path template, used as the metrics label (e.g. /similar/{complaint_id})."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
 
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
     request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
     request.state.request_id = request_id
     request_id_var.set(request_id)
-    response = await call_next(request)
+    timings = start_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        # The router records the matched route in the scope
+        finish_request(route_template(request), status, time.perf_counter() - start, timings)
     response.headers["X-Request-ID"] = request_id
     return response
 
@@ -21,6 +62,17 @@ async def add_request_id(request: Request, call_next):
 def read_root():
     return {"message": "ComplaintOps AI Service is running"}
 
+@app.get("/ready")
+def read_ready():
+    """Readiness: 200 once every service is built, 503 with per-component state otherwise."""
+    report = readiness()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/memory")
+def read_memory():
+    """Memory of the worker that served this request (RSS, PSS, shared/private)."""
+    return memory_report()
+
 app.include_router(api_router)
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 
+import argparse
 import hashlib
 import json
 import os
@@ -51,7 +52,24 @@ def hash_dataset(frame: pd.DataFrame) -> str:
     )
     return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-def train():
+def build_classifier():
+    # We calibrate the classifier for better probability estimates
+    return CalibratedClassifierCV(
+        estimator=LogisticRegression(class_weight='balanced', random_state=42),
+        method='sigmoid',
+        cv=3
+    )
+
+def train(shared_vectorizer: bool = False):
+    """
+    Train category and urgency models.
+
+    With shared_vectorizer=True a single TfidfVectorizer is fitted once and
+    both classifier heads are trained on its output. The heads and the
+    vectorizer are saved together as one artifact so inference tokenizes
+    each text once; standalone pipelines are still written for older readers
+    of latest.json.
+    """
     os.makedirs(MODELS_DIR, exist_ok=True)
     os.makedirs(REPORTS_DIR, exist_ok=True)
     
@@ -68,34 +86,40 @@ def train():
         df, test_size=0.3, random_state=42, stratify=df["category"]
     )
     
-    # Define Pipelines with Calibration
-    # We calibrate the classifier for better probability estimates
-    
-    # Category Model
-    cat_pipeline = Pipeline([
-        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1,2))),
-        ('clf', CalibratedClassifierCV(
-            estimator=LogisticRegression(class_weight='balanced', random_state=42),
-            method='sigmoid',
-            cv=3
-        ))
-    ])
-    
-    # Urgency Model
-    urg_pipeline = Pipeline([
-        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1,2))),
-        ('clf', CalibratedClassifierCV(
-            estimator=LogisticRegression(class_weight='balanced', random_state=42),
-            method='sigmoid', 
-            cv=3
-        ))
-    ])
-    
-    print("Training Category Model...")
-    cat_pipeline.fit(train_df["text"], train_df["category"])
-    
-    print("Training Urgency Model...")
-    urg_pipeline.fit(train_df["text"], train_df["urgency"])
+    if shared_vectorizer:
+        vectorizer = TfidfVectorizer(max_features=1000, ngram_range=(1,2))
+        print("Fitting shared TF-IDF vectorizer...")
+        train_features = vectorizer.fit_transform(train_df["text"])
+
+        print("Training Category Head...")
+        cat_head = build_classifier().fit(train_features, train_df["category"])
+
+        print("Training Urgency Head...")
+        urg_head = build_classifier().fit(train_features, train_df["urgency"])
+
+        # Pipelines sharing the fitted vectorizer, for evaluation and legacy loaders
+        cat_pipeline = Pipeline([('tfidf', vectorizer), ('clf', cat_head)])
+        urg_pipeline = Pipeline([('tfidf', vectorizer), ('clf', urg_head)])
+    else:
+        # Define Pipelines with Calibration
+        
+        # Category Model
+        cat_pipeline = Pipeline([
+            ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1,2))),
+            ('clf', build_classifier())
+        ])
+        
+        # Urgency Model
+        urg_pipeline = Pipeline([
+            ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1,2))),
+            ('clf', build_classifier())
+        ])
+        
+        print("Training Category Model...")
+        cat_pipeline.fit(train_df["text"], train_df["category"])
+        
+        print("Training Urgency Model...")
+        urg_pipeline.fit(train_df["text"], train_df["urgency"])
     
     # Evaluation
     print("Evaluating...")
@@ -119,6 +143,7 @@ def train():
         },
         "parameters": {
             "vectorizer": "TfidfVectorizer(max_features=1000)",
+            "vectorizer_mode": "shared" if shared_vectorizer else "per_model",
             "classifier": "LogisticRegression(balanced) + CalibratedClassifierCV(sigmoid)"
         }
     }
@@ -144,6 +169,20 @@ def train():
         "urgency_model_path": urg_model_path,
         "model_card_path": report_path
     }
+
+    if shared_vectorizer:
+        shared_model_path = os.path.join(MODELS_DIR, f"triage_shared_{timestamp}.pkl")
+        joblib.dump(
+            {
+                "vectorizer": cat_pipeline.named_steps["tfidf"],
+                "category_head": cat_pipeline.named_steps["clf"],
+                "urgency_head": urg_pipeline.named_steps["clf"],
+            },
+            shared_model_path,
+        )
+        # Readers that don't know "format" keep using the per-model paths above
+        latest_meta["format"] = "shared_tfidf"
+        latest_meta["shared_model_path"] = shared_model_path
     
     with open(os.path.join(MODELS_DIR, "latest.json"), "w", encoding="utf-8") as f:
         json.dump(latest_meta, f, indent=2)
@@ -151,4 +190,11 @@ def train():
     print("Training Complete. Models updated.")
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train triage models")
+    parser.add_argument(
+        "--shared-vectorizer",
+        action="store_true",
+        help="Fit one TF-IDF vectorizer shared by the category and urgency heads",
+    )
+    args = parser.parse_args()
+    train(shared_vectorizer=args.shared_vectorizer)
@@ -0,0 +1,137 @@
+"""
+Structure-aware Markdown chunking for SOP ingestion.
+
+Documents are split into blocks (paragraphs and top-level list items with
+their nested items) under the heading path they belong to. Blocks of one
+section are packed into chunks that fit a token budget measured with the
+embedding model's tokenizer; a chunk never spans two sections. Each chunk
+starts with its section path so the embedding sees the heading context.
+"""
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Tuple
+import re
+
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+LIST_ITEM = re.compile(r"^(?:[-*+]|\d+[.)])\s+")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+SECTION_SEPARATOR = " > "
+
+TokenCounter = Callable[[str], int]
+
+
+@dataclass
+class MarkdownChunk:
+    text: str
+    section_path: List[str]
+
+    @property
+    def section(self) -> str:
+        return SECTION_SEPARATOR.join(self.section_path)
+
+
+def iter_blocks(text: str) -> Iterator[Tuple[List[str], str]]:
+    """Yield (heading path, block text) in document order."""
+    headings: List[Tuple[int, str]] = []
+    lines: List[str] = []
+
+    def flush():
+        block = "\n".join(lines).strip()
+        lines.clear()
+        if block:
+            return [title for _, title in headings], block
+        return None
+
+    for line in text.splitlines():
+        heading = HEADING.match(line)
+        if heading:
+            block = flush()
+            if block:
+                yield block
+            level = len(heading.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, heading.group(2)))
+        elif not line.strip():
+            block = flush()
+            if block:
+                yield block
+        elif LIST_ITEM.match(line) and lines:
+            # Top-level list items start a block; indented ones stay with their parent
+            block = flush()
+            if block:
+                yield block
+            lines.append(line)
+        else:
+            lines.append(line)
+
+    block = flush()
+    if block:
+        yield block
+
+
+def _split_words(text: str, budget: int, count_tokens: TokenCounter) -> Iterator[str]:
+    current: List[str] = []
+    for word in text.split():
+        if current and count_tokens(" ".join(current + [word])) > budget:
+            yield " ".join(current)
+            current = []
+        current.append(word)
+    if current:
+        yield " ".join(current)
+
+
+def _split_to_budget(block: str, budget: int, count_tokens: TokenCounter) -> Iterator[str]:
+    """Split an oversized block at sentence boundaries, then at words."""
+    if count_tokens(block) <= budget:
+        yield block
+        return
+    current = ""
+    for sentence in SENTENCE_END.split(block):
+        candidate = f"{current} {sentence}" if current else sentence
+        if count_tokens(candidate) <= budget:
+            current = candidate
+            continue
+        if current:
+            yield current
+        if count_tokens(sentence) <= budget:
+            current = sentence
+        else:
+            yield from _split_words(sentence, budget, count_tokens)
+            current = ""
+    if current:
+        yield current
+
+
+def chunk_markdown(text: str, max_tokens: int, count_tokens: TokenCounter) -> List[MarkdownChunk]:
+    """
+    Split Markdown into section-bounded chunks of at most max_tokens tokens
+    (including the section path prefix).
+    """
+    chunks: List[MarkdownChunk] = []
+    path: List[str] = []
+    pieces: List[str] = []
+    used = 0
+    budget = max_tokens
+
+    def emit():
+        if pieces:
+            prefix = SECTION_SEPARATOR.join(path)
+            body = "\n".join(pieces)
+            chunks.append(MarkdownChunk(text=f"{prefix}\n{body}" if prefix else body, section_path=list(path)))
+
+    for block_path, block in iter_blocks(text):
+        if block_path != path:
+            emit()
+            path, pieces, used = block_path, [], 0
+            prefix = SECTION_SEPARATOR.join(path)
+            # Keep at least half the budget for content under very long heading paths
+            budget = max(max_tokens // 2, max_tokens - count_tokens(prefix)) if prefix else max_tokens
+        for piece in _split_to_budget(block, budget, count_tokens):
+            tokens = count_tokens(piece)
+            if pieces and used + tokens > budget:
+                emit()
+                pieces, used = [], 0
+            pieces.append(piece)
+            used += tokens
+    emit()
+    return chunks
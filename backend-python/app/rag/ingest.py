@@ -1,8 +1,35 @@
+import argparse
 import chromadb
-from chromadb.utils import embedding_functions
+import hashlib
+import json
 import os
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.rag.chunking import MarkdownChunk, chunk_markdown
+from app.rag.lexical import LEXICAL_INDEX_DIR, build_from_collection
+from app.rag.partitions import CategoryPartitions
+from app.services.embedding_provider import EMBEDDING_MODEL_METADATA_KEY, embedding_provider
+
+COLLECTION_NAME = "complaint_sops"
+# Chunks embedded and written to Chroma per call
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Token budget per chunk; 0 uses the embedding model's max sequence length
+RAG_CHUNK_MAX_TOKENS = int(os.getenv("RAG_CHUNK_MAX_TOKENS", "0"))
+# Bump when chunk boundaries change so incremental runs re-chunk every file
+CHUNKER_VERSION = "markdown-v1"
+# Collection metadata key changed by every ingestion that modifies the index;
+# RAG result caches are keyed on it
+INDEX_VERSION_KEY = "index_version"
+# Collection metadata key with {doc_name: file_hash} of files that yield no
+# chunks; they leave nothing in the collection to compare against
+EMPTY_FILES_KEY = "empty_files"
+
+# (chunk_id, chunk_text, metadata)
+ChunkRecord = Tuple[str, str, dict]
 
 def chunk_text(text: str, max_words: int = 120, overlap: int = 20) -> list[str]:
+    """Legacy fixed word windows; ingestion uses chunk_document."""
     words = text.split()
     chunks = []
     start = 0
@@ -14,25 +41,156 @@ def chunk_text(text: str, max_words: int = 120, overlap: int = 20) -> list[str]:
         start = max(0, end - overlap)
     return chunks
 
-def ingest_data():
+def chunk_budget() -> int:
+    # Longer chunks would be silently truncated by the embedding model
+    return RAG_CHUNK_MAX_TOKENS or embedding_provider.max_seq_length or 256
+
+def chunk_document(text: str) -> List[MarkdownChunk]:
+    """Header-aware chunks sized with the embedding model's tokenizer."""
+    return chunk_markdown(text, chunk_budget(), embedding_provider.count_tokens)
+
+def bump_index_version(collection) -> str:
+    """Stamp the collection with a new opaque index version and return it."""
+    version = uuid.uuid4().hex[:16]
+    collection.modify(metadata={**(collection.metadata or {}), INDEX_VERSION_KEY: version})
+    return version
+
+def embedded_with_other_model(client) -> bool:
+    """True if the collection holds chunks without the configured model's stamp."""
+    try:
+        existing = client.get_collection(COLLECTION_NAME, embedding_function=None)
+    except Exception:
+        return False
+    stamped_model = (existing.metadata or {}).get(EMBEDDING_MODEL_METADATA_KEY)
+    return stamped_model != embedding_provider.model_name and existing.count() > 0
+
+def recorded_empty_files(collection) -> Dict[str, str]:
+    """Map doc_name -> file_hash for indexed files that produced no chunks."""
+    return json.loads((collection.metadata or {}).get(EMPTY_FILES_KEY, "{}"))
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def file_category(filename: str) -> str:
+    # Simple Category Heuristic based on filename
+    if "credit" in filename: return "CARD_LIMIT_CREDIT"
+    if "transfer" in filename: return "TRANSFER_DELAY"
+    if "security" in filename: return "ACCESS_LOGIN_MOBILE"
+    return "GENERAL"
+
+def iter_sop_files(sops_dir: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (filename, raw bytes) for each Markdown SOP, one file at a time."""
+    for filename in sorted(os.listdir(sops_dir)):
+        if filename.endswith(".md"):
+            with open(os.path.join(sops_dir, filename), "rb") as f:
+                yield filename, f.read()
+
+def iter_chunks(doc_name: str, text: str, file_hash: str) -> Iterator[ChunkRecord]:
+    """
+    Yield the chunks of one file with content-addressed ids.
+
+    The id is derived from the chunk text, so an unchanged chunk keeps its id
+    (and its embedding) when other parts of the file change.
+    """
+    category = file_category(doc_name)
+    seen = set()
+    for chunk in chunk_document(text):
+        chunk_hash = _sha256(chunk.text.encode("utf-8"))
+        if chunk_hash in seen:
+            continue
+        seen.add(chunk_hash)
+        chunk_id = f"{doc_name}_{chunk_hash[:16]}"
+        yield chunk_id, chunk.text, {
+            "source": "Bank_SOP_v2",
+            "doc_name": doc_name,
+            "chunk_id": chunk_id,
+            "section": chunk.section,
+            "category": category,
+            "file_hash": file_hash,
+            "chunk_hash": chunk_hash,
+        }
+
+def existing_chunks(collection, page_size: int = 1000) -> Dict[str, Dict[str, str]]:
+    """Map doc_name -> {chunk_id: file_hash} for what is already indexed (metadata only)."""
+    indexed: Dict[str, Dict[str, str]] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            metadata = metadata or {}
+            doc_name = metadata.get("doc_name", "unknown")
+            indexed.setdefault(doc_name, {})[chunk_id] = metadata.get("file_hash", "")
+        if len(page["ids"]) < page_size:
+            return indexed
+        offset += page_size
+
+class BatchWriter:
+    """Buffers new chunks and embeds/upserts them in bounded batches."""
+
+    def __init__(self, collection, batch_size: int, partitions: Optional[CategoryPartitions] = None) -> None:
+        self.collection = collection
+        self.partitions = partitions
+        self.batch_size = max(1, batch_size)
+        self.pending: List[ChunkRecord] = []
+        self.embedded = 0
+
+    def add(self, record: ChunkRecord) -> None:
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        ids = [chunk_id for chunk_id, _, _ in self.pending]
+        documents = [text for _, text, _ in self.pending]
+        metadatas = [metadata for _, _, metadata in self.pending]
+        embeddings = embedding_provider.embed(documents)
+        self.collection.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+        if self.partitions is not None:
+            # Same vectors go to the category partition; nothing is embedded twice
+            self.partitions.upsert(ids, documents, embeddings, metadatas)
+        self.embedded += len(self.pending)
+        self.pending = []
+
+def ingest_data(full: bool = False, batch_size: int = INGEST_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Ingest data/sops/*.md into the complaint_sops collection.
+
+    Incremental by default: files whose hash matches the indexed copy are
+    skipped (files without any chunks are tracked in the collection
+    metadata), changed files only embed chunks that are new, and chunks of
+    changed or removed files that no longer exist are deleted. The collection
+    stays online throughout. full=True drops and rebuilds it instead; so
+    does a collection embedded with another (or an unrecorded) model, since
+    none of its vectors can be reused.
+    Writes go to the per-category partitions as well; if those are missing
+    or out of step they are recreated from the collection's stored vectors.
+    The BM25 index next to the collection is rebuilt whenever chunks changed,
+    and the collection's index version is then bumped so running services
+    drop cached retrieval results.
+    """
     print("Initializing ChromaDB for ingestion...")
     db_path = os.path.join(os.getcwd(), "chroma_db")
     client = chromadb.PersistentClient(path=db_path)
-    embedding_fn = embedding_functions.DefaultEmbeddingFunction()
-    
-    # Delete existing to start fresh
-    try:
-        client.delete_collection("complaint_sops")
-    except:
-        pass
 
-    collection = client.create_collection(
-        name="complaint_sops",
-        embedding_function=embedding_fn
-    )
+    if not full and embedded_with_other_model(client):
+        print(f"Collection was embedded with another model; rebuilding with {embedding_provider.model_name}.")
+        full = True
+
+    partitions = CategoryPartitions(client)
+    if full:
+        # Delete existing to start fresh
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+        partitions.drop()
+
+    # Same model as RAG queries; the collection is stamped with its id
+    print(f"Embedding model: {embedding_provider.model_name}")
+    collection = embedding_provider.open_collection(client, COLLECTION_NAME)
 
-    # 1. Load Markdown Files from data/sops/
-    documents = []
     sops_dir = os.path.join(os.getcwd(), "data", "sops")
     if not os.path.exists(sops_dir):
         print(f"Warning: {sops_dir} not found. Creating it.")
@@ -41,56 +199,97 @@ def ingest_data():
         with open(os.path.join(sops_dir, "readme.md"), "w", encoding="utf-8") as f:
             f.write("# Welcome\nSystem initialized. Please add SOPs here.")
 
-    for filename in os.listdir(sops_dir):
-        if filename.endswith(".md"):
-            file_path = os.path.join(sops_dir, filename)
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            
-            # Simple Category Heuristic based on filename
-            category = "GENERAL"
-            if "credit" in filename: category = "CARD_LIMIT_CREDIT"
-            elif "transfer" in filename: category = "TRANSFER_DELAY"
-            elif "security" in filename: category = "ACCESS_LOGIN_MOBILE"
-            
-            documents.append({
-                "text": text,
-                "category": category,
-                "filename": filename
-            })
-
-    chunked_docs = []
-    ids = []
-    metadatas = []
-    
-    for doc in documents:
-        doc_name = doc["filename"]
-        # Split by headers to keep context or just simple chunking
-        # For simplicity, using valid chunk_text function
-        for chunk_index, chunk in enumerate(chunk_text(doc["text"])):
-            chunk_id = f"{doc_name}_chunk_{chunk_index}"
-            chunked_docs.append(chunk)
-            ids.append(chunk_id)
-            metadatas.append(
-                {
-                    "source": "Bank_SOP_v2",
-                    "doc_name": doc_name,
-                    "chunk_id": chunk_id,
-                    "category": doc["category"],
-                }
-            )
-
-    if not chunked_docs:
-        print("No documents found to ingest!")
-        return
-
-    print(f"Adding {len(chunked_docs)} chunks from {len(documents)} files...")
-    collection.add(
-        documents=chunked_docs,
-        ids=ids,
-        metadatas=metadatas,
+    indexed = existing_chunks(collection)
+    recorded_empty = recorded_empty_files(collection)
+    empty_files: Dict[str, str] = {}
+    writer = BatchWriter(collection, batch_size, partitions)
+    stats = {
+        "files_unchanged": 0, "files_updated": 0, "files_removed": 0,
+        "chunks_embedded": 0, "chunks_deleted": 0, "partitions": 0,
+    }
+    seen_files = set()
+    # Deleted only after the replacement chunks are written
+    stale_ids: List[str] = []
+
+    for doc_name, raw in iter_sop_files(sops_dir):
+        seen_files.add(doc_name)
+        # Chunking settings are part of the hash: changing them re-chunks the file
+        file_hash = _sha256(raw + f"|{CHUNKER_VERSION}|{chunk_budget()}".encode("utf-8"))
+        previous = indexed.get(doc_name, {})
+        if previous and all(h == file_hash for h in previous.values()):
+            stats["files_unchanged"] += 1
+            continue
+        if not previous and recorded_empty.get(doc_name) == file_hash:
+            empty_files[doc_name] = file_hash
+            stats["files_unchanged"] += 1
+            continue
+
+        stats["files_updated"] += 1
+        kept_ids, kept_metadatas = [], []
+        current_ids = set()
+        for chunk_id, chunk, metadata in iter_chunks(doc_name, raw.decode("utf-8"), file_hash):
+            current_ids.add(chunk_id)
+            if chunk_id in previous:
+                # Same text, same embedding: only refresh the file hash
+                kept_ids.append(chunk_id)
+                kept_metadatas.append(metadata)
+            else:
+                writer.add((chunk_id, chunk, metadata))
+        if kept_ids:
+            collection.update(ids=kept_ids, metadatas=kept_metadatas)
+            partitions.update(kept_ids, kept_metadatas)
+        if not current_ids:
+            empty_files[doc_name] = file_hash
+        stale_ids.extend(chunk_id for chunk_id in previous if chunk_id not in current_ids)
+
+    writer.flush()
+    stats["chunks_embedded"] = writer.embedded
+
+    for doc_name, chunk_ids in indexed.items():
+        if doc_name not in seen_files:
+            stale_ids.extend(chunk_ids)
+            stats["files_removed"] += 1
+    for start in range(0, len(stale_ids), writer.batch_size):
+        collection.delete(ids=stale_ids[start:start + writer.batch_size])
+        partitions.delete(stale_ids[start:start + writer.batch_size])
+    stats["chunks_deleted"] = len(stale_ids)
+    if empty_files != recorded_empty:
+        collection.modify(metadata={
+            **(collection.metadata or {}),
+            EMPTY_FILES_KEY: json.dumps(empty_files, sort_keys=True),
+        })
+
+    changed = full or stats["files_updated"] or stats["files_removed"]
+    # First run after upgrading, or an interrupted earlier run
+    if partitions.count() != collection.count():
+        copied = partitions.rebuild(collection)
+        changed = True
+        print(f"Category partitions rebuilt from the collection ({copied} chunks).")
+    stats["partitions"] = len(partitions.collections)
+
+    # The BM25 index mirrors the collection; rebuild it whenever chunks changed
+    lexical_path = os.path.join(db_path, LEXICAL_INDEX_DIR)
+    if changed or not os.path.exists(os.path.join(lexical_path, "manifest.json")):
+        lexical_index = build_from_collection(collection)
+        lexical_index.save(lexical_path)
+        changed = True
+        print(f"Lexical index written: {len(lexical_index)} chunks, {len(lexical_index.vocab)} terms.")
+
+    # Last, so a running service only sees the new version once every index is written
+    if changed:
+        print(f"Index version: {bump_index_version(collection)}")
+
+    print(
+        "Ingestion complete: {files_updated} updated, {files_unchanged} unchanged, "
+        "{files_removed} removed files; {chunks_embedded} chunks embedded, "
+        "{chunks_deleted} deleted; {partitions} category partitions.".format(**stats)
     )
-    print("Ingestion complete. ChromaDB is ready.")
+    print(f"ChromaDB is ready ({collection.count()} chunks).")
+    return stats
 
 if __name__ == "__main__":
-    ingest_data()
+    parser = argparse.ArgumentParser(description="Ingest SOP Markdown files into ChromaDB")
+    parser.add_argument("--full", action="store_true", help="Drop the collection and rebuild it")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+    ingest_data(full=args.full, batch_size=args.batch_size)
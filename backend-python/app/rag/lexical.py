@@ -0,0 +1,204 @@
+"""
+BM25 lexical index over the SOP chunks.
+
+Dense MiniLM embeddings blur exact banking terms ("EFT", "FAST",
+"chargeback"); BM25 matches them literally. The index is built at ingest
+time from the Chroma collection and stored next to it as flat numpy arrays
+(CSR-style postings) plus a small JSON manifest. At startup the arrays are
+memory-mapped, so every gunicorn worker shares the same pages.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import math
+import os
+import re
+import shutil
+
+import numpy as np
+
+logger = logging.getLogger("complaintops.lexical")
+
+LEXICAL_INDEX_DIR = "bm25"  # inside the Chroma persist directory
+FORMAT_VERSION = 1
+
+TOKEN = re.compile(r"\w+")
+TF_MAX = np.iinfo(np.uint16).max
+_ARRAYS = ("doc_len", "doc_category", "term_offsets", "postings_doc", "postings_tf")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with Turkish dotted/dotless i folded together."""
+    # "İ".lower() leaves a combining dot; "ı" and "i" are matched as one letter
+    folded = text.lower().replace("\u0307", "").replace("ı", "i")
+    return [
+        token for token in TOKEN.findall(folded)
+        # Masking placeholders carry no meaning for retrieval
+        if len(token) > 1 and not token.startswith("masked_")
+    ]
+
+
+def fuse_rankings(rankings: Iterable[Sequence[str]], k: int = 60) -> List[str]:
+    """Reciprocal-rank fusion: score(d) = sum over rankings of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
+
+
+class BM25Index:
+    def __init__(
+        self,
+        ids: List[str],
+        categories: List[str],
+        terms: List[str],
+        arrays: Dict[str, np.ndarray],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.ids = ids
+        self.categories = categories
+        self.vocab = {term: index for index, term in enumerate(terms)}
+        self.doc_len = arrays["doc_len"]
+        self.doc_category = arrays["doc_category"]
+        self.term_offsets = arrays["term_offsets"]
+        self.postings_doc = arrays["postings_doc"]
+        self.postings_tf = arrays["postings_tf"]
+        self.k1 = k1
+        self.b = b
+        # Floor of 1: a corpus whose chunks all tokenize to nothing has mean 0
+        self.avg_doc_len = max(float(self.doc_len.mean()) if len(ids) else 0.0, 1.0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: Sequence[str], documents: Sequence[str], categories: Sequence[str]) -> "BM25Index":
+        category_names = sorted(set(categories))
+        category_codes = {name: code for code, name in enumerate(category_names)}
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_len = np.zeros(len(ids), dtype=np.int32)
+        for doc_index, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            doc_len[doc_index] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_index, tf))
+
+        terms = sorted(postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for index, term in enumerate(terms):
+            term_offsets[index + 1] = term_offsets[index] + len(postings[term])
+        flat = [entry for term in terms for entry in postings[term]]
+        arrays = {
+            "doc_len": doc_len,
+            "doc_category": np.array([category_codes[c] for c in categories], dtype=np.int16),
+            "term_offsets": term_offsets,
+            "postings_doc": np.array([doc for doc, _ in flat], dtype=np.int32),
+            # BM25 saturates long before the uint16 limit; clip instead of wrapping
+            "postings_tf": np.array([min(tf, TF_MAX) for _, tf in flat], dtype=np.uint16),
+        }
+        return cls(list(ids), category_names, terms, arrays)
+
+    def save(self, path: str) -> None:
+        """Write the index to a directory, replacing any previous one."""
+        staging = f"{path}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in _ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+        terms = sorted(self.vocab, key=self.vocab.__getitem__)
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "categories": self.categories,
+            "terms": terms,
+        }
+        with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        # Readers only ever see a complete index directory
+        previous = f"{path}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, previous)
+        os.replace(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported lexical index format {manifest.get('format_version')}")
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in _ARRAYS
+        }
+        return cls(manifest["ids"], manifest["categories"], manifest["terms"], arrays, manifest["k1"], manifest["b"])
+
+    def covers(self, tokens: Sequence[str]) -> bool:
+        """True if every token occurs somewhere in the index."""
+        return bool(tokens) and all(token in self.vocab for token in tokens)
+
+    def search(self, query: str, top_k: int, category: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Return up to top_k (chunk id, BM25 score) pairs with a positive score."""
+        if not self.ids or top_k <= 0:
+            return []
+        category_code = None
+        if category:
+            if category not in self.categories:
+                return []
+            category_code = self.categories.index(category)
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        total = len(self.ids)
+        for token in set(tokenize(query)):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = int(self.term_offsets[term]), int(self.term_offsets[term + 1])
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avg_doc_len)
+            # A term occurs once per document in its postings, so plain indexing is safe
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if category_code is not None:
+            scores[self.doc_category != category_code] = 0
+        candidates = np.flatnonzero(scores > 0)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
+        return [(self.ids[i], float(scores[i])) for i in ranked]
+
+
+def load_lexical_index(path: str) -> Optional[BM25Index]:
+    """Memory-map the index at path, or return None if it is missing or unreadable."""
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        return None
+    try:
+        return BM25Index.load(path)
+    except Exception as e:
+        logger.warning("lexical_index_unavailable path=%s error=%s", path, e)
+        return None
+
+
+def build_from_collection(collection, page_size: int = 1000) -> BM25Index:
+    """Build the index from every chunk stored in a Chroma collection."""
+    ids: List[str] = []
+    documents: List[str] = []
+    categories: List[str] = []
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            ids.append(chunk_id)
+            documents.append(document or "")
+            categories.append((metadata or {}).get("category", "GENERAL"))
+        if len(page["ids"]) < page_size:
+            break
+        offset += page_size
+    return BM25Index.build(ids, documents, categories)
@@ -0,0 +1,109 @@
+"""
+Per-category partitions of the SOP collection.
+
+A category-filtered query against the global collection is a global HNSW
+search post-filtered on metadata: small categories can come back with fewer
+than k hits, and the cost grows with the whole corpus. Ingestion therefore
+also writes every chunk into a collection holding only its category, and
+RAGManager queries that partition directly.
+"""
+from typing import Dict, List, Optional
+import logging
+
+from app.services.embedding_provider import EmbeddingModelMismatchError, embedding_provider
+
+logger = logging.getLogger("complaintops.partitions")
+
+PARTITION_PREFIX = "complaint_sops__"
+
+
+def partition_name(category: str) -> str:
+    return f"{PARTITION_PREFIX}{category.lower()}"
+
+
+class CategoryPartitions:
+    """The partition collections of one Chroma client, keyed by category."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+        self.collections: Dict[str, object] = {}
+        for collection in client.list_collections():
+            if not collection.name.startswith(PARTITION_PREFIX):
+                continue
+            category = (collection.metadata or {}).get("category")
+            if not category:
+                continue
+            try:
+                self.collections[category] = embedding_provider.open_collection(
+                    client, collection.name, {"category": category}
+                )
+            except EmbeddingModelMismatchError as e:
+                # Left out: queries for this category go to the global collection
+                logger.error("partition_disabled category=%s error=%s", category, e)
+
+    def __bool__(self) -> bool:
+        return bool(self.collections)
+
+    def get(self, category: Optional[str]):
+        return self.collections.get(category) if category else None
+
+    def _get_or_create(self, category: str):
+        if category not in self.collections:
+            self.collections[category] = embedding_provider.open_collection(
+                self.client, partition_name(category), {"category": category}
+            )
+        return self.collections[category]
+
+    def _group(self, metadatas: List[dict]) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for index, metadata in enumerate(metadatas):
+            groups.setdefault((metadata or {}).get("category", "GENERAL"), []).append(index)
+        return groups
+
+    def upsert(self, ids: List[str], documents: List[str], embeddings: List, metadatas: List[dict]) -> None:
+        """Write already-embedded chunks into the partition of their category."""
+        for category, indexes in self._group(metadatas).items():
+            self._get_or_create(category).upsert(
+                ids=[ids[i] for i in indexes],
+                documents=[documents[i] for i in indexes],
+                embeddings=[embeddings[i] for i in indexes],
+                metadatas=[metadatas[i] for i in indexes],
+            )
+
+    def update(self, ids: List[str], metadatas: List[dict]) -> None:
+        for category, indexes in self._group(metadatas).items():
+            self._get_or_create(category).update(
+                ids=[ids[i] for i in indexes],
+                metadatas=[metadatas[i] for i in indexes],
+            )
+
+    def delete(self, ids: List[str]) -> None:
+        # The category of a stale id is not known here; ids missing from a partition are ignored
+        for collection in self.collections.values():
+            collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return sum(collection.count() for collection in self.collections.values())
+
+    def drop(self) -> None:
+        """Delete every partition collection, including ones left out on open."""
+        for collection in self.client.list_collections():
+            if collection.name.startswith(PARTITION_PREFIX):
+                self.client.delete_collection(collection.name)
+        self.collections = {}
+
+    def rebuild(self, collection, page_size: int = 1000) -> int:
+        """Recreate every partition from the global collection, reusing its embeddings."""
+        self.drop()
+        copied = 0
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset
+            )
+            if len(page["ids"]):
+                self.upsert(list(page["ids"]), page["documents"], list(page["embeddings"]), page["metadatas"])
+                copied += len(page["ids"])
+            if len(page["ids"]) < page_size:
+                return copied
+            offset += page_size
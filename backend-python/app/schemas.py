@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Literal
 
+from app.core.constants import BATCH_MAX_ITEMS
+
 # === Type Definitions ===
 
 CategoryLiteral = Literal[
@@ -16,6 +18,7 @@ CategoryLiteral = Literal[
 
 TriageStatus = Literal["OK", "FAILED", "FALLBACK"]
 RiskLevel = Literal["LOW", "MEDIUM", "HIGH"]
+RetrievalMode = Literal["vector", "lexical", "hybrid"]
 
 # --- Shared Models ---
 
@@ -36,6 +39,21 @@ class MaskingResponse(BaseModel):
     masked_text: str
     masked_entities: List[str]
 
+class MaskingBatchRequest(BaseModel):
+    texts: List[str] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+
+class MaskingBatchResponse(BaseModel):
+    results: List[MaskingResponse]
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    maxsize: int
+    ttl_seconds: float
+
 class TriageRequest(BaseModel):
     text: str
 
@@ -50,9 +68,16 @@ class TriageResponse(BaseModel):
     review_id: Optional[str] = None
     triage_status: TriageStatus = "OK"
 
+class TriageBatchRequest(BaseModel):
+    texts: List[str] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+
+class TriageBatchResponse(BaseModel):
+    results: List[TriageResponse]
+
 class RAGRequest(BaseModel):
     text: str
     category: Optional[str] = None
+    retrieval_mode: Optional[RetrievalMode] = None  # Defaults to RAG_RETRIEVAL_MODE
 
 class RAGResponse(BaseModel):
     relevant_sources: List[SourceItem]
@@ -87,6 +112,79 @@ class ReviewActionResponse(BaseModel):
     status: str
     notes: Optional[str] = None
 
+class ReviewQueueItem(BaseModel):
+    review_id: str
+    status: str
+    created_at: str
+    updated_at: str
+    masked_text: str
+    category: str
+    category_confidence: float
+    urgency: str
+    urgency_confidence: float
+    notes: Optional[str] = None
+
+class ReviewQueueResponse(BaseModel):
+    items: List[ReviewQueueItem]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; null on the last page
+
+
+# --- Similarity Models ---
+
+class IndexComplaintRequest(BaseModel):
+    complaint_id: str
+    masked_text: str
+    category: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+
+class IndexComplaintsBatchRequest(BaseModel):
+    complaints: List[IndexComplaintRequest] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+
+class IndexComplaintResult(BaseModel):
+    complaint_id: str
+    status: Literal["indexed", "rejected", "failed"]
+    error: Optional[str] = None  # RAW_TEXT_REJECTED or the indexing error
+
+class IndexComplaintsBatchResponse(BaseModel):
+    results: List[IndexComplaintResult]
+    indexed: int
+    rejected: int
+    failed: int
+
+class SimilarComplaintItem(BaseModel):
+    id: str
+    masked_text: str
+    similarity_score: float
+    category: Optional[str] = None
+    status: Optional[str] = None
+
+class SimilarComplaintsResponse(BaseModel):
+    similar_complaints: list[SimilarComplaintItem]
+    total_indexed: int
+
+
+# --- Pipeline Models ---
+
+class PipelineRequest(BaseModel):
+    text: str
+    category: Optional[CategoryLiteral] = None  # RAG filter and LLM category; defaults to triage result
+    complaint_id: Optional[str] = None  # Excluded from similar complaints
+    similar_limit: int = Field(default=5, ge=1, le=50)
+    include_generation: bool = False
+    retrieval_mode: Optional[RetrievalMode] = None  # Defaults to RAG_RETRIEVAL_MODE
+
+class PipelineResponse(BaseModel):
+    masked_text: str
+    masked_entities: List[str]
+    # None when triage failed (TRIAGE_UNAVAILABLE in risk_flags)
+    triage: Optional[TriageResponse] = None
+    relevant_sources: List[SourceItem]
+    similar_complaints: List[SimilarComplaintItem]
+    generation: Optional[GenerateResponse] = None
+    # Stages that failed: TRIAGE_UNAVAILABLE, RAG_UNAVAILABLE, SIMILARITY_UNAVAILABLE
+    risk_flags: List[str] = Field(default_factory=list)
+
 
 # --- LLM Internal Models ---
 
@@ -0,0 +1,228 @@
+"""
+Buffered writer for review_audit.
+
+In the default sync mode ReviewStore writes each audit row in the same
+transaction as the review change. In buffered mode the row is handed to an
+AuditWriter instead: events collect in memory and a flush thread writes them
+in one group commit once AUDIT_FLUSH_MAX_EVENTS are pending or the oldest
+has waited AUDIT_FLUSH_INTERVAL_MS. Flushes use synchronous=FULL, so a
+flushed batch is fsynced. Events still in memory when the process crashes
+are lost (at most one interval); close() flushes them on shutdown.
+
+With REVIEW_AUDIT_SEGMENT_DIR set, every flushed batch is also appended to
+a JSON-lines segment file for export to the Java side. A segment is written
+as *.jsonl.open and renamed to *.jsonl once it is full or the writer
+closes; closed segments are never modified again.
+"""
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from threading import Condition, Lock, Thread
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+
+from app.core.sqlite_pool import SQLitePool
+
+logger = logging.getLogger("complaintops.audit_log")
+
+# sync: audit row in the review's transaction; buffered: group-committed by AuditWriter
+AUDIT_WRITE_MODE = os.getenv("REVIEW_AUDIT_WRITE_MODE", "sync").lower()
+AUDIT_FLUSH_INTERVAL_MS = float(os.getenv("REVIEW_AUDIT_FLUSH_INTERVAL_MS", "200"))
+AUDIT_FLUSH_MAX_EVENTS = int(os.getenv("REVIEW_AUDIT_FLUSH_MAX_EVENTS", "256"))
+# Append-only export segments (buffered mode only); empty disables them
+AUDIT_SEGMENT_DIR = os.getenv("REVIEW_AUDIT_SEGMENT_DIR", "")
+AUDIT_SEGMENT_MAX_BYTES = int(os.getenv("REVIEW_AUDIT_SEGMENT_MAX_BYTES", str(16 * 1024 * 1024)))
+
+INSERT_AUDIT_SQL = """
+    INSERT INTO review_audit (review_id, status, notes, created_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+OPEN_SEGMENT_SUFFIX = ".open"
+
+
+@dataclass
+class AuditEvent:
+    review_id: str
+    status: str
+    notes: Optional[str]
+    created_at: str
+
+
+class SegmentLog:
+    """Append-only JSON-lines segments, one open segment per process."""
+
+    def __init__(self, directory: str, max_bytes: int = AUDIT_SEGMENT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._file = None
+        self._path: Optional[str] = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self) -> None:
+        self._sequence += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        name = f"audit-{stamp}-{os.getpid()}-{self._sequence:06d}.jsonl"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path + OPEN_SEGMENT_SUFFIX, "ab")
+
+    def append(self, events: List[AuditEvent]) -> None:
+        if self._file is None:
+            self._open()
+        data = b"".join(
+            json.dumps(asdict(event), ensure_ascii=False).encode("utf-8") + b"\n" for event in events
+        )
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._file.tell() >= self.max_bytes:
+            self.close()
+
+    def close(self) -> None:
+        """Seal the open segment: rename it to *.jsonl and fsync the directory."""
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path + OPEN_SEGMENT_SUFFIX, self._path)
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._file = None
+        self._path = None
+
+    def reset_after_fork(self) -> None:
+        # The open segment belongs to the parent, which seals it
+        self._file = None
+        self._path = None
+        self._sequence = 0
+
+
+class AuditWriter:
+    """Buffers audit events and writes them to review_audit in group commits."""
+
+    def __init__(
+        self,
+        db_path: str,
+        max_events: int = AUDIT_FLUSH_MAX_EVENTS,
+        interval_seconds: float = AUDIT_FLUSH_INTERVAL_MS / 1000,
+        segment_dir: str = AUDIT_SEGMENT_DIR,
+    ) -> None:
+        self.max_events = max(1, max_events)
+        self.interval_seconds = interval_seconds
+        # FULL: the WAL is fsynced on every flush commit
+        self._pool = SQLitePool(db_path, synchronous="FULL")
+        self._segments = SegmentLog(segment_dir) if segment_dir else None
+        self._cond = Condition()
+        self._write_lock = Lock()
+        self._pending: List[AuditEvent] = []
+        self._thread: Optional[Thread] = None
+        self._closed = False
+        self.stats: Dict[str, int] = {"events": 0, "flushes": 0}
+
+    def append(self, event: AuditEvent) -> None:
+        with self._cond:
+            self._pending.append(event)
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                if self._thread is None:
+                    # Started on first use, so a preloading master never owns one
+                    self._thread = Thread(target=self._run, name="audit-flush", daemon=True)
+                    self._thread.start()
+                if len(self._pending) >= self.max_events:
+                    self._cond.notify()
+        if closed:
+            # Late events after shutdown are written straight through
+            self.flush()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write every pending event now; returns how many were written."""
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    with self._cond:
+                        # Keep order: the failed batch goes back in front
+                        self._pending[:0] = batch
+                    raise
+            return len(batch)
+
+    def _write(self, batch: List[AuditEvent]) -> None:
+        with self._pool.write() as conn:
+            conn.executemany(
+                INSERT_AUDIT_SQL,
+                [(event.review_id, event.status, event.notes, event.created_at) for event in batch],
+            )
+        if self._segments is not None:
+            try:
+                self._segments.append(batch)
+            except OSError as e:
+                # review_audit stays the source of truth; the export can be regenerated
+                logger.error("audit_segment_write_failed events=%d error=%s", len(batch), e)
+        self.stats["events"] += len(batch)
+        self.stats["flushes"] += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._pending)
+                # Bounded latency: the first pending event waits at most one interval
+                self._cond.wait_for(
+                    lambda: self._closed or len(self._pending) >= self.max_events,
+                    timeout=self.interval_seconds,
+                )
+                closing = self._closed
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("audit_flush_failed pending=%d", self.pending())
+                if not closing:
+                    with self._cond:
+                        self._cond.wait(self.interval_seconds)
+            if closing:
+                return
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the flush thread and write everything still buffered."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        written = self.flush()
+        if self._segments is not None:
+            self._segments.close()
+        self._pool.close_all()
+        logger.info("audit_writer_closed events=%d flushes=%d final=%d", self.stats["events"], self.stats["flushes"], written)
+
+    def reset_after_fork(self) -> None:
+        """Start clean in a forked worker; events buffered before fork are the parent's to write."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            # Only a thread of this process can still be alive (fork copies just
+            # the calling thread): stop it before its primitives are replaced
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            thread.join()
+            self._closed = False
+        self._cond = Condition()
+        self._write_lock = Lock()
+        self._pending = []
+        self._thread = None
+        self._pool.reset_after_fork()
+        if self._segments is not None:
+            self._segments.reset_after_fork()
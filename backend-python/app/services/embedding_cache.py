@@ -0,0 +1,43 @@
+"""
+Query embedding cache shared by the RAG and similarity services.
+
+Entries are keyed by (embedding model name, SHA-256 of the text), so both
+services reuse each other's embeddings whenever they run the same model.
+"""
+import hashlib
+import os
+from typing import Callable, List, Sequence
+
+from app.core.cache import TTLCache
+
+
+class EmbeddingCache:
+    def __init__(self) -> None:
+        self._cache = TTLCache(
+            maxsize=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096")),
+            ttl_seconds=float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    def embed(
+        self,
+        model_name: str,
+        embedding_fn: Callable[[List[str]], Sequence],
+        texts: List[str],
+    ) -> List:
+        """Return one embedding per text, calling embedding_fn only for cache misses."""
+        keys = [(model_name, hashlib.sha256(text.encode("utf-8")).hexdigest()) for text in texts]
+        embeddings = [self._cache.get(key) for key in keys]
+        miss_indexes = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if miss_indexes:
+            fresh = embedding_fn([texts[i] for i in miss_indexes])
+            for i, embedding in zip(miss_indexes, fresh):
+                embeddings[i] = embedding
+                self._cache.set(keys[i], embedding)
+        return embeddings
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# Global instance
+embedding_cache = EmbeddingCache()
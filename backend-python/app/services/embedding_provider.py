@@ -0,0 +1,124 @@
+"""
+Embedding Provider
+Single embedding model shared by SOP ingestion, RAG retrieval and complaint
+similarity. The model is loaded once per process, and every Chroma collection
+it writes to is stamped with the model id so vectors from different models
+are never mixed in one collection.
+"""
+import os
+from threading import Lock
+from typing import List, Optional
+
+from chromadb.utils import embedding_functions
+
+from app.core.logging import get_logger
+from app.core.metrics import stage_timer
+from app.services.embedding_cache import embedding_cache
+
+EMBEDDING_MODEL_METADATA_KEY = "embedding_model"
+
+logger = get_logger("complaintops.embedding_provider")
+
+
+class EmbeddingModelMismatchError(RuntimeError):
+    """A collection holds vectors from a different embedding model."""
+
+
+class EmbeddingProvider:
+    def __init__(self) -> None:
+        # Multilingual embedding for Turkish support
+        # Default: paraphrase-multilingual-MiniLM-L12-v2 (50+ languages including Turkish)
+        # Alternative: all-MiniLM-L6-v2 (English-only, faster)
+        self.model_name = os.getenv(
+            "RAG_EMBEDDING_MODEL",
+            "paraphrase-multilingual-MiniLM-L12-v2"
+        )
+        # "refuse": leave a mismatched collection untouched and report it
+        # "rebuild": drop the mismatched collection and recreate it empty
+        self.mismatch_policy = os.getenv("EMBEDDING_MISMATCH_POLICY", "refuse").lower()
+        self._embedding_fn = None
+        self._lock = Lock()
+
+    @property
+    def embedding_fn(self):
+        if self._embedding_fn is None:
+            with self._lock:
+                if self._embedding_fn is None:
+                    self._embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
+                        model_name=self.model_name
+                    )
+                    logger.info("Embedding model loaded: %s", self.model_name)
+        return self._embedding_fn
+
+    @property
+    def _model(self):
+        # SentenceTransformer behind the Chroma embedding function, if any
+        return getattr(self.embedding_fn, "_model", None)
+
+    @property
+    def max_seq_length(self) -> Optional[int]:
+        """Tokens the model reads per text; anything longer is truncated."""
+        return getattr(self._model, "max_seq_length", None)
+
+    def count_tokens(self, text: str) -> int:
+        """Token count with the model's tokenizer (special tokens included)."""
+        tokenizer = getattr(self._model, "tokenizer", None)
+        if tokenizer is None:
+            # No tokenizer available (e.g. a custom embedding function): rough estimate
+            return len(text.split()) * 2
+        # Measuring only: do not warn about texts longer than the model limit
+        return len(tokenizer(text, add_special_tokens=True, truncation=False, verbose=False)["input_ids"])
+
+    def embed(self, texts: List[str]) -> List:
+        """Embed documents (no caching)."""
+        embedding_fn = self.embedding_fn
+        with stage_timer("embedding"):
+            return embedding_fn(texts)
+
+    def embed_queries(self, texts: List[str]) -> List:
+        """Embed query texts through the shared query embedding cache."""
+        return embedding_cache.embed(self.model_name, self.embed, texts)
+
+    def open_collection(self, client, name: str, metadata: Optional[dict] = None):
+        """
+        Get or create a collection stamped with the current model id.
+
+        Callers always pass embeddings explicitly, so the collection is opened
+        without a Chroma embedding function. An empty collection with a missing
+        or different stamp is simply re-stamped. A non-empty one is handled by
+        EMBEDDING_MISMATCH_POLICY: "rebuild" drops and recreates it, "refuse"
+        raises EmbeddingModelMismatchError.
+        """
+        stamp = {**(metadata or {}), EMBEDDING_MODEL_METADATA_KEY: self.model_name}
+        collection = client.get_or_create_collection(
+            name=name,
+            embedding_function=None,
+            metadata=stamp,
+        )
+        stamped_model = (collection.metadata or {}).get(EMBEDDING_MODEL_METADATA_KEY)
+        if stamped_model == self.model_name:
+            return collection
+
+        if collection.count() == 0:
+            collection.modify(metadata={**(collection.metadata or {}), **stamp})
+            return collection
+
+        if self.mismatch_policy == "rebuild":
+            logger.warning(
+                "Rebuilding collection %s: embedded with %s, configured model is %s",
+                name,
+                stamped_model or "unknown",
+                self.model_name,
+            )
+            client.delete_collection(name)
+            return client.create_collection(name=name, embedding_function=None, metadata=stamp)
+
+        raise EmbeddingModelMismatchError(
+            f"Collection {name} was embedded with {stamped_model or 'an unknown model'}, "
+            f"configured model is {self.model_name}. Re-run ingestion or set "
+            f"EMBEDDING_MISMATCH_POLICY=rebuild."
+        )
+
+
+# Global instance
+embedding_provider = EmbeddingProvider()
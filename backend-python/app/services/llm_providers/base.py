@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import asyncio
 
 
 class AbstractLLMProvider(ABC):
@@ -17,3 +18,12 @@ class AbstractLLMProvider(ABC):
             dict: Structured response containing action_plan, customer_reply_draft, etc.
         """
         pass
+
+    async def agenerate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        """
+        Async variant of generate_response.
+
+        Providers with a native async client should override this; the default
+        runs the sync implementation in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate_response, text, category, urgency, snippets)
@@ -1,4 +1,5 @@
 import google.generativeai as genai
+import asyncio
 import json
 import os
 import re
@@ -63,16 +64,46 @@ class GeminiProvider(AbstractLLMProvider):
             logger.error("PII detection failed, blocking output error=%s", exc)
             return True
 
-    def generate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
-        if not self.model:
-            return {
-                "action_plan": ["Gemini Key Missing"],
-                "customer_reply_draft": "System configuration error.",
-                "risk_flags": ["CONFIG_ERROR"],
-                "sources": [],
-                "error_code": "GEMINI_MISSING"
-            }
+    def _missing_key_response(self) -> dict:
+        return {
+            "action_plan": ["Gemini Key Missing"],
+            "customer_reply_draft": "System configuration error.",
+            "risk_flags": ["CONFIG_ERROR"],
+            "sources": [],
+            "error_code": "GEMINI_MISSING"
+        }
+
+    def _parse_error_response(self) -> dict:
+        return {
+            "action_plan": ["Error parsing Gemini response"],
+            "customer_reply_draft": "Sistem Hatası: Yanıt işlenemedi.",
+            "risk_flags": ["LLM_PARSE_ERROR"],
+            "sources": [],
+            "error_code": "GEMINI_PARSE_ERROR"
+        }
+
+    def _error_response(self) -> dict:
+        return {
+            "action_plan": ["Error calling Gemini"],
+            "customer_reply_draft": "Sistem Hatası: Yanıt üretilemedi.",
+            "risk_flags": ["LLM_ERROR"],
+            "sources": [],
+            "error_code": "GEMINI_ERROR"
+        }
+
+    def _process_content(self, content: str) -> dict:
+        # Parse and validate response
+        parsed = self._parse_and_validate(content)
+        
+        # Post-processing PII check on output
+        combined_output = " ".join(parsed["action_plan"]) + " " + parsed["customer_reply_draft"]
+        if self._detect_pii(combined_output):
+            parsed["risk_flags"] = list(dict.fromkeys(parsed["risk_flags"] + ["PII_LEAK_DETECTED"]))
+        
+        parsed["error_code"] = None
+        return parsed
 
+    def _build_prompt(self, text: str, category: str, urgency: str, snippets: list) -> str:
         # Sanitize all inputs
         sanitized_text = self._sanitize_user_input(text)
         sanitized_snippets = [
@@ -130,37 +161,35 @@ Return ONLY valid JSON with double quotes and no markdown:
     ]
 }}
 """
-        
+        return prompt
+
+    def generate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        if not self.model:
+            return self._missing_key_response()
+
+        prompt = self._build_prompt(text, category, urgency, snippets)
         try:
             response = self.model.generate_content(prompt)
-            content = response.text
-            
-            # Parse and validate response
-            parsed = self._parse_and_validate(content)
-            
-            # Post-processing PII check on output
-            combined_output = " ".join(parsed["action_plan"]) + " " + parsed["customer_reply_draft"]
-            if self._detect_pii(combined_output):
-                parsed["risk_flags"] = list(dict.fromkeys(parsed["risk_flags"] + ["PII_LEAK_DETECTED"]))
-            
-            parsed["error_code"] = None
-            return parsed
-            
+            return self._process_content(response.text)
+        except json.JSONDecodeError as e:
+            logger.error(f"Gemini JSON parse error: {e}")
+            return self._parse_error_response()
+        except Exception as e:
+            logger.error(f"Gemini generation error: {e}")
+            return self._error_response()
+
+    async def agenerate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        if not self.model:
+            return self._missing_key_response()
+
+        prompt = self._build_prompt(text, category, urgency, snippets)
+        try:
+            response = await self.model.generate_content_async(prompt)
+            # PII scan is CPU-bound (spaCy); keep it off the event loop
+            return await asyncio.to_thread(self._process_content, response.text)
         except json.JSONDecodeError as e:
             logger.error(f"Gemini JSON parse error: {e}")
-            return {
-                "action_plan": ["Error parsing Gemini response"],
-                "customer_reply_draft": "Sistem Hatası: Yanıt işlenemedi.",
-                "risk_flags": ["LLM_PARSE_ERROR"],
-                "sources": [],
-                "error_code": "GEMINI_PARSE_ERROR"
-            }
+            return self._parse_error_response()
         except Exception as e:
             logger.error(f"Gemini generation error: {e}")
-            return {
-                "action_plan": ["Error calling Gemini"],
-                "customer_reply_draft": "Sistem Hatası: Yanıt üretilemedi.",
-                "risk_flags": ["LLM_ERROR"],
-                "sources": [],
-                "error_code": "GEMINI_ERROR"
-            }
+            return self._error_response()
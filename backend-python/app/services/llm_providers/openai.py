@@ -1,4 +1,6 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
+import asyncio
+import httpx
 import json
 import os
 import re
@@ -26,6 +28,17 @@ class OpenAIProvider(AbstractLLMProvider):
         if not api_key:
             logger.warning("OPENAI_API_KEY not found. OpenAI provider may not work.")
         self.client = OpenAI(api_key=api_key) if api_key else None
+        # Async client shares one pooled HTTP client sized to the LLM concurrency limit
+        max_connections = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.async_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                )
+            ),
+        ) if api_key else None
 
     def _build_prompt(self, text: str, category: str, urgency: str, snippets: list, strict_json: bool) -> str:
         context = "\n".join(
@@ -104,55 +117,91 @@ class OpenAIProvider(AbstractLLMProvider):
             logger.error("PII detection failed, blocking output error=%s", exc)
             return True
 
-    def generate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
-        if not self.client:
-             return {
-                "action_plan": ["OpenAI Key Missing"],
-                "customer_reply_draft": "System configuration error.",
-                "risk_flags": ["CONFIG_ERROR"],
-                "sources": [],
-                "error_code": "OPENAI_MISSING"
-            }
+    def _missing_key_response(self) -> dict:
+        return {
+            "action_plan": ["OpenAI Key Missing"],
+            "customer_reply_draft": "System configuration error.",
+            "risk_flags": ["CONFIG_ERROR"],
+            "sources": [],
+            "error_code": "OPENAI_MISSING"
+        }
+
+    def _error_response(self) -> dict:
+        return {
+            "action_plan": ["Error calling LLM"],
+            "customer_reply_draft": "System Error: Could not generate draft.",
+            "risk_flags": ["LLM_ERROR"],
+            "sources": [],
+            "error_code": "LLM_VALIDATION_ERROR",
+        }
 
+    def _build_attempts(self, text: str, category: str, urgency: str, snippets: list) -> list:
         sanitized_text = self._sanitize_user_input(text)
         sanitized_snippets = [
             {**item, "snippet": self._sanitize_user_input(item.get("snippet", ""))}
             for item in snippets
         ]
-
-        attempts = [
+        return [
             self._build_prompt(sanitized_text, category, urgency, sanitized_snippets, strict_json=False),
             self._build_prompt(sanitized_text, category, urgency, sanitized_snippets, strict_json=True),
         ]
 
+    def _build_messages(self, prompt: str) -> list:
+        return [
+            {"role": "system", "content": self._SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _flag_output_pii(self, parsed: dict) -> dict:
+        # Post-processing PII check
+        combined_output = " ".join(parsed["action_plan"]) + " " + parsed["customer_reply_draft"]
+        if self._detect_pii(combined_output):
+            parsed["risk_flags"] = list(dict.fromkeys(parsed["risk_flags"] + ["PII_LEAK_DETECTED"]))
+        
+        parsed["error_code"] = None
+        return parsed
+
+    def generate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        if not self.client:
+            return self._missing_key_response()
+
+        attempts = self._build_attempts(text, category, urgency, snippets)
+
         for index, prompt in enumerate(attempts, start=1):
             try:
                 response = self.client.chat.completions.create(
                     model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": self._SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=self._build_messages(prompt),
                     temperature=0.3,
                 )
                 content = response.choices[0].message.content
                 parsed = self._parse_and_validate(content)
-                
-                # Post-processing PII check
-                combined_output = " ".join(parsed["action_plan"]) + " " + parsed["customer_reply_draft"]
-                if self._detect_pii(combined_output):
-                    parsed["risk_flags"] = list(dict.fromkeys(parsed["risk_flags"] + ["PII_LEAK_DETECTED"]))
-                
-                parsed["error_code"] = None
-                return parsed
+                return self._flag_output_pii(parsed)
             except Exception as e:
                 logger.warning(f"OpenAI attempt {index} failed: {e}")
                 continue
         
-        return {
-            "action_plan": ["Error calling LLM"],
-            "customer_reply_draft": "System Error: Could not generate draft.",
-            "risk_flags": ["LLM_ERROR"],
-            "sources": [],
-            "error_code": "LLM_VALIDATION_ERROR",
-        }
+        return self._error_response()
+
+    async def agenerate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        if not self.async_client:
+            return self._missing_key_response()
+
+        attempts = self._build_attempts(text, category, urgency, snippets)
+
+        for index, prompt in enumerate(attempts, start=1):
+            try:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=self._build_messages(prompt),
+                    temperature=0.3,
+                )
+                content = response.choices[0].message.content
+                parsed = self._parse_and_validate(content)
+                # PII scan is CPU-bound (spaCy); keep it off the event loop
+                return await asyncio.to_thread(self._flag_output_pii, parsed)
+            except Exception as e:
+                logger.warning(f"OpenAI attempt {index} failed: {e}")
+                continue
+        
+        return self._error_response()
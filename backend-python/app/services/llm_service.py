@@ -1,8 +1,12 @@
 from dotenv import load_dotenv
+import asyncio
 import os
+import weakref
 from threading import Lock
 
+from app.core.lazy import LazyService
 from app.core.logging import get_logger
+from app.core.metrics import stage_timer
 from app.services.llm_providers.base import AbstractLLMProvider
 
 # Load environment early
@@ -53,6 +57,12 @@ class LLMClient:
     """
     def __init__(self):
         self.mock_mode = False
+        # Bounds in-flight upstream calls made through agenerate_response
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        # One semaphore per event loop, created inside it on first use
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
         # If no API Keys at all, we might want mock mode. 
         # But providers handle their own key checks.
         try:
@@ -61,17 +71,36 @@ class LLMClient:
             logger.error(f"Could not init LLM Provider: {e}. Switching to Mock Mode.")
             self.mock_mode = True
 
+    def _mock_response(self, category: str, urgency: str) -> dict:
+        return {
+            "action_plan": ["Mock Step 1 (Fallback)", "Mock Step 2"],
+            "customer_reply_draft": f"MOCK RESPONSE: Received {category}/{urgency} complaint. Provider init failed.",
+            "risk_flags": ["MOCK_MODE_ACTIVE"],
+            "sources": [],
+            "error_code": None,
+        }
+
     def generate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
         if self.mock_mode:
-             return {
-                "action_plan": ["Mock Step 1 (Fallback)", "Mock Step 2"],
-                "customer_reply_draft": f"MOCK RESPONSE: Received {category}/{urgency} complaint. Provider init failed.",
-                "risk_flags": ["MOCK_MODE_ACTIVE"],
-                "sources": [],
-                "error_code": None,
-            }
+            return self._mock_response(category, urgency)
         
-        return self.provider.generate_response(text, category, urgency, snippets)
+        with stage_timer("llm"):
+            return self.provider.generate_response(text, category, urgency, snippets)
+
+    def _loop_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        return semaphore
+
+    async def agenerate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        if self.mock_mode:
+            return self._mock_response(category, urgency)
+
+        async with self._loop_semaphore():
+            with stage_timer("llm"):
+                return await self.provider.agenerate_response(text, category, urgency, snippets)
 
 # Global Instance
-llm_client = LLMClient()
+llm_client = LazyService("llm_client", LLMClient)
@@ -1,14 +1,149 @@
-from presidio_analyzer import AnalyzerEngine, PatternRecognizer, Pattern, RecognizerResult
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, PatternRecognizer, Pattern, RecognizerResult
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 from typing import List, Dict, Tuple
+import hashlib
+import os
 import re
 import logging
 
+from app.core.cache import TTLCache
+from app.core.lazy import LazyService
+from app.core.metrics import stage_timer
+
+PII_ENTITIES = [
+    "TCKN", "TR_IBAN", "PHONE_NUMBER", "EMAIL_ADDRESS", "CREDIT_CARD",
+    "PERSON", "CCV", "PASSWORD", "DATE_OF_BIRTH", "MAIDEN_NAME", "ACCOUNT_NUMBER"
+]
+PII_SCORE_THRESHOLD = 0.45  # Filter out low confidence (no-context) matches
+
+# Stage 2 failsafe patterns, applied in this order: a pattern never matches
+# text an earlier one has already masked
+REGEX_FAILSAFE_PATTERNS = {
+    "IBAN": r"TR\s?[0-9]{2}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{2}",
+    "TCKN": r"\b[1-9][0-9]{10}\b",
+    "PHONE": r"(?:\+90|0)?\s?[5][0-9]{2}\s?[0-9]{3}\s?[0-9]{2}\s?[0-9]{2}",
+    "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    "CREDIT_CARD": r"\b[0-9]{4}[\s\-]?[0-9]{4}[\s\-]?[0-9]{4}[\s\-]?[0-9]{4}\b",
+    "ACCOUNT": r"(?:hesap\s*(?:no|numarası)?[:\s]*)\d{10,16}",
+}
+
+_FAILSAFE_REGEXES = [
+    (entity_type, re.compile(pattern, re.IGNORECASE))
+    for entity_type, pattern in REGEX_FAILSAFE_PATTERNS.items()
+]
+# All patterns as one alternation: a single scan tells whether the text
+# contains anything to mask at all, which after stage 1 it rarely does
+_REGEX_FAILSAFE_ANY = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in REGEX_FAILSAFE_PATTERNS.values()),
+    re.IGNORECASE,
+)
+# Stands in for masked spans while later patterns run: a non-word character
+# no pattern matches, so word boundaries behave as around a [MASKED_*] token
+_CLAIMED = "\x00"
+
+
+def _occurrences(text: str, values: List[str]) -> Dict[str, List[int]]:
+    """Every start position (overlapping ones included) of each value in text."""
+    by_length: Dict[int, set] = {}
+    for value in values:
+        by_length.setdefault(len(value), set()).add(value)
+    first_chars = {value[0] for value in values}
+    positions: Dict[str, List[int]] = {value: [] for value in values}
+    # One scan per distinct value length instead of one per value
+    for length, candidates in by_length.items():
+        for start in range(len(text) - length + 1):
+            if text[start] in first_chars:
+                window = text[start:start + length]
+                if window in candidates:
+                    positions[window].append(start)
+    return positions
+
+
+def _failsafe_spans(text: str) -> List[Tuple[int, int, str]]:
+    """
+    (start, end, entity type) of every failsafe span, sorted by position.
+
+    Same result as applying the patterns one after another, each masking
+    every occurrence of the values it matched (str.replace, value by value):
+    each pattern runs over the text with the spans of earlier patterns
+    blanked out, so offsets stay those of the input. Spans are claimed in a
+    mask and the text is rebuilt once per pattern that matched.
+    """
+    spans: List[Tuple[int, int, str]] = []
+    working = text
+    claimed = bytearray(len(text))
+    for entity_type, regex in _FAILSAFE_REGEXES:
+        values = list(dict.fromkeys(match.group(0) for match in regex.finditer(working) if match.group(0)))
+        if not values:
+            continue
+        found = []
+        positions = _occurrences(working, values)
+        for value in values:
+            length = len(value)
+            last_end = 0
+            for start in positions[value]:
+                # Left to right without overlap, skipping text masked by an earlier value
+                if start < last_end or claimed.find(1, start, start + length) != -1:
+                    continue
+                claimed[start:start + length] = b"\x01" * length
+                found.append((start, start + length, entity_type))
+                last_end = start + length
+        found.sort()
+        parts = []
+        last_end = 0
+        for start, end, _ in found:
+            parts.append(working[last_end:start])
+            parts.append(_CLAIMED * (end - start))
+            last_end = end
+        parts.append(working[last_end:])
+        working = "".join(parts)
+        spans.extend(found)
+    spans.sort()
+    return spans
+
+
+def _apply_regex_failsafe(text: str) -> Tuple[str, List[Dict]]:
+    """Replace every failsafe match with its [MASKED_<TYPE>] token, building the output in one join."""
+    if not _REGEX_FAILSAFE_ANY.search(text):
+        return text, []
+    parts = []
+    regex_entities = []
+    last_end = 0
+    for start, end, entity_type in _failsafe_spans(text):
+        parts.append(text[last_end:start])
+        parts.append(f"[MASKED_{entity_type}]")
+        last_end = end
+        regex_entities.append({
+            "type": entity_type,
+            "start": start,
+            "end": end,
+            "text": "[REDACTED]",  # Don't log actual PII
+            "source": "regex_failsafe"
+        })
+    parts.append(text[last_end:])
+    return "".join(parts), regex_entities
+
+
+def _copy_double_pass(output: Tuple[str, List[Dict], List[Dict]]) -> Tuple[str, List[Dict], List[Dict]]:
+    # Cached entries are shared; hand callers their own entity dicts
+    masked_text, presidio_entities, regex_entities = output
+    return masked_text, [dict(e) for e in presidio_entities], [dict(e) for e in regex_entities]
+
+
 class PIIMasker:
     def __init__(self):
         self.analyzer = AnalyzerEngine()
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+        self.batch_size = int(os.getenv("PII_BATCH_SIZE", "32"))
         self.anonymizer = AnonymizerEngine()
+        # Result cache keyed by a salted SHA-256 of the input; stores only the
+        # masked text and entity metadata, never the raw text.
+        self._cache = TTLCache(
+            maxsize=int(os.getenv("PII_CACHE_MAX_ENTRIES", "2048")),
+            ttl_seconds=float(os.getenv("PII_CACHE_TTL_SECONDS", "300")),
+        )
+        self._cache_salt = os.getenv("PII_CACHE_SALT", "").encode() or os.urandom(16)
         self.pdf_analyzer = None # Placeholder for PDF analysis if needed
         self.logger = logging.getLogger("complaintops.pii_masker")
         
@@ -120,16 +255,31 @@ class PIIMasker:
 
     def mask(self, text: str) -> Dict:
         # Analyze
-        results = self.analyzer.analyze(
-            text=text, 
-            entities=[
-                "TCKN", "TR_IBAN", "PHONE_NUMBER", "EMAIL_ADDRESS", "CREDIT_CARD",
-                "PERSON", "CCV", "PASSWORD", "DATE_OF_BIRTH", "MAIDEN_NAME", "ACCOUNT_NUMBER"
-            ], 
-            language='en',
-            score_threshold=0.45  # Filter out low confidence (no-context) matches
-        )
-        
+        with stage_timer("presidio_analyze"):
+            results = self.analyzer.analyze(
+                text=text, 
+                entities=PII_ENTITIES,
+                language='en',
+                score_threshold=PII_SCORE_THRESHOLD
+            )
+        return self._anonymize(text, results)
+
+    def mask_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Batch variant of mask(): runs spaCy once over all texts via nlp.pipe
+        (Presidio BatchAnalyzerEngine) instead of one pipeline call per text.
+        """
+        with stage_timer("presidio_analyze"):
+            batch_results = self.batch_analyzer.analyze_iterator(
+                texts,
+                language='en',
+                batch_size=self.batch_size,
+                entities=PII_ENTITIES,
+                score_threshold=PII_SCORE_THRESHOLD,
+            )
+        return [self._anonymize(text, results) for text, results in zip(texts, batch_results)]
+
+    def _anonymize(self, text: str, results: List[RecognizerResult]) -> Dict:
         # Anonymize
         operators = {
             "TCKN": OperatorConfig("replace", {"new_value": "[MASKED_TCKN]"}),
@@ -146,11 +296,12 @@ class PIIMasker:
             "ACCOUNT_NUMBER": OperatorConfig("replace", {"new_value": "[MASKED_ACCOUNT]"}),
         }
         
-        anonymized_result = self.anonymizer.anonymize(
-            text=text,
-            analyzer_results=results,
-            operators=operators
-        )
+        with stage_timer("presidio_anonymize"):
+            anonymized_result = self.anonymizer.anonymize(
+                text=text,
+                analyzer_results=results,
+                operators=operators
+            )
         
         return {
             "original_text": text,
@@ -168,33 +319,46 @@ class PIIMasker:
         Returns:
             (masked_text, presidio_entities, regex_entities)
         """
+        cache_key = self._cache_key(text)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return _copy_double_pass(cached)
+
         # Stage 1: Presidio
         result = self.mask(text)
+        masked = self._finish_double_pass(result)
+        self._cache.set(cache_key, masked)
+        return _copy_double_pass(masked)
+
+    def mask_with_double_pass_batch(self, texts: List[str]) -> List[Tuple[str, List[Dict], List[Dict]]]:
+        """
+        Batch variant of mask_with_double_pass(). Stage 1 runs through the
+        Presidio batch analyzer; stage 2 is applied per text. Cached texts
+        are skipped and only the misses are sent to the analyzer.
+        """
+        keys = [self._cache_key(text) for text in texts]
+        outputs = [self._cache.get(key) for key in keys]
+        miss_indexes = [i for i, output in enumerate(outputs) if output is None]
+        if miss_indexes:
+            fresh = self.mask_batch([texts[i] for i in miss_indexes])
+            for i, result in zip(miss_indexes, fresh):
+                outputs[i] = self._finish_double_pass(result)
+                self._cache.set(keys[i], outputs[i])
+        return [_copy_double_pass(output) for output in outputs]
+
+    def cache_stats(self) -> Dict:
+        return self._cache.stats()
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha256(self._cache_salt + text.encode("utf-8")).hexdigest()
+
+    def _finish_double_pass(self, result: Dict) -> Tuple[str, List[Dict], List[Dict]]:
         masked_text = result["masked_text"]
         presidio_entities = [{"type": ent, "source": "presidio"} for ent in result["masked_entities"]]
         
-        # Stage 2: Deterministic regex patterns (Turkish banking specific)
-        regex_patterns = {
-            "IBAN": r"TR\s?[0-9]{2}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\s?[0-9]{2}",
-            "TCKN": r"\b[1-9][0-9]{10}\b",
-            "PHONE": r"(?:\+90|0)?\s?[5][0-9]{2}\s?[0-9]{3}\s?[0-9]{2}\s?[0-9]{2}",
-            "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            "CREDIT_CARD": r"\b[0-9]{4}[\s\-]?[0-9]{4}[\s\-]?[0-9]{4}[\s\-]?[0-9]{4}\b",
-            # New failsafe patterns
-            "ACCOUNT": r"(?:hesap\s*(?:no|numarası)?[:\s]*)\d{10,16}",
-        }
-        
-        regex_entities = []
-        for entity_type, pattern in regex_patterns.items():
-            for match in re.finditer(pattern, masked_text, re.IGNORECASE):
-                masked_text = masked_text.replace(match.group(0), f"[MASKED_{entity_type}]")
-                regex_entities.append({
-                    "type": entity_type,
-                    "start": match.start(),
-                    "end": match.end(),
-                    "text": "[REDACTED]",  # Don't log actual PII
-                    "source": "regex_failsafe"
-                })
+        # Stage 2: Deterministic regex failsafe (Turkish banking specific)
+        with stage_timer("regex_failsafe"):
+            masked_text, regex_entities = _apply_regex_failsafe(masked_text)
         
         # Log audit trail
         self.logger.info(
@@ -207,4 +371,4 @@ class PIIMasker:
 
 
 # Global instance
-masker = PIIMasker()
+masker = LazyService("masker", PIIMasker)
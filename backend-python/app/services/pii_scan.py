@@ -32,6 +32,31 @@ def scan_text(text: str) -> PiiScanResult:
     return PiiScanResult(contains_pii=contains_pii, masked_text=masked_text, entity_types=entity_types)
 
 
+def scan_text_batch(texts: List[str]) -> List[PiiScanResult]:
+    """Scan each text separately; spaCy runs once over the whole batch."""
+    results = [PiiScanResult(contains_pii=False, masked_text=text, entity_types=[]) for text in texts]
+    indexes = [i for i, text in enumerate(texts) if text]
+    if not indexes:
+        return results
+
+    try:
+        masked = masker.mask_with_double_pass_batch([texts[i] for i in indexes])
+    except Exception as exc:
+        logger.error("pii_scan_failed batch_size=%s error=%s", len(indexes), exc)
+        for i in indexes:
+            results[i] = PiiScanResult(contains_pii=True, masked_text="", entity_types=["SCAN_ERROR"])
+        return results
+
+    for i, (masked_text, presidio_entities, regex_entities) in zip(indexes, masked):
+        entity_types = [e["type"] for e in presidio_entities] + [e["type"] for e in regex_entities]
+        results[i] = PiiScanResult(
+            contains_pii=masked_text != texts[i],
+            masked_text=masked_text,
+            entity_types=entity_types,
+        )
+    return results
+
+
 def scan_texts(texts: Iterable[str]) -> PiiScanResult:
     combined = " ".join([t for t in texts if t])
     return scan_text(combined)
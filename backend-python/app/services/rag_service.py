@@ -1,67 +1,300 @@
-import chromadb
-from chromadb.utils import embedding_functions
+import hashlib
 import os
-from typing import List, Dict, Optional
+import time
+from threading import Lock
+from typing import Hashable, List, Dict, Optional, Tuple
 
+from app.core.batching import MicroBatcher
+from app.core.cache import TTLCache
+from app.core.chroma import open_persistent_client
+from app.core.lazy import LazyService
 from app.core.logging import get_logger
+from app.core.metrics import stage_timer
+from app.rag.ingest import COLLECTION_NAME, INDEX_VERSION_KEY
+from app.rag.lexical import LEXICAL_INDEX_DIR, fuse_rankings, load_lexical_index, tokenize
+from app.rag.partitions import CategoryPartitions
+from app.services.embedding_provider import EmbeddingModelMismatchError, embedding_provider
+
+# (query, n_results, category, mode)
+RetrieveRequest = Tuple[str, Optional[int], Optional[str], Optional[str]]
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
 
 class RAGManager:
     def __init__(self):
-        # Initialize ChromaDB Client
         # Persistent storage in ./chroma_db
-        db_path = os.path.join(os.getcwd(), "chroma_db")
-        self.client = chromadb.PersistentClient(path=db_path)
+        self.db_path = os.path.join(os.getcwd(), "chroma_db")
         self.default_top_k = int(os.getenv("RAG_TOP_K", "4"))
         self.logger = get_logger("complaintops.rag_manager")
+        self.default_mode = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+        if self.default_mode not in RETRIEVAL_MODES:
+            self.logger.warning("Unknown RAG_RETRIEVAL_MODE=%s, using vector", self.default_mode)
+            self.default_mode = "vector"
+        # Candidates taken from each ranking before reciprocal-rank fusion
+        self.fusion_candidates = int(os.getenv("RAG_FUSION_CANDIDATES", "20"))
+        self.rrf_k = int(os.getenv("RAG_RRF_K", "60"))
+        # Hybrid queries this short whose terms are all indexed skip the embedding
+        self.lexical_only_max_terms = int(os.getenv("RAG_LEXICAL_ONLY_MAX_TERMS", "3"))
         
-        # Multilingual embedding for Turkish support
-        # Default: paraphrase-multilingual-MiniLM-L12-v2 (50+ languages including Turkish)
-        # Alternative: all-MiniLM-L6-v2 (English-only, faster)
-        embedding_model = os.getenv(
-            "RAG_EMBEDDING_MODEL",
-            "paraphrase-multilingual-MiniLM-L12-v2"
-        )
-        self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=embedding_model
+        
+        self.embedding_provider = embedding_provider
+        self._open_client()
+        self._load_lexical_index()
+        self.logger.info(f"RAG initialized with embedding model: {embedding_provider.model_name}")
+
+        # Retrieval results keyed by (masked query hash, category, top_k, mode,
+        # index version); only masked text ever reaches this service
+        self.result_cache = TTLCache(
+            maxsize=int(os.getenv("RAG_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "300")),
         )
-        self.logger.info(f"RAG initialized with embedding model: {embedding_model}")
+        # How often the index version written by ingestion is re-read
+        self.version_check_seconds = float(os.getenv("RAG_INDEX_VERSION_CHECK_SECONDS", "5"))
+        self._version_lock = Lock()
+        self._version_checked_at = time.monotonic()
+        self.index_version: Optional[str] = None
+        self.index_version = self._read_index_version()
         
-        self.collection = self.client.get_or_create_collection(
-            name="complaint_sops",
-            embedding_function=self.embedding_fn
+        # Coalesces concurrent retrieve() calls into retrieve_many() calls
+        self.batcher = MicroBatcher("rag", self.retrieve_many)
+
+    def _open_client(self) -> None:
+        self.client = open_persistent_client(self.db_path)
+        try:
+            self.collection = self.embedding_provider.open_collection(self.client, COLLECTION_NAME)
+        except EmbeddingModelMismatchError as e:
+            # Querying vectors from another model returns meaningless matches
+            self.logger.error("RAG disabled: %s", e)
+            self.collection = None
+        self.partitions = CategoryPartitions(self.client)
+
+    def _load_lexical_index(self) -> None:
+        # Memory-mapped, so the pages stay shared after fork
+        self.lexical_index = load_lexical_index(os.path.join(self.db_path, LEXICAL_INDEX_DIR))
+        if self.lexical_index is None:
+            self.logger.warning("Lexical index not found; run ingestion to enable BM25 retrieval")
+
+    def _read_index_version(self) -> Optional[str]:
+        if self.collection is None:
+            return None
+        try:
+            # A fresh handle: the cached collection object keeps the metadata it was opened with
+            metadata = self.client.get_collection(COLLECTION_NAME, embedding_function=None).metadata
+        except Exception as e:
+            self.logger.warning("RAG index version unavailable: %s", e)
+            return self.index_version
+        return (metadata or {}).get(INDEX_VERSION_KEY)
+
+    def current_index_version(self) -> Optional[str]:
+        """
+        Index version, re-read from Chroma at most every version_check_seconds.
+
+        When ingestion has bumped it, the collection, partitions and BM25
+        index are reopened; cache entries of the old version are no longer
+        reachable and age out of the LRU.
+        """
+        if time.monotonic() - self._version_checked_at < self.version_check_seconds:
+            return self.index_version
+        with self._version_lock:
+            if time.monotonic() - self._version_checked_at < self.version_check_seconds:
+                return self.index_version
+            version = self._read_index_version()
+            self._version_checked_at = time.monotonic()
+            if version != self.index_version:
+                self.logger.info("RAG index changed: %s -> %s", self.index_version, version)
+                self._open_client()
+                self._load_lexical_index()
+                self.index_version = version
+                self.result_cache.clear()
+        return self.index_version
+
+    def _cache_key(self, query: str, n_results: Optional[int], category: Optional[str], mode: Optional[str]) -> Hashable:
+        # Whitespace-only differences are common between channels for the same ticket
+        normalized = " ".join(query.split())
+        return (
+            hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+            self.route_category(category),
+            n_results or self.default_top_k,
+            mode or self.default_mode,
+            self.current_index_version(),
         )
 
+    def cache_stats(self) -> dict:
+        return self.result_cache.stats()
+
+    def reopen_after_fork(self) -> None:
+        """Replace the Chroma client inherited from the parent; it is not fork-safe."""
+        self._open_client()
+
+    def warmup(self) -> None:
+        """Load the embedding model now instead of on the first query."""
+        self.embedding_provider.embedding_fn
+
     def retrieve(
         self,
         query: str,
         n_results: Optional[int] = None,
         category: Optional[str] = None,
+        mode: Optional[str] = None,
     ) -> List[Dict[str, str]]:
+        if mode is not None and mode not in RETRIEVAL_MODES:
+            raise ValueError(f"unknown retrieval mode {mode!r}")
+        key = self._cache_key(query, n_results, category, mode)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return [dict(source) for source in cached]
+        sources = self.batcher.submit((query, n_results, category, mode))
+        # Empty results may come from a transient Chroma or embedding error
+        if sources:
+            self.result_cache.set(key, [dict(source) for source in sources])
+        return sources
+
+    def resolve_mode(self, query: str, mode: Optional[str] = None) -> str:
+        """Pick the retrieval path for one query: vector, lexical or hybrid."""
+        mode = mode or self.default_mode
+        if self.lexical_index is None:
+            return "vector"
+        if mode == "hybrid":
+            tokens = tokenize(query)
+            # Exact-term lookups ("EFT iade") are where BM25 is strongest; no need to embed
+            if len(tokens) <= self.lexical_only_max_terms and self.lexical_index.covers(tokens):
+                return "lexical"
+        return mode
+
+    def route_category(self, category: Optional[str]) -> Optional[str]:
+        """
+        Category filter to apply, or None to search the whole corpus.
+
+        A category with its own partition is searched there. Once partitions
+        exist, a category without one has no SOPs of its own, so the query
+        falls back to the global index unfiltered instead of returning nothing.
+        Without partitions (not yet ingested) the metadata filter is kept.
+        """
+        if not category or not self.partitions or self.partitions.get(category) is not None:
+            return category
+        return None
+
+    def retrieve_many(self, requests: List[RetrieveRequest]) -> List[List[Dict[str, str]]]:
+        """
+        Retrieve for several queries at once.
+
+        Queries that need dense retrieval are embedded in a single embedding
+        call and Chroma is queried once per distinct (candidates, category)
+        combination, against the category's partition when it has one.
+        Hybrid queries fuse the dense and BM25 rankings with reciprocal-rank
+        fusion; lexical queries never touch the embedding model.
+        """
+        results: List[List[Dict[str, str]]] = [[] for _ in requests]
+        if not requests or self.collection is None:
+            return results
+
+        requests = [
+            (query, n_results, self.route_category(category), mode)
+            for query, n_results, category, mode in requests
+        ]
+        modes = [self.resolve_mode(query, mode) for query, _, _, mode in requests]
+        top_ks = [n_results or self.default_top_k for _, n_results, _, _ in requests]
+        # chunk id -> (document, metadata) for every hit seen so far
+        documents: Dict[str, Tuple[str, dict]] = {}
+
+        lexical_ranking: Dict[int, List[str]] = {}
+        if self.lexical_index is not None:
+            with stage_timer("lexical_search"):
+                for index, (query, _, category, _) in enumerate(requests):
+                    if modes[index] == "vector":
+                        continue
+                    limit = top_ks[index] if modes[index] == "lexical" else max(top_ks[index], self.fusion_candidates)
+                    hits = self.lexical_index.search(query, limit, category=category)
+                    lexical_ranking[index] = [chunk_id for chunk_id, _ in hits]
+
+        dense = [index for index, mode in enumerate(modes) if mode != "lexical"]
+        vector_ranking = self._vector_rankings(requests, dense, top_ks, modes, documents)
+
+        final_ids: Dict[int, List[str]] = {}
+        for index, mode in enumerate(modes):
+            if mode == "vector":
+                ranking = vector_ranking.get(index, [])
+            elif mode == "lexical" or index not in vector_ranking:
+                # Hybrid degrades to BM25 alone if the dense side failed
+                ranking = lexical_ranking.get(index, [])
+            else:
+                ranking = fuse_rankings([vector_ranking[index], lexical_ranking.get(index, [])], k=self.rrf_k)
+            final_ids[index] = ranking[:top_ks[index]]
+
+        self._fetch_documents({chunk_id for ids in final_ids.values() for chunk_id in ids}, documents)
+        for index, ids in final_ids.items():
+            results[index] = [
+                {
+                    "snippet": documents[chunk_id][0],
+                    "source": documents[chunk_id][1].get("source", "unknown"),
+                    "doc_name": documents[chunk_id][1].get("doc_name", "unknown"),
+                    "chunk_id": documents[chunk_id][1].get("chunk_id", "unknown"),
+                }
+                for chunk_id in ids
+                if chunk_id in documents
+            ]
+        return results
+
+    def _vector_rankings(
+        self,
+        requests: List[RetrieveRequest],
+        indexes: List[int],
+        top_ks: List[int],
+        modes: List[str],
+        documents: Dict[str, Tuple[str, dict]],
+    ) -> Dict[int, List[str]]:
+        """Dense ranking (chunk ids) per request index; failed requests are left out."""
+        rankings: Dict[int, List[str]] = {}
+        if not indexes:
+            return rankings
+        try:
+            embeddings = self.embedding_provider.embed_queries([requests[i][0] for i in indexes])
+        except Exception as e:
+            self.logger.error("RAG embedding error: %s", e)
+            return rankings
+        embedding_of = dict(zip(indexes, embeddings))
+
+        groups: Dict[Tuple[int, Optional[str]], List[int]] = {}
+        for index in indexes:
+            candidates = top_ks[index] if modes[index] == "vector" else max(top_ks[index], self.fusion_candidates)
+            groups.setdefault((candidates, requests[index][2]), []).append(index)
+
+        for (candidates, category), members in groups.items():
+            try:
+                partition = self.partitions.get(category)
+                # The partition holds only this category: no post-filtered global search
+                collection = partition if partition is not None else self.collection
+                where_filter = {"category": category} if category and partition is None else None
+                with stage_timer("chroma_query"):
+                    response = collection.query(
+                        query_embeddings=[embedding_of[i] for i in members],
+                        n_results=candidates,
+                        where=where_filter,
+                        include=["documents", "metadatas"]
+                    )
+                # Unpack one result list per query
+                for position, index in enumerate(members):
+                    ids = response["ids"][position] if response["ids"] else []
+                    docs = response["documents"][position] if response["documents"] else []
+                    metadatas = response["metadatas"][position] if response["metadatas"] else []
+                    for chunk_id, doc, metadata in zip(ids, docs, metadatas):
+                        documents[chunk_id] = (doc, metadata or {})
+                    rankings[index] = list(ids)
+            except Exception as e:
+                self.logger.error("RAG retrieve error: %s", e)
+        return rankings
+
+    def _fetch_documents(self, chunk_ids, documents: Dict[str, Tuple[str, dict]]) -> None:
+        """Load text and metadata for BM25 hits the dense query did not return."""
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in documents]
+        if not missing:
+            return
         try:
-            resolved_top_k = n_results or self.default_top_k
-            where_filter = {"category": category} if category else None
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=resolved_top_k,
-                where=where_filter,
-                include=["documents", "metadatas"]
-            )
-            # Flatten results list
-            if results["documents"]:
-                documents = results["documents"][0]
-                metadatas = results["metadatas"][0]
-                return [
-                    {
-                        "snippet": doc,
-                        "source": metadata.get("source", "unknown"),
-                        "doc_name": metadata.get("doc_name", "unknown"),
-                        "chunk_id": metadata.get("chunk_id", "unknown"),
-                    }
-                    for doc, metadata in zip(documents, metadatas)
-                ]
-            return []
+            with stage_timer("chroma_query"):
+                response = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, doc, metadata in zip(response["ids"], response["documents"], response["metadatas"]):
+                documents[chunk_id] = (doc, metadata or {})
         except Exception as e:
-            self.logger.error("RAG retrieve error: %s", e)
-            return []
+            self.logger.error("RAG fetch error: %s", e)
 
-rag_manager = RAGManager()
+rag_manager = LazyService("rag_manager", RAGManager, warm=RAGManager.warmup)
@@ -1,16 +1,24 @@
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from threading import Lock
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import os
-import sqlite3
 import base64
+import json
 import hashlib
 import logging
+import threading
+import time
+
+from app.core.lazy import LazyService
+from app.core.metrics import stage_timer
+from app.core.scheduler import PeriodicJob
+from app.core.sqlite_pool import SQLitePool
+from app.services.audit_log import AUDIT_WRITE_MODE, INSERT_AUDIT_SQL, AuditEvent, AuditWriter
 
 # Conditional import for encryption
 try:
-    from cryptography.fernet import Fernet
+    from cryptography.fernet import Fernet, InvalidToken, MultiFernet
     ENCRYPTION_AVAILABLE = True
 except ImportError:
     ENCRYPTION_AVAILABLE = False
@@ -35,13 +43,85 @@ def _get_encryption_key() -> bytes:
     return base64.urlsafe_b64encode(hashlib.sha256(b"complaintops-dev-key-2024").digest())
 
 
+def _get_previous_keys() -> List[bytes]:
+    """Retired keys, still accepted for decryption until re-encryption has run."""
+    keys = os.getenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS", "")
+    return [key.strip().encode() for key in keys.split(",") if key.strip()]
+
+
+# Every Fernet token starts with this (version byte 0x80, base64-encoded)
+FERNET_TOKEN_PREFIX = "gAAAAA"
+
+
+class ReviewCipher:
+    """
+    Fernet encryption with key rotation.
+
+    New values are encrypted with the primary key; values encrypted with any
+    previous key still decrypt. Built once per process (see _get_cipher)
+    instead of once per record.
+    """
+
+    def __init__(self, primary_key: bytes, previous_keys: Optional[List[bytes]] = None) -> None:
+        self.primary = Fernet(primary_key)
+        self.fernet = MultiFernet([self.primary, *(Fernet(key) for key in previous_keys or [])])
+
+    def encrypt(self, text: str) -> str:
+        return self.fernet.encrypt(text.encode()).decode()
+
+    def decrypt(self, token: str) -> str:
+        return self.fernet.decrypt(token.encode()).decode()
+
+    def needs_rotation(self, value: str) -> bool:
+        """True for values not encrypted with the primary key (older keys or plaintext)."""
+        try:
+            self.primary.decrypt(value.encode())
+            return False
+        except InvalidToken:
+            return True
+
+    def rotate(self, value: str) -> Optional[str]:
+        """
+        Re-encrypt value with the primary key.
+
+        Plaintext rows written before encryption was enabled are encrypted.
+        Returns None for a Fernet token no configured key can read; rewriting
+        it would lose the data for good.
+        """
+        if not value.startswith(FERNET_TOKEN_PREFIX):
+            return self.encrypt(value)
+        try:
+            return self.fernet.rotate(value.encode()).decode()
+        except InvalidToken:
+            return None
+
+
+_cipher: Optional["ReviewCipher"] = None
+_cipher_lock = Lock()
+
+
+def _get_cipher() -> "ReviewCipher":
+    global _cipher
+    if _cipher is None:
+        with _cipher_lock:
+            if _cipher is None:
+                _cipher = ReviewCipher(_get_encryption_key(), _get_previous_keys())
+    return _cipher
+
+
+def reset_cipher() -> None:
+    """Rebuild the cipher from the environment on next use (after a key change)."""
+    global _cipher
+    with _cipher_lock:
+        _cipher = None
+
+
 def _encrypt(text: str) -> str:
     """Encrypt text using Fernet symmetric encryption."""
     if not text or not ENCRYPTION_AVAILABLE:
         return text
     try:
-        f = Fernet(_get_encryption_key())
-        return f.encrypt(text.encode()).decode()
+        return _get_cipher().encrypt(text)
     except Exception as e:
         logger.error(f"Encryption failed: {e}")
         return text  # Fallback to plaintext if encryption fails
@@ -52,18 +132,102 @@ def _decrypt(encrypted_text: str) -> str:
     if not encrypted_text or not ENCRYPTION_AVAILABLE:
         return encrypted_text
     try:
-        f = Fernet(_get_encryption_key())
-        return f.decrypt(encrypted_text.encode()).decode()
+        return _get_cipher().decrypt(encrypted_text)
     except Exception as e:
         # If decryption fails, might be plaintext from before encryption was enabled
         logger.warning(f"Decryption failed (might be plaintext): {e}")
         return encrypted_text
 
 
+def _decrypt_many(encrypted_texts: List[str]) -> List[str]:
+    """
+    Decrypt a batch with one cipher lookup. Values that fail to decrypt are
+    returned as stored, with a single warning for the whole batch.
+    """
+    if not ENCRYPTION_AVAILABLE:
+        return list(encrypted_texts)
+    try:
+        cipher = _get_cipher()
+    except Exception as e:
+        logger.warning(f"Decryption unavailable: {e}")
+        return list(encrypted_texts)
+    results = []
+    failures = 0
+    for text in encrypted_texts:
+        if not text:
+            results.append(text)
+            continue
+        try:
+            results.append(cipher.decrypt(text))
+        except Exception:
+            failures += 1
+            results.append(text)
+    if failures:
+        logger.warning(f"Decryption failed for {failures}/{len(encrypted_texts)} values (might be plaintext)")
+    return results
+
+
 # === Configuration ===
 
 RETENTION_DAYS = int(os.getenv("REVIEW_RETENTION_DAYS", "90"))
+# Audit rows (including the DELETED_RETENTION entries) are kept longer than reviews
+AUDIT_RETENTION_DAYS = int(os.getenv("REVIEW_AUDIT_RETENTION_DAYS", "365"))
+# Retention cleanup: run interval (0 disables the scheduler), rows per
+# write transaction and pause between batches
+RETENTION_INTERVAL_SECONDS = float(os.getenv("REVIEW_RETENTION_INTERVAL_SECONDS", "3600"))
+RETENTION_BATCH_SIZE = int(os.getenv("REVIEW_RETENTION_BATCH_SIZE", "1000"))
+RETENTION_PAUSE_MS = float(os.getenv("REVIEW_RETENTION_PAUSE_MS", "50"))
 ENCRYPTION_ENABLED = os.getenv("REVIEW_ENCRYPTION_ENABLED", "true").lower() == "true"
+# Re-encryption after a key rotation: rows per write transaction and pause between batches
+REENCRYPT_BATCH_SIZE = int(os.getenv("REVIEW_REENCRYPT_BATCH_SIZE", "500"))
+REENCRYPT_PAUSE_MS = float(os.getenv("REVIEW_REENCRYPT_PAUSE_MS", "50"))
+# Start the re-encryption job at startup whenever previous keys are configured
+REENCRYPT_ON_STARTUP = os.getenv("REVIEW_REENCRYPT_ON_STARTUP", "true").lower() == "true"
+# The startup pass for a key set is claimed by one worker for this long;
+# a restart after that runs it again if previous keys are still configured
+REENCRYPT_CLAIM_SECONDS = 24 * 3600
+
+# Statements are module constants so every call reuses the connection's prepared statement
+INSERT_REVIEW_SQL = """
+    INSERT INTO review_records (
+        review_id, status, created_at, updated_at, masked_text, category,
+        category_confidence, urgency, urgency_confidence, notes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_REVIEW_SQL = "SELECT * FROM review_records WHERE review_id = ?"
+LIST_REVIEW_COLUMNS = (
+    "review_id, status, created_at, updated_at, masked_text, category, "
+    "category_confidence, urgency, urgency_confidence, notes"
+)
+SELECT_REENCRYPT_BATCH_SQL = """
+    SELECT review_id, masked_text FROM review_records
+    WHERE review_id > ? ORDER BY review_id LIMIT ?
+"""
+UPDATE_MASKED_TEXT_SQL = """
+    UPDATE review_records SET masked_text = ?
+    WHERE review_id = ? AND masked_text = ?
+"""
+SELECT_EXPIRED_BATCH_SQL = """
+    SELECT review_id FROM review_records
+    WHERE created_at < ? ORDER BY created_at LIMIT ?
+"""
+DELETE_REVIEW_SQL = "DELETE FROM review_records WHERE review_id = ?"
+DELETE_EXPIRED_AUDIT_BATCH_SQL = """
+    DELETE FROM review_audit WHERE audit_id IN (
+        SELECT audit_id FROM review_audit WHERE created_at < ? ORDER BY created_at LIMIT ?
+    )
+"""
+CLAIM_JOB_SQL = """
+    INSERT INTO maintenance_jobs (job, last_run_at) VALUES (?, ?)
+    ON CONFLICT (job) DO UPDATE SET last_run_at = excluded.last_run_at
+    WHERE maintenance_jobs.last_run_at <= ?
+"""
+RELEASE_JOB_SQL = "DELETE FROM maintenance_jobs WHERE job = ?"
+UPDATE_REVIEW_SQL = """
+    UPDATE review_records
+    SET status = ?, updated_at = ?, notes = ?
+    WHERE review_id = ?
+"""
 
 
 @dataclass
@@ -80,11 +244,25 @@ class ReviewRecord:
     notes: Optional[str] = None
 
 
+def _encode_cursor(created_at: str, review_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, review_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, review_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    return str(created_at), str(review_id)
+
+
 class ReviewStore:
     def __init__(self) -> None:
-        self._lock = Lock()
         self._db_path = os.getenv("REVIEW_DB_PATH", "reviews.db")
+        self._pool = SQLitePool(self._db_path)
         self._init_db()
+        # Buffered mode moves audit rows out of the request's write transaction
+        self._audit = AuditWriter(self._db_path) if AUDIT_WRITE_MODE == "buffered" else None
         
         # Log configuration
         if ENCRYPTION_AVAILABLE and ENCRYPTION_ENABLED:
@@ -92,14 +270,31 @@ class ReviewStore:
         else:
             logger.warning("ReviewStore initialized WITHOUT encryption")
         logger.info(f"Retention policy: {RETENTION_DAYS} days")
+        logger.info(f"Audit write mode: {'buffered' if self._audit else 'sync'}")
+
+    def reopen_after_fork(self) -> None:
+        """Drop connections inherited from the parent; SQLite handles must not cross fork."""
+        self._pool.reset_after_fork()
+        if self._audit is not None:
+            self._audit.reset_after_fork()
 
-    def _get_connection(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def close(self) -> None:
+        if self._audit is not None:
+            # Buffered audit events are written before the connections go
+            self._audit.close()
+        self._pool.close_all()
+
+    def _record_audit(self, conn, review_id: str, status: str, notes: Optional[str], now: str) -> None:
+        """Audit row in the open transaction (sync mode); buffered mode writes it after commit."""
+        if self._audit is None:
+            conn.execute(INSERT_AUDIT_SQL, (review_id, status, notes, now))
+
+    def _buffer_audit(self, review_id: str, status: str, notes: Optional[str], now: str) -> None:
+        if self._audit is not None:
+            self._audit.append(AuditEvent(review_id, status, notes, now))
 
     def _init_db(self) -> None:
-        with self._get_connection() as conn:
+        with self._pool.write() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS review_records (
@@ -127,6 +322,30 @@ class ReviewStore:
                 )
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS maintenance_jobs (
+                    job TEXT PRIMARY KEY,
+                    last_run_at REAL NOT NULL
+                )
+                """
+            )
+            # Retention cleanup walks both tables by age
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_review_created ON review_records (created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_review_audit_created ON review_audit (created_at)")
+            # Queue listings filter on these and page by (created_at, review_id)
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_review_status_created
+                ON review_records (status, created_at, review_id)
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_review_category_urgency_created
+                ON review_records (category, urgency, created_at, review_id)
+                """
+            )
 
     def create_review(
         self,
@@ -153,14 +372,9 @@ class ReviewStore:
             urgency=urgency,
             urgency_confidence=urgency_confidence,
         )
-        with self._lock, self._get_connection() as conn:
+        with stage_timer("sqlite_write"), self._pool.write() as conn:
             conn.execute(
-                """
-                INSERT INTO review_records (
-                    review_id, status, created_at, updated_at, masked_text, category,
-                    category_confidence, urgency, urgency_confidence, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+                INSERT_REVIEW_SQL,
                 (
                     record.review_id,
                     record.status,
@@ -174,111 +388,326 @@ class ReviewStore:
                     record.notes,
                 ),
             )
-            conn.execute(
-                """
-                INSERT INTO review_audit (review_id, status, notes, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (record.review_id, record.status, record.notes, now),
-            )
+            self._record_audit(conn, record.review_id, record.status, record.notes, now)
+        self._buffer_audit(record.review_id, record.status, record.notes, now)
         return record
 
     def update_review(self, review_id: str, status: str, notes: Optional[str] = None) -> Optional[ReviewRecord]:
         now = datetime.now(timezone.utc).isoformat()
-        with self._lock, self._get_connection() as conn:
-            cursor = conn.execute(
-                """
-                SELECT * FROM review_records WHERE review_id = ?
-                """,
-                (review_id,),
-            )
-            row = cursor.fetchone()
+        with stage_timer("sqlite_write"), self._pool.write() as conn:
+            row = conn.execute(SELECT_REVIEW_SQL, (review_id,)).fetchone()
             if not row:
                 return None
-            conn.execute(
-                """
-                UPDATE review_records
-                SET status = ?, updated_at = ?, notes = ?
-                WHERE review_id = ?
-                """,
-                (status, now, notes, review_id),
-            )
-            conn.execute(
-                """
-                INSERT INTO review_audit (review_id, status, notes, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (review_id, status, notes, now),
-            )
-            
-            # Decrypt masked_text when reading
-            decrypted_text = _decrypt(row["masked_text"]) if ENCRYPTION_ENABLED else row["masked_text"]
-            
-            return ReviewRecord(
-                review_id=row["review_id"],
-                status=status,
-                created_at=row["created_at"],
-                updated_at=now,
-                masked_text=decrypted_text,
-                category=row["category"],
-                category_confidence=row["category_confidence"],
-                urgency=row["urgency"],
-                urgency_confidence=row["urgency_confidence"],
-                notes=notes,
-            )
+            conn.execute(UPDATE_REVIEW_SQL, (status, now, notes, review_id))
+            self._record_audit(conn, review_id, status, notes, now)
+        self._buffer_audit(review_id, status, notes, now)
+
+        # Decrypt masked_text when reading, after the write lock is released
+        decrypted_text = _decrypt(row["masked_text"]) if ENCRYPTION_ENABLED else row["masked_text"]
+        return ReviewRecord(
+            review_id=row["review_id"],
+            status=status,
+            created_at=row["created_at"],
+            updated_at=now,
+            masked_text=decrypted_text,
+            category=row["category"],
+            category_confidence=row["category_confidence"],
+            urgency=row["urgency"],
+            urgency_confidence=row["urgency_confidence"],
+            notes=notes,
+        )
 
     def get_review(self, review_id: str) -> Optional[ReviewRecord]:
         """Get a review by ID with decrypted masked_text."""
-        with self._get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT * FROM review_records WHERE review_id = ?",
-                (review_id,),
-            )
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            decrypted_text = _decrypt(row["masked_text"]) if ENCRYPTION_ENABLED else row["masked_text"]
-            
-            return ReviewRecord(
+        row = self._pool.connection().execute(SELECT_REVIEW_SQL, (review_id,)).fetchone()
+        if not row:
+            return None
+
+        decrypted_text = _decrypt(row["masked_text"]) if ENCRYPTION_ENABLED else row["masked_text"]
+        return ReviewRecord(
+            review_id=row["review_id"],
+            status=row["status"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            masked_text=decrypted_text,
+            category=row["category"],
+            category_confidence=row["category_confidence"],
+            urgency=row["urgency"],
+            urgency_confidence=row["urgency_confidence"],
+            notes=row["notes"],
+        )
+
+    def list_reviews(
+        self,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        urgency: Optional[str] = None,
+        after_cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[ReviewRecord], Optional[str]]:
+        """
+        One page of reviews, oldest first, and the cursor of the next page.
+
+        Keyset pagination on (created_at, review_id): each page is an index
+        range scan starting after the cursor, so deep pages cost the same as
+        the first. masked_text is decrypted only for the rows returned.
+        Raises ValueError for a malformed cursor.
+        """
+        conditions = []
+        params: list = []
+        for column, value in (("status", status), ("category", category), ("urgency", urgency)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if after_cursor:
+            conditions.append("(created_at, review_id) > (?, ?)")
+            params.extend(_decode_cursor(after_cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # One extra row tells whether another page exists
+        rows = self._pool.connection().execute(
+            f"SELECT {LIST_REVIEW_COLUMNS} FROM review_records {where} "
+            "ORDER BY created_at, review_id LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit and page:
+            next_cursor = _encode_cursor(page[-1]["created_at"], page[-1]["review_id"])
+        texts = [row["masked_text"] for row in page]
+        if ENCRYPTION_ENABLED:
+            texts = _decrypt_many(texts)
+        records = [
+            ReviewRecord(
                 review_id=row["review_id"],
                 status=row["status"],
                 created_at=row["created_at"],
                 updated_at=row["updated_at"],
-                masked_text=decrypted_text,
+                masked_text=text,
                 category=row["category"],
                 category_confidence=row["category_confidence"],
                 urgency=row["urgency"],
                 urgency_confidence=row["urgency_confidence"],
                 notes=row["notes"],
             )
+            for row, text in zip(page, texts)
+        ]
+        return records, next_cursor
+
+    def reencrypt_reviews(
+        self,
+        batch_size: int = REENCRYPT_BATCH_SIZE,
+        pause_seconds: float = REENCRYPT_PAUSE_MS / 1000,
+    ) -> Dict[str, int]:
+        """
+        Re-encrypt stored masked_text with the primary key.
+
+        Walks review_records in primary-key order, one batch per write
+        transaction, so approvals and new reviews interleave with the job.
+        Rows already on the primary key are left alone, which makes the job
+        safe to re-run or to run from several workers at once; the UPDATE
+        only applies if the row still holds the value that was read.
+        Rows written in plaintext are encrypted. Once a run reports
+        unreadable=0, the previous keys can be removed from the environment.
+        """
+        stats = {"scanned": 0, "rotated": 0, "unreadable": 0}
+        if not (ENCRYPTION_AVAILABLE and ENCRYPTION_ENABLED):
+            return stats
+        cipher = _get_cipher()
+        last_id = ""
+        while True:
+            with self._pool.write() as conn:
+                rows = conn.execute(
+                    SELECT_REENCRYPT_BATCH_SQL, (last_id, batch_size)
+                ).fetchall()
+                updates = []
+                for row in rows:
+                    value = row["masked_text"]
+                    if not value or not cipher.needs_rotation(value):
+                        continue
+                    rotated = cipher.rotate(value)
+                    if rotated is None:
+                        stats["unreadable"] += 1
+                        continue
+                    updates.append((rotated, row["review_id"], value))
+                if updates:
+                    conn.executemany(UPDATE_MASKED_TEXT_SQL, updates)
+            stats["scanned"] += len(rows)
+            stats["rotated"] += len(updates)
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1]["review_id"]
+            if pause_seconds:
+                # Leave the write lock free for request traffic between batches
+                time.sleep(pause_seconds)
+        logger.info(
+            "reencryption_complete scanned=%d rotated=%d unreadable=%d",
+            stats["scanned"], stats["rotated"], stats["unreadable"],
+        )
+        return stats
+
+    def claim_job(self, job: str, interval_seconds: float) -> bool:
+        """
+        Claim this run of a periodic job for the calling process.
+
+        Every gunicorn worker schedules the same jobs; the claim is one
+        conditional upsert, so only the first worker per interval runs it.
+        """
+        now = time.time()
+        with self._pool.write() as conn:
+            cursor = conn.execute(CLAIM_JOB_SQL, (job, now, now - interval_seconds))
+        return cursor.rowcount == 1
+
+    def release_job(self, job: str) -> None:
+        """Drop a job's claim so the next worker or restart can run it again."""
+        with self._pool.write() as conn:
+            conn.execute(RELEASE_JOB_SQL, (job,))
+
+    def purge_expired(
+        self,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        pause_seconds: float = RETENTION_PAUSE_MS / 1000,
+    ) -> Dict[str, float]:
+        """
+        Delete reviews older than RETENTION_DAYS and audit rows older than
+        AUDIT_RETENTION_DAYS, batch_size rows per write transaction.
+
+        Rows are found through the created_at indexes (ISO-8601 UTC strings
+        compare in time order). The write lock is released and the thread
+        pauses between batches, so review writes from requests wait at most
+        one batch instead of the whole purge. Each deleted review gets a
+        DELETED_RETENTION audit row, written in the same transaction.
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        review_cutoff = (now - timedelta(days=RETENTION_DAYS)).isoformat()
+        audit_cutoff = (now - timedelta(days=AUDIT_RETENTION_DAYS)).isoformat()
+        note = f"Auto-deleted after {RETENTION_DAYS} days"
+        stats = {"reviews_deleted": 0, "audit_deleted": 0, "batches": 0}
+
+        while True:
+            with self._pool.write() as conn:
+                ids = [row[0] for row in conn.execute(SELECT_EXPIRED_BATCH_SQL, (review_cutoff, batch_size))]
+                if ids:
+                    deleted_at = datetime.now(timezone.utc).isoformat()
+                    conn.executemany(
+                        INSERT_AUDIT_SQL,
+                        [(review_id, "DELETED_RETENTION", note, deleted_at) for review_id in ids],
+                    )
+                    conn.executemany(DELETE_REVIEW_SQL, [(review_id,) for review_id in ids])
+            stats["reviews_deleted"] += len(ids)
+            if ids:
+                stats["batches"] += 1
+            if len(ids) < batch_size:
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        while True:
+            with self._pool.write() as conn:
+                deleted = conn.execute(DELETE_EXPIRED_AUDIT_BATCH_SQL, (audit_cutoff, batch_size)).rowcount
+            stats["audit_deleted"] += deleted
+            if deleted:
+                stats["batches"] += 1
+            if deleted < batch_size:
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        seconds = time.perf_counter() - started
+        rows = stats["reviews_deleted"] + stats["audit_deleted"]
+        stats["seconds"] = round(seconds, 3)
+        stats["rows_per_second"] = round(rows / seconds, 1) if seconds > 0 else 0.0
+        if rows:
+            logger.info(
+                "retention_cleanup reviews_deleted=%d audit_deleted=%d batches=%d seconds=%.3f rows_per_second=%.1f",
+                stats["reviews_deleted"], stats["audit_deleted"], stats["batches"],
+                stats["seconds"], stats["rows_per_second"],
+            )
+        return stats
 
     def cleanup_expired_reviews(self) -> int:
         """
-        Delete reviews older than RETENTION_DAYS.
-        Should be called periodically (e.g., daily cron job).
+        Delete reviews older than RETENTION_DAYS (and expired audit rows).
+        Runs periodically via start_retention_scheduler().
         Returns count of deleted records.
         """
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)).isoformat()
-        with self._lock, self._get_connection() as conn:
-            # First, audit the deletions
-            conn.execute(
-                """
-                INSERT INTO review_audit (review_id, status, notes, created_at)
-                SELECT review_id, 'DELETED_RETENTION', ?, ?
-                FROM review_records WHERE created_at < ?
-                """,
-                (f"Auto-deleted after {RETENTION_DAYS} days", datetime.now(timezone.utc).isoformat(), cutoff),
-            )
-            # Then delete
-            cursor = conn.execute(
-                "DELETE FROM review_records WHERE created_at < ?",
-                (cutoff,),
-            )
-            deleted_count = cursor.rowcount
-            if deleted_count > 0:
-                logger.info(f"Retention cleanup: Deleted {deleted_count} reviews older than {RETENTION_DAYS} days")
-            return deleted_count
+        return int(self.purge_expired()["reviews_deleted"])
+
+
+review_store = LazyService("review_store", ReviewStore)
+
+
+def run_scheduled_retention() -> None:
+    """One scheduler tick: purge if no other worker has done so this interval."""
+    if review_store.claim_job("retention_cleanup", RETENTION_INTERVAL_SECONDS):
+        review_store.purge_expired()
+
+
+def start_retention_scheduler() -> PeriodicJob:
+    """Start the periodic retention cleanup (REVIEW_RETENTION_INTERVAL_SECONDS, 0 disables)."""
+    return PeriodicJob("retention_cleanup", run_scheduled_retention, RETENTION_INTERVAL_SECONDS).start()
+
+
+def reencryption_job_name() -> str:
+    """
+    Claim name of the re-encryption pass for the configured key set.
+
+    The fingerprint covers the primary and the previous keys, so adding a
+    retired key under the same primary is a new rotation as well.
+    """
+    key_set = b"\n".join([_get_encryption_key(), *sorted(_get_previous_keys())])
+    return f"reencrypt:{hashlib.sha256(key_set).hexdigest()[:16]}"
+
+
+def run_startup_reencryption() -> Optional[Dict[str, int]]:
+    """Re-encrypt unless another worker has claimed this rotation; returns stats if it ran here."""
+    job = reencryption_job_name()
+    if not review_store.claim_job(job, REENCRYPT_CLAIM_SECONDS):
+        logger.info("reencryption_skipped reason=claimed")
+        return None
+    try:
+        return review_store.reencrypt_reviews()
+    except Exception:
+        # A failed pass must not block the rotation for the rest of the claim period
+        review_store.release_job(job)
+        raise
+
+
+def start_reencryption_job() -> Optional[threading.Thread]:
+    """
+    Re-encrypt rows written under previous keys in a daemon thread.
+
+    Only runs when REVIEW_ENCRYPTION_PREVIOUS_KEYS is set. Every gunicorn
+    worker starts the thread, but only the one that claims the rotation
+    (see run_startup_reencryption) walks the table.
+    """
+    if not (REENCRYPT_ON_STARTUP and ENCRYPTION_AVAILABLE and ENCRYPTION_ENABLED and _get_previous_keys()):
+        return None
+
+    def run() -> None:
+        try:
+            run_startup_reencryption()
+        except Exception:
+            logger.exception("reencryption_failed")
+
+    thread = threading.Thread(target=run, name="review-reencrypt", daemon=True)
+    thread.start()
+    return thread
+
 
+if __name__ == "__main__":
+    import argparse
 
-review_store = ReviewStore()
+    parser = argparse.ArgumentParser(description="Review store maintenance")
+    parser.add_argument(
+        "--reencrypt",
+        action="store_true",
+        help="Re-encrypt masked_text with the primary REVIEW_ENCRYPTION_KEY",
+    )
+    parser.add_argument("--batch-size", type=int, default=REENCRYPT_BATCH_SIZE)
+    args = parser.parse_args()
+    if args.reencrypt:
+        print(json.dumps(review_store.reencrypt_reviews(batch_size=args.batch_size, pause_seconds=0)))
+    else:
+        parser.print_help()
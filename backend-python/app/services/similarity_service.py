@@ -4,11 +4,19 @@ Uses ChromaDB embeddings to find semantically similar past complaints.
 Based on ADR-002: ChromaDB for Similarity Search
 """
 import os
-import chromadb
-from chromadb.utils import embedding_functions
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
+from app.core.batching import MicroBatcher
+from app.core.chroma import open_persistent_client
+from app.core.lazy import LazyService
 from app.core.logging import get_logger
+from app.core.metrics import stage_timer
+from app.services.embedding_provider import EmbeddingModelMismatchError, embedding_provider
+
+# (query_text, n_results, exclude_id)
+SimilarRequest = Tuple[str, int, Optional[str]]
+# (complaint_id, masked_text, metadata)
+IndexItem = Tuple[str, str, Optional[Dict]]
 
 
 class ComplaintSimilarityService:
@@ -17,22 +25,33 @@ class ComplaintSimilarityService:
     def __init__(self):
         self.logger = get_logger("complaintops.similarity")
         
-        # Initialize ChromaDB Client (same path as RAG)
-        db_path = os.path.join(os.getcwd(), "chroma_db")
-        self.client = chromadb.PersistentClient(path=db_path)
+        # ChromaDB storage (same path as RAG)
+        self.db_path = os.path.join(os.getcwd(), "chroma_db")
         
-        # Use same embedding function as RAG for consistency
-        # Note: For Turkish, consider 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
-        self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+        # Same embedding model as RAG, loaded once per process
+        self.embedding_provider = embedding_provider
+        self._open_client()
         
-        # Separate collection for complaints (not SOPs)
-        self.collection = self.client.get_or_create_collection(
-            name="complaint_embeddings",
-            embedding_function=self.embedding_fn
-        )
+        # Coalesces concurrent find_similar() calls into find_similar_many() calls
+        self.batcher = MicroBatcher("similarity", self.find_similar_many)
+        # Complaints embedded and upserted together by index_complaints()
+        self.index_chunk_size = int(os.getenv("SIMILARITY_INDEX_CHUNK_SIZE", "64"))
         
         self.logger.info("ComplaintSimilarityService initialized with collection: complaint_embeddings")
     
+    def _open_client(self) -> None:
+        self.client = open_persistent_client(self.db_path)
+        # Separate collection for complaints (not SOPs)
+        try:
+            self.collection = self.embedding_provider.open_collection(self.client, "complaint_embeddings")
+        except EmbeddingModelMismatchError as e:
+            self.logger.error("Similarity search disabled: %s", e)
+            self.collection = None
+
+    def reopen_after_fork(self) -> None:
+        """Replace the Chroma client inherited from the parent; it is not fork-safe."""
+        self._open_client()
+
     def index_complaint(
         self, 
         complaint_id: str, 
@@ -50,12 +69,16 @@ class ComplaintSimilarityService:
         Returns:
             True if indexed successfully
         """
+        if self.collection is None:
+            self.logger.error("Failed to index complaint %s: similarity index unavailable", complaint_id)
+            return False
         try:
             # Upsert to handle re-indexing
             self.collection.upsert(
                 ids=[complaint_id],
                 documents=[masked_text],
-                metadatas=[metadata or {}]
+                embeddings=self.embedding_provider.embed([masked_text]),
+                metadatas=[metadata or None]
             )
             self.logger.info("Indexed complaint: %s", complaint_id)
             return True
@@ -63,6 +86,57 @@ class ComplaintSimilarityService:
             self.logger.error("Failed to index complaint %s: %s", complaint_id, e)
             return False
     
+    def index_complaints(self, items: List[IndexItem]) -> List[Optional[str]]:
+        """
+        Bulk variant of index_complaint for backfills.
+
+        Items are embedded and upserted in chunks of index_chunk_size (one
+        embedding call and one Chroma upsert per chunk). If a chunk upsert
+        fails, its items are retried one by one so a single bad item does not
+        fail the rest.
+
+        Returns:
+            One entry per item: None if indexed, otherwise the error message
+        """
+        if self.collection is None:
+            self.logger.error("Failed to index %d complaints: similarity index unavailable", len(items))
+            return ["similarity index unavailable"] * len(items)
+
+        errors: List[Optional[str]] = [None] * len(items)
+        chunk_size = max(1, self.index_chunk_size)
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            try:
+                self._upsert_chunk(chunk)
+                continue
+            except Exception as e:
+                self.logger.warning(
+                    "Chunk upsert failed, retrying %d complaints individually: %s", len(chunk), e
+                )
+            for offset, item in enumerate(chunk):
+                try:
+                    self._upsert_chunk([item])
+                except Exception as e:
+                    self.logger.error("Failed to index complaint %s: %s", item[0], e)
+                    errors[start + offset] = str(e)
+
+        self.logger.info(
+            "Indexed complaints: %d ok, %d failed",
+            errors.count(None),
+            len(items) - errors.count(None),
+        )
+        return errors
+
+    def _upsert_chunk(self, chunk: List[IndexItem]) -> None:
+        texts = [masked_text for _, masked_text, _ in chunk]
+        self.collection.upsert(
+            ids=[complaint_id for complaint_id, _, _ in chunk],
+            documents=texts,
+            embeddings=self.embedding_provider.embed(texts),
+            # Chroma rejects empty metadata dicts; None means no metadata
+            metadatas=[metadata or None for _, _, metadata in chunk],
+        )
+
     def find_similar(
         self, 
         query_text: str, 
@@ -80,47 +154,73 @@ class ComplaintSimilarityService:
         Returns:
             List of similar complaints with similarity scores
         """
+        return self.batcher.submit((query_text, n_results, exclude_id))
+
+    def find_similar_many(self, requests: List[SimilarRequest]) -> List[List[Dict]]:
+        """
+        Batch variant of find_similar: embeds all uncached query texts in one call and
+        runs a single Chroma query sized for the largest request.
+        """
+        if not requests:
+            return []
+        if self.collection is None:
+            return [[] for _ in requests]
         try:
+            embeddings = self.embedding_provider.embed_queries([query_text for query_text, _, _ in requests])
             # Query with +1 to allow for self-exclusion
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results + (1 if exclude_id else 0),
-                include=["documents", "metadatas", "distances"]
-            )
+            with stage_timer("chroma_query"):
+                results = self.collection.query(
+                    query_embeddings=embeddings,
+                    n_results=max(n + (1 if exclude_id else 0) for _, n, exclude_id in requests),
+                    include=["documents", "metadatas", "distances"]
+                )
+        except Exception as e:
+            self.logger.error("Similarity search failed: %s", e)
+            return [[] for _ in requests]
+
+        return [
+            self._collect_similar(results, position, n_results, exclude_id)
+            for position, (_, n_results, exclude_id) in enumerate(requests)
+        ]
+
+    def _collect_similar(
+        self,
+        results: Dict,
+        position: int,
+        n_results: int,
+        exclude_id: Optional[str],
+    ) -> List[Dict]:
+        if not results["documents"] or not results["documents"][position]:
+            return []
+        
+        similar = []
+        for i, doc in enumerate(results["documents"][position]):
+            complaint_id = results["ids"][position][i]
             
-            if not results["documents"] or not results["documents"][0]:
-                return []
+            # Skip self
+            if exclude_id and complaint_id == exclude_id:
+                continue
             
-            similar = []
-            for i, doc in enumerate(results["documents"][0]):
-                complaint_id = results["ids"][0][i]
-                
-                # Skip self
-                if exclude_id and complaint_id == exclude_id:
-                    continue
-                
-                # Convert L2 distance to similarity score (0-1 range)
-                distance = results["distances"][0][i]
-                similarity = 1 / (1 + distance)
-                
-                # Truncate long text for response
-                truncated_text = doc[:200] + "..." if len(doc) > 200 else doc
-                
-                similar.append({
-                    "id": complaint_id,
-                    "masked_text": truncated_text,
-                    "similarity_score": round(similarity, 2),
-                    **(results["metadatas"][0][i] if results["metadatas"][0] else {})
-                })
+            # Convert L2 distance to similarity score (0-1 range)
+            distance = results["distances"][position][i]
+            similarity = 1 / (1 + distance)
             
-            return similar[:n_results]
+            # Truncate long text for response
+            truncated_text = doc[:200] + "..." if len(doc) > 200 else doc
             
-        except Exception as e:
-            self.logger.error("Similarity search failed: %s", e)
-            return []
+            similar.append({
+                "id": complaint_id,
+                "masked_text": truncated_text,
+                "similarity_score": round(similarity, 2),
+                **((results["metadatas"][position][i] if results["metadatas"][position] else None) or {})
+            })
+        
+        return similar[:n_results]
     
     def delete_complaint(self, complaint_id: str) -> bool:
         """Remove a complaint from the index."""
+        if self.collection is None:
+            return False
         try:
             self.collection.delete(ids=[complaint_id])
             return True
@@ -130,8 +230,10 @@ class ComplaintSimilarityService:
     
     def get_collection_count(self) -> int:
         """Return number of indexed complaints."""
+        if self.collection is None:
+            return 0
         return self.collection.count()
 
 
 # Global instance
-similarity_service = ComplaintSimilarityService()
+similarity_service = LazyService("similarity_service", ComplaintSimilarityService)
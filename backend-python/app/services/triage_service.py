@@ -1,7 +1,44 @@
 import joblib
 import logging
 import json
+import numpy as np
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, List
+
+from app.core.batching import MicroBatcher
+from app.core.lazy import LazyService
+from app.core.metrics import stage_timer
+
+
+@dataclass
+class TriageBatch:
+    """Column-oriented triage results for a batch of texts (one row per text)."""
+    categories: np.ndarray
+    category_confidences: np.ndarray
+    urgencies: np.ndarray
+    urgency_confidences: np.ndarray
+    model_loaded: bool
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def to_records(self) -> List[Dict]:
+        return [
+            {
+                "category": str(category),
+                "category_confidence": float(category_confidence),
+                "urgency": str(urgency),
+                "urgency_confidence": float(urgency_confidence),
+                "model_loaded": self.model_loaded,
+            }
+            for category, category_confidence, urgency, urgency_confidence in zip(
+                self.categories,
+                self.category_confidences,
+                self.urgencies,
+                self.urgency_confidences,
+            )
+        ]
 
 
 class TriageEngine:
@@ -19,9 +56,14 @@ class TriageEngine:
     def __init__(self):
         self.category_model = None
         self.urgency_model = None
+        # Set when latest.json points at a shared_tfidf artifact; the models
+        # are then classifier heads that take its output instead of raw text.
+        self.vectorizer = None
         self.model_loaded = False
         self.logger = logging.getLogger("complaintops.triage_model")
         self._load_models()
+        # Coalesces concurrent predict() calls into predict_batch() calls
+        self.batcher = MicroBatcher("triage", lambda texts: self.predict_batch(texts).to_records())
 
     def _load_models(self):
         try:
@@ -33,16 +75,24 @@ class TriageEngine:
                 with open(metadata_path, "r", encoding="utf-8") as handle:
                     metadata = json.load(handle)
 
-                # Resolve relative paths from base_dir
-                category_path = base_dir / metadata.get("category_model_path", "")
-                urgency_path = base_dir / metadata.get("urgency_model_path", "")
-
-                if category_path.exists() and urgency_path.exists():
-                    self.category_model = joblib.load(str(category_path))
-                    self.urgency_model = joblib.load(str(urgency_path))
-                    self.logger.info("✅ Models loaded from %s", category_path.parent)
+                shared_path = base_dir / metadata.get("shared_model_path", "")
+                if metadata.get("format") == "shared_tfidf" and shared_path.is_file():
+                    artifact = joblib.load(str(shared_path))
+                    self.vectorizer = artifact["vectorizer"]
+                    self.category_model = artifact["category_head"]
+                    self.urgency_model = artifact["urgency_head"]
+                    self.logger.info("✅ Shared TF-IDF models loaded from %s", shared_path)
                 else:
-                    self.logger.warning("Model files not found at %s", category_path)
+                    # Resolve relative paths from base_dir
+                    category_path = base_dir / metadata.get("category_model_path", "")
+                    urgency_path = base_dir / metadata.get("urgency_model_path", "")
+
+                    if category_path.exists() and urgency_path.exists():
+                        self.category_model = joblib.load(str(category_path))
+                        self.urgency_model = joblib.load(str(urgency_path))
+                        self.logger.info("✅ Models loaded from %s", category_path.parent)
+                    else:
+                        self.logger.warning("Model files not found at %s", category_path)
             else:
                 # Fallback to legacy paths
                 legacy_cat = base_dir / "models" / "category_model.pkl"
@@ -59,36 +109,62 @@ class TriageEngine:
         self.model_loaded = bool(self.category_model and self.urgency_model)
 
     def predict(self, text: str):
-        if not self.model_loaded:
-            return {
-                "category": "UNKNOWN",
-                "category_confidence": 0.0,
-                "urgency": "LOW",
-                "urgency_confidence": 0.0,
-                "model_loaded": False,
-            }
-
-        # Predict Category
-        cat_pred = self.category_model.predict([text])[0]
-        cat_probs = self.category_model.predict_proba([text])[0]
-        cat_conf = max(cat_probs)
-
-        # Predict Urgency
-        raw_urgency = self.urgency_model.predict([text])[0]
-        urg_probs = self.urgency_model.predict_proba([text])[0]
-        urg_conf = max(urg_probs)
+        return self.batcher.submit(text)
+
+    def predict_batch(self, texts: List[str]) -> TriageBatch:
+        """
+        Triage many texts at once.
+
+        Each model transforms the batch once via predict_proba; the label is the
+        argmax over classes_, which is what predict() would return for these
+        calibrated classifiers, so TF-IDF runs once per model instead of twice
+        (or once in total when the models share a vectorizer).
+        """
+        size = len(texts)
+        if not self.model_loaded or size == 0:
+            return TriageBatch(
+                categories=np.full(size, "UNKNOWN", dtype=object),
+                category_confidences=np.zeros(size),
+                urgencies=np.full(size, "LOW", dtype=object),
+                urgency_confidences=np.zeros(size),
+                model_loaded=self.model_loaded,
+            )
+
+        with stage_timer("triage"):
+            features = self._features(texts)
+
+            # Predict Category
+            categories, category_confidences = self._predict_with_confidence(self.category_model, features)
+
+            # Predict Urgency
+            raw_urgencies, urgency_confidences = self._predict_with_confidence(self.urgency_model, features)
 
         # Map to API contract labels (RED/YELLOW/GREEN -> HIGH/MEDIUM/LOW)
-        mapped_urgency = self.URGENCY_MAPPING.get(str(raw_urgency).upper(), "LOW")
-
-        return {
-            "category": cat_pred,
-            "category_confidence": float(cat_conf),
-            "urgency": mapped_urgency,
-            "urgency_confidence": float(urg_conf),
-            "model_loaded": True,
-        }
-
-
-triage_engine = TriageEngine()
+        urgencies = np.array(
+            [self.URGENCY_MAPPING.get(str(raw).upper(), "LOW") for raw in raw_urgencies],
+            dtype=object,
+        )
+
+        return TriageBatch(
+            categories=categories,
+            category_confidences=category_confidences,
+            urgencies=urgencies,
+            urgency_confidences=urgency_confidences,
+            model_loaded=True,
+        )
+
+    def _features(self, texts: List[str]):
+        """Model input for texts: shared TF-IDF matrix, or the raw texts for full pipelines."""
+        if self.vectorizer is not None:
+            return self.vectorizer.transform(texts)
+        return texts
+
+    @staticmethod
+    def _predict_with_confidence(model, features):
+        probs = model.predict_proba(features)
+        best = probs.argmax(axis=1)
+        return model.classes_[best], probs[np.arange(probs.shape[0]), best]
+
+
+triage_engine = LazyService("triage_engine", TriageEngine)
 
@@ -0,0 +1,31 @@
+import os
+import shutil
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_workspace(tmp_path_factory):
+    """
+    Run the suite in a scratch directory.
+
+    Services open chroma_db (and stamp its collections) relative to the
+    working directory and write reviews.db; the tests work on copies so the
+    tracked chroma_db and the checkout stay untouched.
+    """
+    workspace = tmp_path_factory.mktemp("workspace")
+    bundled = os.path.join(BACKEND_DIR, "chroma_db")
+    if os.path.isdir(bundled):
+        shutil.copytree(bundled, workspace / "chroma_db")
+    previous_cwd = os.getcwd()
+    previous_db = os.environ.get("REVIEW_DB_PATH")
+    os.environ["REVIEW_DB_PATH"] = str(workspace / "reviews.db")
+    os.chdir(workspace)
+    yield workspace
+    os.chdir(previous_cwd)
+    if previous_db is None:
+        os.environ.pop("REVIEW_DB_PATH", None)
+    else:
+        os.environ["REVIEW_DB_PATH"] = previous_db
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for the AI service.
+
+GUNICORN_PRELOAD=true builds every model once in the master (see
+app/core/preload.py); workers fork with the models already in memory and
+share those pages copy-on-write. Compare per-worker /memory reports with
+the flag on and off to see the shared footprint.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+if preload_app:
+    # Read by app.core.lazy when the master imports app.main
+    os.environ.setdefault("SERVICE_LOAD_MODE", "preload")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.core.preload import reopen_after_fork
+        reopen_after_fork()
+
+
+def post_worker_init(worker):
+    from app.core.preload import memory_report
+    worker.log.info("worker_memory %s", memory_report())
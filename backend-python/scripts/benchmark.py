@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+ComplaintOps Copilot - Offline Latency Benchmark
+Drives app.main:app in-process through an ASGI client at a configurable
+concurrency and reports p50/p95/p99 latency, throughput and peak RSS per route.
+
+The LLM provider and the Chroma collections are replaced by local stand-ins,
+so the numbers cover masking, triage, embedding and the FastAPI stack only.
+The benchmark runs in a temporary working directory; the repo's chroma_db and
+reviews.db are never touched. Service settings are read from the environment
+as usual, e.g. PII_CACHE_MAX_ENTRIES=0 measures masking without the cache.
+
+Usage:
+    python scripts/benchmark.py [--concurrency N] [--requests N] [--routes mask,predict]
+                                [--llm-latency-ms MS] [--stub-embeddings] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_ROUTES = ["mask", "predict", "retrieve", "generate", "similar"]
+ALL_ROUTES = DEFAULT_ROUTES + ["pipeline"]
+STUB_EMBEDDING_DIM = 384
+
+
+class InMemoryCollection:
+    """
+    Brute-force L2 stand-in for a Chroma collection.
+
+    Implements the subset of the collection API the services call
+    (query/get/upsert/add/delete/count) so retrieval cost is dominated by
+    embedding rather than by the vector store.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.metadata: Dict[str, Any] = {}
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[dict] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ids, documents, metadatas, embeddings) -> None:
+        self.delete(ids=list(ids))
+        self.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def add(self, ids, documents, metadatas, embeddings) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        self._vectors = vectors if not self._ids else np.vstack([self._vectors, vectors])
+        self._ids.extend(ids)
+        self._documents.extend(documents)
+        self._metadatas.extend(metadatas)
+
+    def delete(self, ids) -> None:
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in set(ids)]
+        self._ids = [self._ids[i] for i in keep]
+        self._documents = [self._documents[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+
+    def get(self, ids, include=None) -> dict:
+        positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        found = [positions[doc_id] for doc_id in ids if doc_id in positions]
+        return {
+            "ids": [self._ids[i] for i in found],
+            "documents": [self._documents[i] for i in found],
+            "metadatas": [self._metadatas[i] for i in found],
+        }
+
+    def query(self, query_embeddings, n_results: int, where: Optional[dict] = None, include=None) -> dict:
+        candidates = [
+            i for i, metadata in enumerate(self._metadatas)
+            if not where or all(metadata.get(k) == v for k, v in where.items())
+        ]
+        response = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        for query in queries:
+            if not candidates:
+                ranked, distances = [], []
+            else:
+                distances = ((self._vectors[candidates] - query) ** 2).sum(axis=1)
+                order = np.argsort(distances)[:n_results]
+                ranked = [candidates[i] for i in order]
+                distances = [float(distances[i]) for i in order]
+            response["ids"].append([self._ids[i] for i in ranked])
+            response["documents"].append([self._documents[i] for i in ranked])
+            response["metadatas"].append([self._metadatas[i] for i in ranked])
+            response["distances"].append(distances)
+        return response
+
+
+class StandInLLMProvider:
+    """Returns a fixed draft after a configurable simulated upstream latency."""
+
+    def __init__(self, latency_ms: float) -> None:
+        self.latency_s = latency_ms / 1000.0
+
+    def _draft(self, category: str, urgency: str) -> dict:
+        return {
+            "action_plan": ["Müşteri kaydını kontrol et", "İlgili birime yönlendir"],
+            "customer_reply_draft": f"Talebiniz ({category}/{urgency}) incelemeye alınmıştır.",
+            "risk_flags": [],
+            "sources": [],
+            "error_code": None,
+        }
+
+    def generate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        time.sleep(self.latency_s)
+        return self._draft(category, urgency)
+
+    async def agenerate_response(self, text: str, category: str, urgency: str, snippets: list) -> dict:
+        await asyncio.sleep(self.latency_s)
+        return self._draft(category, urgency)
+
+
+def stub_embedding_fn(texts: List[str]) -> List[np.ndarray]:
+    """Deterministic hash embedding; avoids loading a sentence-transformer."""
+    vectors = []
+    for text in texts:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(STUB_EMBEDDING_DIM).astype(np.float32)
+        vectors.append(vector / np.linalg.norm(vector))
+    return vectors
+
+
+def load_golden_set(path: Path) -> dict:
+    """Load the golden set from JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def install_stand_ins(llm_latency_ms: float, stub_embeddings: bool, texts: List[str]) -> None:
+    """Swap the LLM provider and Chroma collections for local stand-ins and seed them."""
+    from app.rag.ingest import chunk_document, file_category
+    from app.rag.lexical import BM25Index
+    from app.services.embedding_provider import embedding_provider
+    from app.services.llm_service import llm_client
+    from app.services.rag_service import rag_manager
+    from app.services.similarity_service import similarity_service
+
+    if stub_embeddings:
+        embedding_provider._embedding_fn = stub_embedding_fn
+
+    llm_client.provider = StandInLLMProvider(llm_latency_ms)
+    llm_client.mock_mode = False
+
+    sops = InMemoryCollection("complaint_sops")
+    chunks, ids, metadatas = [], [], []
+    for path in sorted((BACKEND_DIR / "data" / "sops").glob("*.md")):
+        for index, chunk in enumerate(chunk_document(path.read_text(encoding="utf-8"))):
+            chunk_id = f"{path.name}_chunk_{index}"
+            chunks.append(chunk.text)
+            ids.append(chunk_id)
+            metadatas.append({
+                "source": "Bank_SOP_v2",
+                "doc_name": path.name,
+                "chunk_id": chunk_id,
+                "category": file_category(path.name),
+            })
+    sops.add(ids=ids, documents=chunks, metadatas=metadatas, embeddings=embedding_provider.embed(chunks))
+    rag_manager.collection = sops
+    rag_manager.lexical_index = BM25Index.build(ids, chunks, [m["category"] for m in metadatas])
+    rag_manager.partitions.collections = {}
+    for category in sorted({m["category"] for m in metadatas}):
+        members = [i for i, m in enumerate(metadatas) if m["category"] == category]
+        partition = rag_manager.partitions.collections[category] = InMemoryCollection(f"complaint_sops__{category}")
+        partition.add(
+            ids=[ids[i] for i in members],
+            documents=[chunks[i] for i in members],
+            metadatas=[metadatas[i] for i in members],
+            embeddings=[sops._vectors[i] for i in members],
+        )
+
+    similarity_service.collection = InMemoryCollection("complaint_embeddings")
+    for index, text in enumerate(texts):
+        similarity_service.index_complaint(f"bench-{index}", text, {"category": "", "status": ""})
+
+
+def build_request(route: str, text: str, index: int) -> Dict[str, Any]:
+    """Return httpx request kwargs for one call to the given route."""
+    if route == "mask":
+        return {"method": "POST", "url": "/mask", "json": {"text": text}}
+    if route == "predict":
+        return {"method": "POST", "url": "/predict", "json": {"text": text}}
+    if route == "retrieve":
+        return {"method": "POST", "url": "/retrieve", "json": {"text": text}}
+    if route == "generate":
+        return {
+            "method": "POST",
+            "url": "/generate",
+            "json": {"text": text, "category": "INFORMATION_REQUEST", "urgency": "MEDIUM"},
+        }
+    if route == "similar":
+        return {
+            "method": "GET",
+            "url": f"/similar/bench-query-{index}",
+            "params": {"query_text": text, "limit": 5},
+        }
+    if route == "pipeline":
+        return {"method": "POST", "url": "/pipeline", "json": {"text": text, "include_generation": True}}
+    raise ValueError(f"Unknown route: {route}")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_route(
+    client,
+    route: str,
+    texts: List[str],
+    total_requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Fire total_requests calls at one route from `concurrency` workers."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(total_requests))
+
+    async def worker() -> None:
+        for index in counter:
+            kwargs = build_request(route, texts[index % len(texts)], index)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**kwargs, headers={"X-Request-ID": f"bench-{route}-{index}"})
+                status = str(response.status_code)
+            except Exception as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - start)
+            if status != "200":
+                errors[status] = errors.get(status, 0) + 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    ordered = sorted(latencies)
+    return {
+        "route": route,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+async def run_benchmark(args, texts: List[str]) -> List[Dict[str, Any]]:
+    import httpx
+    from app.main import app
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for route in args.routes:
+            if args.warmup:
+                await run_route(client, route, texts, args.warmup, 1)
+            result = await run_route(client, route, texts, args.requests, args.concurrency)
+            results.append(result)
+            print(
+                f"  {route:<10} p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+                f"p99={result['p99_ms']:>8.2f}ms {result['throughput_rps']:>8.2f} req/s "
+                f"rss={result['peak_rss_mb']:.1f}MB errors={sum(result['errors'].values())}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ComplaintOps offline latency benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per route")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured serial requests per route")
+    parser.add_argument(
+        "--routes",
+        default=",".join(DEFAULT_ROUTES),
+        help=f"Comma-separated routes to run ({','.join(ALL_ROUTES)})",
+    )
+    parser.add_argument("--golden-set", default=str(BACKEND_DIR / "data" / "golden_set.json"))
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated LLM latency")
+    parser.add_argument(
+        "--stub-embeddings",
+        action="store_true",
+        help="Use a hash embedding instead of loading the sentence-transformer",
+    )
+    parser.add_argument(
+        "--retrieval-mode",
+        choices=["vector", "lexical", "hybrid"],
+        default="hybrid",
+        help="Default RAG retrieval mode (RAG_RETRIEVAL_MODE)",
+    )
+    parser.add_argument("--output", help="Output JSON file for results")
+    args = parser.parse_args()
+
+    args.routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    unknown = sorted(set(args.routes) - set(ALL_ROUTES))
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    golden_set = load_golden_set(Path(args.golden_set))
+    texts = [example["text"] for example in golden_set["examples"]]
+
+    # Services open chroma_db and reviews.db relative to the working directory
+    workdir = tempfile.mkdtemp(prefix="complaintops-bench-")
+    os.environ.setdefault("REVIEW_DB_PATH", os.path.join(workdir, "reviews.db"))
+    os.environ["RAG_RETRIEVAL_MODE"] = args.retrieval_mode
+    os.chdir(workdir)
+
+    print("=" * 60)
+    print("ComplaintOps Copilot - Offline Benchmark")
+    print("=" * 60)
+    print(f"Routes: {', '.join(args.routes)}")
+    print(f"Concurrency: {args.concurrency}  Requests/route: {args.requests}")
+    print(f"Working directory: {workdir}")
+
+    startup = time.perf_counter()
+    install_stand_ins(args.llm_latency_ms, args.stub_embeddings, texts)
+    print(f"Startup + seeding: {time.perf_counter() - startup:.2f}s  RSS: {peak_rss_mb():.1f}MB")
+    print("-" * 60)
+
+    results = asyncio.run(run_benchmark(args, texts))
+
+    print("=" * 60)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "concurrency": args.concurrency,
+                    "requests_per_route": args.requests,
+                    "llm_latency_ms": args.llm_latency_ms,
+                    "stub_embeddings": args.stub_embeddings,
+                    "retrieval_mode": args.retrieval_mode,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -97,13 +97,22 @@ class TestLogSanitization:
             logger.removeHandler(handler)
 
 
+@pytest.fixture
+def review_store(tmp_path, monkeypatch):
+    """A fresh store on its own database (the pooled singleton keeps the first path it opened)."""
+    from app.services.review_service import ReviewStore
+
+    monkeypatch.setenv("REVIEW_DB_PATH", str(tmp_path / "reviews.db"))
+    store = ReviewStore()
+    yield store
+    store.close()
+
+
 class TestNoRawTextStorage:
     """T3: Verify raw text is never stored"""
     
-    def test_review_store_only_stores_masked_text(self):
+    def test_review_store_only_stores_masked_text(self, review_store):
         """review_store should only receive masked_text"""
-        from app.services.review_service import review_store
-        
         # Create a review with masked text
         review_id = "test-review-123"
         masked_text = "Şikayet: [MASKED_TCKN] hesabından işlem"
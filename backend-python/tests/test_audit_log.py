@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from app.services.audit_log import AuditEvent, AuditWriter
+from app.services.review_service import ReviewStore
+
+
+def _audit_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT review_id, status, notes FROM review_audit ORDER BY audit_id").fetchall()
+    finally:
+        conn.close()
+
+
+def _event(i, status="PENDING_REVIEW"):
+    return AuditEvent(f"r{i}", status, None, "2026-01-01T00:00:00+00:00")
+
+
+def _buffered_store(tmp_path, monkeypatch):
+    from app.services import review_service
+
+    monkeypatch.setenv("REVIEW_DB_PATH", str(tmp_path / "reviews.db"))
+    monkeypatch.setattr(review_service, "AUDIT_WRITE_MODE", "buffered")
+    return ReviewStore()
+
+
+def test_buffered_store_group_commits_audit_rows(tmp_path, monkeypatch):
+    store = _buffered_store(tmp_path, monkeypatch)
+    store._audit.max_events = 1000
+    store._audit.interval_seconds = 60
+    for i in range(5):
+        store.create_review(f"r{i}", "[MASKED_NAME] kart", "CARD_LIMIT_CREDIT", 0.4, "HIGH", 0.5)
+    store.update_review("r0", "APPROVED", notes="ok")
+    assert store.update_review("missing", "APPROVED") is None
+
+    path = str(tmp_path / "reviews.db")
+    assert _audit_rows(path) == []  # still buffered
+    assert store._audit.pending() == 6
+    assert store._audit.flush() == 6
+    assert store._audit.stats == {"events": 6, "flushes": 1}
+    rows = _audit_rows(path)
+    assert rows[-1] == ("r0", "APPROVED", "ok")
+    assert [row[0] for row in rows[:5]] == [f"r{i}" for i in range(5)]
+
+    store.update_review("r1", "REJECTED")
+    store.close()  # shutdown writes what is still buffered
+    assert _audit_rows(path)[-1] == ("r1", "REJECTED", None)
+
+
+def test_flush_thread_bounds_latency_and_batch_size(tmp_path, monkeypatch):
+    path = str(tmp_path / "reviews.db")
+    monkeypatch.setenv("REVIEW_DB_PATH", path)
+    ReviewStore().close()  # creates the schema
+
+    writer = AuditWriter(path, max_events=3, interval_seconds=0.05)
+    for i in range(3):
+        writer.append(_event(i))
+    writer.append(_event(3))
+    deadline = time.time() + 2
+    while len(_audit_rows(path)) < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(_audit_rows(path)) == 4
+    # The first three went out as one full batch, the straggler after the interval
+    assert writer.stats["flushes"] <= 2
+    writer.close()
+
+
+def test_segments_are_appended_and_sealed_on_close(tmp_path, monkeypatch):
+    path = str(tmp_path / "reviews.db")
+    monkeypatch.setenv("REVIEW_DB_PATH", path)
+    ReviewStore().close()  # creates the schema
+    segments = tmp_path / "segments"
+
+    writer = AuditWriter(path, max_events=100, interval_seconds=60, segment_dir=str(segments))
+    writer.append(_event(1))
+    writer.flush()
+    (open_segment,) = segments.iterdir()
+    assert open_segment.name.endswith(".jsonl.open")
+
+    writer.append(_event(2, "APPROVED"))
+    writer.close()
+    (sealed,) = segments.iterdir()
+    assert sealed.name == open_segment.name[: -len(".open")]
+    lines = [json.loads(line) for line in sealed.read_text(encoding="utf-8").splitlines()]
+    assert [(line["review_id"], line["status"]) for line in lines] == [("r1", "PENDING_REVIEW"), ("r2", "APPROVED")]
+    assert len(_audit_rows(path)) == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_worker_drops_parent_buffer(tmp_path, monkeypatch):
+    store = _buffered_store(tmp_path, monkeypatch)
+    store._audit.interval_seconds = 60
+    store._audit.max_events = 1000
+    store.create_review("r1", "text", "GENERAL", 0.4, "LOW", 0.5)
+    assert store._audit.pending() == 1
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            store.reopen_after_fork()
+            if store._audit.pending() == 0:
+                store.create_review("r2", "text", "GENERAL", 0.4, "LOW", 0.5)
+                store.close()
+                code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    # The parent still owns r1 and writes it once, on its own shutdown
+    store.close()
+    assert sorted(row[0] for row in _audit_rows(str(tmp_path / "reviews.db"))) == ["r1", "r2"]
+
+
+def test_reset_in_process_stops_the_running_flush_thread(tmp_path, monkeypatch):
+    store = _buffered_store(tmp_path, monkeypatch)
+    store._audit.interval_seconds = 60
+    store._audit.max_events = 1000
+    store.create_review("r1", "text", "GENERAL", 0.4, "LOW", 0.5)
+    thread = store._audit._thread
+
+    store.reopen_after_fork()
+
+    assert not thread.is_alive()
+    store.create_review("r2", "text", "GENERAL", 0.4, "LOW", 0.5)
+    store.close()
+    assert [row[0] for row in _audit_rows(str(tmp_path / "reviews.db"))] == ["r1", "r2"]
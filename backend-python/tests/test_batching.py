@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.batching import MicroBatcher
+
+
+def test_disabled_batcher_calls_through():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test", batch_fn, max_items=8, max_wait_ms=0)
+    assert not batcher.enabled
+    assert batcher.submit(3) == 6
+    assert calls == [[3]]
+
+
+def test_concurrent_calls_are_coalesced():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test", batch_fn, max_items=16, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(batcher.submit, range(8)))
+
+    # Every caller gets its own result back, in order
+    assert results == [i * 2 for i in range(8)]
+    assert sum(sizes) == 8
+    assert len(sizes) < 8
+    assert batcher.stats()["items"] == 8
+
+
+def test_batch_respects_max_items():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return list(items)
+
+    batcher = MicroBatcher("test", batch_fn, max_items=2, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(batcher.submit, range(6)))
+    assert max(sizes) <= 2
+
+
+def test_batch_errors_propagate_to_callers():
+    def batch_fn(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher("test", batch_fn, max_items=4, max_wait_ms=10)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
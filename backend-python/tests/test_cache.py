@@ -0,0 +1,46 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_hit_and_miss_counters():
+    cache = TTLCache(maxsize=4, ttl_seconds=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = TTLCache(maxsize=2, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["size"] == 0
+
+
+def test_zero_size_disables_cache():
+    cache = TTLCache(maxsize=0, ttl_seconds=60)
+    cache.set("a", 1)
+    assert not cache.enabled
+    assert cache.get("a") is None
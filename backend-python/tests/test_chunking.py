@@ -0,0 +1,58 @@
+from app.rag.chunking import chunk_markdown, iter_blocks
+
+
+def words(text):
+    return len(text.split())
+
+
+DOC = """# Transfer Prosedürü
+
+## EFT
+EFT işlemleri iş günlerinde gerçekleşir.
+
+- Saat 17:00 sonrası işlemler ertesi iş günü gönderilir.
+  - Hafta sonu işlemler pazartesi gönderilir.
+- EFT iptal edilemez.
+
+## FAST
+FAST ile anlık transfer yapılabilir.
+
+### Limitler
+FAST limiti 100.000 TL'dir.
+"""
+
+
+def test_blocks_carry_their_heading_path():
+    blocks = list(iter_blocks(DOC))
+    assert blocks[0] == (["Transfer Prosedürü", "EFT"], "EFT işlemleri iş günlerinde gerçekleşir.")
+    # Nested list items stay with their parent item
+    assert blocks[1][1].startswith("- Saat 17:00") and "Hafta sonu" in blocks[1][1]
+    assert blocks[2][1] == "- EFT iptal edilemez."
+    assert blocks[-1][0] == ["Transfer Prosedürü", "FAST", "Limitler"]
+
+
+def test_chunks_never_straddle_sections():
+    chunks = chunk_markdown(DOC, max_tokens=200, count_tokens=words)
+    assert [chunk.section for chunk in chunks] == [
+        "Transfer Prosedürü > EFT",
+        "Transfer Prosedürü > FAST",
+        "Transfer Prosedürü > FAST > Limitler",
+    ]
+    assert chunks[0].text.startswith("Transfer Prosedürü > EFT\n")
+    assert "FAST" not in chunks[0].text
+
+
+def test_chunks_respect_the_token_budget():
+    paragraph = " ".join(f"Cümle {i} burada biter." for i in range(40))
+    chunks = chunk_markdown(f"## Uzun\n{paragraph}\n", max_tokens=30, count_tokens=words)
+    assert len(chunks) > 1
+    assert all(words(chunk.text) <= 30 for chunk in chunks)
+    # Split at sentence boundaries and nothing is lost
+    body = " ".join(chunk.text.split("\n", 1)[1] for chunk in chunks)
+    assert body == paragraph
+
+
+def test_text_without_headings_has_empty_section():
+    chunks = chunk_markdown("Sadece bir paragraf.", max_tokens=50, count_tokens=words)
+    assert chunks[0].text == "Sadece bir paragraf."
+    assert chunks[0].section == ""
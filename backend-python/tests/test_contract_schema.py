@@ -3,8 +3,9 @@ import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.schemas import (
-    MaskingResponse, TriageResponse, RAGResponse, GenerateResponse,
-    ReviewActionResponse
+    MaskingResponse, MaskingBatchResponse, TriageResponse, RAGResponse, GenerateResponse,
+    ReviewActionResponse, PipelineResponse, TriageBatchResponse, IndexComplaintsBatchResponse,
+    ReviewQueueResponse,
 )
 from app.services.review_service import ReviewRecord
 
@@ -24,6 +25,25 @@ def test_contract_mask_endpoint():
     assert "masked_entities" in data
     assert isinstance(data["masked_entities"], list)
 
+def test_contract_mask_batch_endpoint():
+    """Contract: POST /mask/batch -> MaskingBatchResponse"""
+    texts = ["Test 123", "Email: test@example.com", ""]
+    response = client.post("/mask/batch", json={"texts": texts})
+    assert response.status_code == 200
+
+    data = response.json()
+    validated = MaskingBatchResponse(**data)
+
+    # One result per input, in input order
+    assert len(data["results"]) == len(texts)
+    assert "test@example.com" not in data["results"][1]["masked_text"]
+    for item in data["results"]:
+        assert item.get("original_text") is None
+
+def test_contract_mask_batch_rejects_empty_list():
+    response = client.post("/mask/batch", json={"texts": []})
+    assert response.status_code == 422
+
 def test_contract_predict_endpoint():
     """Contract: POST /predict -> TriageResponse"""
     response = client.post("/predict", json={"text": "Kredi kartım çalındı"})
@@ -40,6 +60,16 @@ def test_contract_predict_endpoint():
     assert "model_loaded" in data
     assert "review_status" in data
 
+def test_contract_predict_batch_endpoint():
+    """Contract: POST /predict/batch -> TriageBatchResponse"""
+    texts = ["Kredi kartım çalındı", "EFT yaptım gitmedi"]
+    response = client.post("/predict/batch", json={"texts": texts})
+    assert response.status_code == 200
+
+    data = response.json()
+    validated = TriageBatchResponse(**data)
+    assert len(data["results"]) == len(texts)
+
 def test_contract_retrieve_endpoint():
     """Contract: POST /retrieve -> RAGResponse"""
     response = client.post("/retrieve", json={"text": "Kart aidatı"})
@@ -74,6 +104,55 @@ def test_contract_generate_endpoint():
     assert "sources" in data
     assert isinstance(data["action_plan"], list)
 
+def test_contract_pipeline_endpoint():
+    """Contract: POST /pipeline -> PipelineResponse"""
+    response = client.post("/pipeline", json={
+        "text": "Kartımdan bilgim dışında para çekildi, TC 12345678901",
+        "include_generation": True,
+    })
+    assert response.status_code == 200
+
+    data = response.json()
+    validated = PipelineResponse(**data)
+
+    assert "12345678901" not in data["masked_text"]
+    assert "triage" in data
+    assert isinstance(data["relevant_sources"], list)
+    assert isinstance(data["similar_complaints"], list)
+    assert data["generation"] is not None
+
+def test_contract_pipeline_without_generation():
+    response = client.post("/pipeline", json={"text": "EFT yaptım gitmedi"})
+    assert response.status_code == 200
+    assert response.json()["generation"] is None
+
+def test_contract_pipeline_degrades_failing_stages():
+    from unittest.mock import patch
+
+    with patch("app.services.rag_service.rag_manager.retrieve", side_effect=RuntimeError("chroma down")), \
+            patch("app.services.similarity_service.similarity_service.find_similar", side_effect=RuntimeError("down")):
+        response = client.post("/pipeline", json={"text": "EFT yaptım gitmedi", "include_generation": True})
+    assert response.status_code == 200
+
+    data = response.json()
+    PipelineResponse(**data)
+    assert data["risk_flags"] == ["RAG_UNAVAILABLE", "SIMILARITY_UNAVAILABLE"]
+    assert data["relevant_sources"] == []
+    assert data["similar_complaints"] == []
+    assert data["triage"] is not None
+    assert "RAG_UNAVAILABLE" in data["generation"]["risk_flags"]
+
+
+def test_contract_pipeline_does_not_repeat_empty_retrieval():
+    from unittest.mock import patch
+
+    with patch("app.services.rag_service.rag_manager.retrieve", return_value=[]) as retrieve:
+        response = client.post("/pipeline", json={"text": "EFT yaptım gitmedi", "include_generation": True})
+    assert response.status_code == 200
+    assert retrieve.call_count == 1
+    assert "RAG_EMPTY_SOURCES" in response.json()["generation"]["risk_flags"]
+
+
 def test_contract_review_endpoints():
     """Contract: POST /review/approve & /reject"""
     # Create a review first (hack via predict low conf or manually)
@@ -105,3 +184,41 @@ def test_contract_review_endpoints():
         validated = ReviewActionResponse(**data)
         assert data["review_id"] == "test-id"
         assert data["status"] == "APPROVED"
+
+def test_contract_index_complaint_batch_endpoint():
+    """Contract: POST /index-complaint/batch -> IndexComplaintsBatchResponse"""
+    complaints = [
+        {"complaint_id": "bulk-1", "masked_text": "Transferim gecikti.", "category": "TRANSFER_DELAY"},
+        {"complaint_id": "bulk-2", "masked_text": "Mailim test@example.com"},
+    ]
+    response = client.post("/index-complaint/batch", json={"complaints": complaints})
+    assert response.status_code == 200
+    data = response.json()
+    validated = IndexComplaintsBatchResponse(**data)
+    assert [r["complaint_id"] for r in data["results"]] == ["bulk-1", "bulk-2"]
+    assert data["results"][1]["status"] == "rejected"
+    assert data["results"][1]["error"] == "RAW_TEXT_REJECTED"
+    assert data["indexed"] + data["rejected"] + data["failed"] == 2
+
+def test_contract_review_queue_endpoint():
+    """Contract: GET /review/queue -> ReviewQueueResponse"""
+    from unittest.mock import patch
+    mock_record = ReviewRecord(
+        review_id="test-id",
+        status="PENDING_REVIEW",
+        created_at="2024-01-01T00:00:00+00:00",
+        updated_at="2024-01-01T00:00:00+00:00",
+        masked_text="masked",
+        category="CAT",
+        category_confidence=0.4,
+        urgency="HIGH",
+        urgency_confidence=0.5,
+    )
+
+    with patch("app.services.review_service.review_store.list_reviews", return_value=([mock_record], "next")):
+        response = client.get("/review/queue", params={"category": "CAT", "limit": 1})
+        assert response.status_code == 200
+        data = response.json()
+        validated = ReviewQueueResponse(**data)
+        assert data["items"][0]["review_id"] == "test-id"
+        assert data["next_cursor"] == "next"
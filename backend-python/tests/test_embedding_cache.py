@@ -0,0 +1,33 @@
+from app.services.embedding_cache import EmbeddingCache
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def test_only_misses_are_embedded():
+    cache = EmbeddingCache()
+    embedder = CountingEmbedder()
+
+    first = cache.embed("model-a", embedder, ["kart", "eft"])
+    second = cache.embed("model-a", embedder, ["eft", "havale", "kart"])
+
+    assert first == [[4.0], [3.0]]
+    assert second == [[3.0], [6.0], [4.0]]
+    assert embedder.calls == [["kart", "eft"], ["havale"]]
+
+
+def test_keys_are_scoped_by_model():
+    cache = EmbeddingCache()
+    embedder = CountingEmbedder()
+
+    cache.embed("model-a", embedder, ["kart"])
+    cache.embed("model-b", embedder, ["kart"])
+
+    assert embedder.calls == [["kart"], ["kart"]]
+    assert cache.stats()["size"] == 2
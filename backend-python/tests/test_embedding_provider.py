@@ -0,0 +1,58 @@
+import uuid
+
+import chromadb
+import pytest
+
+from app.services.embedding_provider import (
+    EMBEDDING_MODEL_METADATA_KEY,
+    EmbeddingModelMismatchError,
+    EmbeddingProvider,
+)
+
+
+@pytest.fixture
+def client():
+    return chromadb.EphemeralClient()
+
+
+def _provider(model_name, policy="refuse"):
+    provider = EmbeddingProvider()
+    provider.model_name = model_name
+    provider.mismatch_policy = policy
+    return provider
+
+
+def _name():
+    return f"test_{uuid.uuid4().hex[:8]}"
+
+
+def test_new_collection_is_stamped(client):
+    collection = _provider("model-a").open_collection(client, _name())
+    assert collection.metadata[EMBEDDING_MODEL_METADATA_KEY] == "model-a"
+
+
+def test_empty_collection_is_restamped(client):
+    name = _name()
+    client.create_collection(name=name, embedding_function=None)
+    collection = _provider("model-a").open_collection(client, name)
+    assert collection.metadata[EMBEDDING_MODEL_METADATA_KEY] == "model-a"
+
+
+def test_populated_mismatch_is_refused(client):
+    name = _name()
+    collection = _provider("model-a").open_collection(client, name)
+    collection.add(ids=["1"], documents=["kart"], embeddings=[[0.1, 0.2]])
+
+    with pytest.raises(EmbeddingModelMismatchError):
+        _provider("model-b").open_collection(client, name)
+    assert client.get_collection(name, embedding_function=None).count() == 1
+
+
+def test_populated_mismatch_is_rebuilt(client):
+    name = _name()
+    collection = _provider("model-a").open_collection(client, name)
+    collection.add(ids=["1"], documents=["kart"], embeddings=[[0.1, 0.2]])
+
+    rebuilt = _provider("model-b", policy="rebuild").open_collection(client, name)
+    assert rebuilt.count() == 0
+    assert rebuilt.metadata[EMBEDDING_MODEL_METADATA_KEY] == "model-b"
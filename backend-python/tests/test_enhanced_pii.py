@@ -1,5 +1,5 @@
 import pytest
-from app.services.masking_service import masker
+from app.services.masking_service import masker, _apply_regex_failsafe
 
 class TestPersonMasking:
     """PERSON entity detection"""
@@ -80,3 +80,103 @@ class TestFalsePositivePrevention:
         result = masker.mask(text)
         # Should have minimal or no masking
         assert len(result["masked_entities"]) == 0
+
+class TestRegexFailsafe:
+    """Stage 2 single-pass regex failsafe"""
+
+    def test_masks_all_failsafe_types_in_one_pass(self):
+        text = (
+            "IBAN TR33 0006 1005 1978 6457 8413 26, TC 12345678901, "
+            "tel 0532 123 45 67, mail a.b@example.com, kart 1234 5678 9012 3456"
+        )
+        masked, entities = _apply_regex_failsafe(text)
+        assert masked == (
+            "IBAN [MASKED_IBAN], TC [MASKED_TCKN], "
+            "tel [MASKED_PHONE], mail [MASKED_EMAIL], kart [MASKED_CREDIT_CARD]"
+        )
+        assert [e["type"] for e in entities] == ["IBAN", "TCKN", "PHONE", "EMAIL", "CREDIT_CARD"]
+        assert all(e["text"] == "[REDACTED]" for e in entities)
+
+    def test_entity_offsets_refer_to_input(self):
+        text = "mail a.b@example.com"
+        _, entities = _apply_regex_failsafe(text)
+        assert text[entities[0]["start"]:entities[0]["end"]] == "a.b@example.com"
+
+    def test_repeated_values_all_masked(self):
+        masked, entities = _apply_regex_failsafe("0532 123 45 67 ve 0532 123 45 67")
+        assert masked == "[MASKED_PHONE] ve [MASKED_PHONE]"
+        assert len(entities) == 2
+
+    def test_clean_text_unchanged(self):
+        text = "Toplam 500 TL ödeme yaptım"
+        masked, entities = _apply_regex_failsafe(text)
+        assert masked == text
+        assert entities == []
+
+    @pytest.mark.parametrize("text, expected", [
+        # PHONE runs before ACCOUNT, so the account prefix stays and the digits are a phone
+        ("hesap no 5321234567 var", "hesap no[MASKED_PHONE] var"),
+        # An 11-digit account number is caught as TCKN first
+        ("hesap numarası: 12345678901", "hesap numarası: [MASKED_TCKN]"),
+        ("hesap no 123406789012", "[MASKED_ACCOUNT]"),
+        # TCKN claims the value before PHONE can match inside it
+        ("TC 53212345678 ve tel 0532 123 45 67", "TC [MASKED_TCKN] ve tel [MASKED_PHONE]"),
+    ])
+    def test_overlapping_patterns_keep_cascade_precedence(self, text, expected):
+        masked, _ = _apply_regex_failsafe(text)
+        assert masked == expected
+
+    def test_matches_sequential_pattern_application(self):
+        import re
+        from app.services.masking_service import REGEX_FAILSAFE_PATTERNS
+
+        def cascade(text):
+            for entity_type, pattern in REGEX_FAILSAFE_PATTERNS.items():
+                for match in re.finditer(pattern, text, re.IGNORECASE):
+                    text = text.replace(match.group(0), f"[MASKED_{entity_type}]")
+            return text
+
+        texts = [
+            "9123456789015321234567ve 12345678901",
+            "TR33 0006 1005 1978 6457 8413 2653212345678ve 53212345678ve ",
+            "x1234567890123456:532123456705321234567",
+            "hesap no 5321234567 hesap 1234567890123456 a.b@example.com",
+        ]
+        for text in texts:
+            assert _apply_regex_failsafe(text)[0] == cascade(text)
+
+    def test_many_matches_scale_linearly(self):
+        import time
+
+        def phones(count):
+            return " ".join(f"tel 05{30 + i % 30} {100 + i % 900} {10 + i % 90} {10 + i // 90 % 90}" for i in range(count))
+
+        def timed(text):
+            start = time.perf_counter()
+            masked, entities = _apply_regex_failsafe(text)
+            return time.perf_counter() - start, masked, entities
+
+        small, _, _ = min((timed(phones(1000)) for _ in range(3)), key=lambda result: result[0])
+        large, masked, entities = min((timed(phones(8000)) for _ in range(3)), key=lambda result: result[0])
+        assert len(entities) == 8000
+        assert masked.count("[MASKED_PHONE]") == 8000
+        # 8x the matches: linear is ~8x the time, quadratic ~64x
+        assert large < small * 24
+
+class TestMaskingCache:
+    """Masking result cache"""
+
+    def test_repeat_call_served_from_cache(self):
+        text = "Müşteri Fatma Öztürk, TC 12345678901"
+        first = masker.mask_with_double_pass(text)
+        hits_before = masker.cache_stats()["hits"]
+        second = masker.mask_with_double_pass(text)
+        assert second == first
+        assert masker.cache_stats()["hits"] == hits_before + 1
+
+    def test_cache_never_stores_raw_text(self):
+        text = "TC 10987654321 ile başvurdum"
+        masker.mask_with_double_pass(text)
+        for _, (_, value) in masker._cache._entries.items():
+            assert "10987654321" not in repr(value)
+        assert all(text not in key for key in masker._cache._entries)
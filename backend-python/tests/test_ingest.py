@@ -0,0 +1,141 @@
+import pytest
+
+from app.rag import ingest
+from app.rag.chunking import MarkdownChunk
+from app.services.embedding_provider import embedding_provider
+
+SOP = """# Transfer Prosedürü
+
+## EFT
+EFT işlemleri iş günlerinde 09:00-17:00 arasında gerçekleşir.
+
+## FAST
+FAST ile 7/24 anlık transfer yapılabilir.
+"""
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), float(text.count(" ")), 1.0] for text in texts]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sops = tmp_path / "data" / "sops"
+    sops.mkdir(parents=True)
+    embedder = CountingEmbedder()
+    monkeypatch.setattr(embedding_provider, "_embedding_fn", embedder)
+    # Small chunks so a file yields several of them
+    monkeypatch.setattr(
+        ingest,
+        "chunk_document",
+        lambda text: [MarkdownChunk(line, []) for line in text.splitlines() if line.strip()],
+    )
+    return sops, embedder
+
+
+def _collection():
+    import chromadb
+    import os
+    client = chromadb.PersistentClient(path=os.path.join(os.getcwd(), "chroma_db"))
+    return client.get_collection(ingest.COLLECTION_NAME)
+
+
+def test_unchanged_files_are_not_reembedded(workspace):
+    sops, embedder = workspace
+    (sops / "transfers.md").write_text(SOP, encoding="utf-8")
+
+    first = ingest.ingest_data(batch_size=2)
+    assert first["chunks_embedded"] == 5
+    assert len(embedder.texts) == 5
+
+    second = ingest.ingest_data(batch_size=2)
+    assert second["files_unchanged"] == 1
+    assert second["chunks_embedded"] == 0
+    assert len(embedder.texts) == 5
+
+
+def test_unchanged_empty_file_is_skipped(workspace):
+    sops, _ = workspace
+    (sops / "transfers.md").write_text(SOP, encoding="utf-8")
+    (sops / "draft.md").write_text("", encoding="utf-8")
+
+    first = ingest.ingest_data()
+    assert first["files_updated"] == 2
+    version = _collection().metadata[ingest.INDEX_VERSION_KEY]
+
+    second = ingest.ingest_data()
+    assert second["files_unchanged"] == 2
+    assert second["files_updated"] == 0
+    assert _collection().metadata[ingest.INDEX_VERSION_KEY] == version
+
+    (sops / "draft.md").write_text("# Taslak\nKart limiti artırımı.", encoding="utf-8")
+    third = ingest.ingest_data()
+    assert third["files_updated"] == 1
+    assert third["chunks_embedded"] == 2
+    assert ingest.recorded_empty_files(_collection()) == {}
+
+
+def test_only_changed_chunks_are_embedded_and_stale_ones_deleted(workspace):
+    sops, embedder = workspace
+    (sops / "transfers.md").write_text(SOP, encoding="utf-8")
+    ingest.ingest_data()
+    embedder.texts.clear()
+
+    changed = SOP.replace("7/24 anlık", "7/24 saniyeler içinde")
+    (sops / "transfers.md").write_text(changed, encoding="utf-8")
+    stats = ingest.ingest_data()
+
+    assert stats["files_updated"] == 1
+    assert embedder.texts == ["FAST ile 7/24 saniyeler içinde transfer yapılabilir."]
+    assert stats["chunks_deleted"] == 1
+    documents = _collection().get(include=["documents"])["documents"]
+    assert "FAST ile 7/24 anlık transfer yapılabilir." not in documents
+    assert len(documents) == 5
+
+
+def test_removed_files_are_deleted(workspace):
+    sops, _ = workspace
+    (sops / "transfers.md").write_text(SOP, encoding="utf-8")
+    (sops / "security.md").write_text("# Güvenlik\nŞifre sıfırlama adımları.", encoding="utf-8")
+    ingest.ingest_data()
+
+    (sops / "security.md").unlink()
+    stats = ingest.ingest_data()
+
+    assert stats["files_removed"] == 1
+    assert stats["chunks_deleted"] == 2
+    doc_names = {m["doc_name"] for m in _collection().get(include=["metadatas"])["metadatas"]}
+    assert doc_names == {"transfers.md"}
+
+
+def test_full_rebuild_reembeds_everything(workspace):
+    sops, embedder = workspace
+    (sops / "transfers.md").write_text(SOP, encoding="utf-8")
+    ingest.ingest_data()
+    ingest.ingest_data(full=True)
+    assert len(embedder.texts) == 10
+
+
+def test_unstamped_collection_is_rebuilt(workspace):
+    import chromadb
+    import os
+
+    sops, embedder = workspace
+    (sops / "transfers.md").write_text(SOP, encoding="utf-8")
+    # A collection written before model stamping (like the bundled chroma_db)
+    client = chromadb.PersistentClient(path=os.path.join(os.getcwd(), "chroma_db"))
+    legacy = client.create_collection(ingest.COLLECTION_NAME, embedding_function=None)
+    legacy.add(ids=["old"], documents=["eski içerik"], embeddings=[[0.0, 0.0, 1.0]])
+
+    stats = ingest.ingest_data()
+
+    assert stats["chunks_embedded"] == 5
+    collection = _collection()
+    assert "old" not in collection.get()["ids"]
+    assert collection.metadata["embedding_model"] == embedding_provider.model_name
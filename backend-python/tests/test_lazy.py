@@ -0,0 +1,138 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import lazy
+from app.core.lazy import LazyService, load_services, readiness
+
+
+class Counter:
+    instances = 0
+
+    def __init__(self):
+        Counter.instances += 1
+        self.value = 1
+
+    def increment(self):
+        self.value += 1
+        return self.value
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Isolate the service registry for proxies created in a test."""
+    monkeypatch.setattr(lazy, "_registry", {})
+    return lazy._registry
+
+
+def test_service_is_built_on_first_access(registry):
+    Counter.instances = 0
+    service = LazyService("counter", Counter)
+    assert not service.service_loaded
+    assert service.service_status()["state"] == "pending"
+
+    assert service.increment() == 2
+    assert service.value == 2
+    assert Counter.instances == 1
+    status = service.service_status()
+    assert status["state"] == "ready"
+    assert status["load_seconds"] is not None
+
+
+def test_attribute_writes_and_patches_reach_the_instance(registry):
+    service = LazyService("counter", Counter)
+    service.value = 10
+    assert service.load_service().value == 10
+
+    with patch.object(service, "increment", return_value=-1):
+        assert service.increment() == -1
+    assert service.increment() == 11
+
+
+def test_concurrent_first_access_builds_once(registry):
+    Counter.instances = 0
+    service = LazyService("counter", Counter)
+    threads = [threading.Thread(target=lambda: service.value) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert Counter.instances == 1
+
+
+def test_failed_build_is_reported_and_retried(registry):
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("model missing")
+        return Counter()
+
+    service = LazyService("flaky", factory, retry_seconds=0)
+    components = load_services()
+    assert components["flaky"]["state"] == "failed"
+    assert "model missing" in components["flaky"]["error"]
+    assert readiness()["ready"] is False
+
+    assert service.value == 1
+    assert readiness()["ready"] is True
+
+
+def test_dependencies_are_built_first(registry):
+    order = []
+    first = LazyService("first", lambda: order.append("first") or Counter())
+    LazyService("second", lambda: order.append("second") or Counter(), depends_on=(first,))
+    load_services(["second"])
+    assert order == ["first", "second"]
+
+
+def test_failed_build_is_not_retried_within_backoff(registry):
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        raise RuntimeError("model download failed")
+
+    service = LazyService("broken", factory, retry_seconds=60)
+    with pytest.raises(RuntimeError, match="model download failed"):
+        service.load_service()
+    with pytest.raises(lazy.ServiceUnavailableError, match="model download failed"):
+        service.value
+    assert len(attempts) == 1
+
+
+def test_dependency_failure_marks_dependent_failed(registry):
+    def broken():
+        raise RuntimeError("embedding model unavailable")
+
+    first = LazyService("first", broken, retry_seconds=60)
+    second = LazyService("second", Counter, depends_on=(first,), retry_seconds=60)
+    components = load_services()
+    assert components["first"]["state"] == "failed"
+    assert components["second"]["state"] == "failed"
+    assert "dependency first failed" in components["second"]["error"]
+    assert "embedding model unavailable" in components["second"]["error"]
+    with pytest.raises(lazy.ServiceUnavailableError):
+        second.value
+
+
+def test_warm_runs_after_construction(registry):
+    service = LazyService("warm", Counter, warm=lambda counter: counter.increment())
+    assert service.value == 2
+
+
+def test_ready_endpoint_reports_components():
+    from app.main import app
+
+    client = TestClient(app)
+    load_services()
+    response = client.get("/ready")
+    body = response.json()
+    assert set(body["components"]) >= {
+        "masker", "triage_engine", "review_store", "rag_manager", "llm_client", "similarity_service",
+    }
+    assert response.status_code == (200 if body["ready"] else 503)
+    assert all(component["state"] in ("ready", "failed") for component in body["components"].values())
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from app.rag import ingest
+from app.rag.chunking import MarkdownChunk
+from app.rag.lexical import BM25Index, fuse_rankings, load_lexical_index, tokenize
+from app.services.embedding_provider import embedding_provider
+
+DOCS = {
+    "eft": "EFT işlemleri iş günlerinde gerçekleşir. EFT iptal edilemez.",
+    "fast": "FAST ile 7/24 anlık transfer yapılabilir.",
+    "chargeback": "Chargeback talebi için İtiraz formu doldurulur.",
+}
+CATEGORIES = ["TRANSFER_DELAY", "TRANSFER_DELAY", "CHARGEBACK_DISPUTE"]
+
+
+def build():
+    return BM25Index.build(list(DOCS), list(DOCS.values()), CATEGORIES)
+
+
+def test_tokenize_folds_turkish_i_and_drops_placeholders():
+    assert tokenize("İTİRAZ itiraz ITIRAZ") == ["itiraz", "itiraz", "itiraz"]
+    assert tokenize("Kart [MASKED_CREDIT_CARD] çalındı") == ["kart", "çalindi"]
+
+
+def test_search_ranks_exact_terms_and_filters_category():
+    index = build()
+    assert index.search("eft iptal", top_k=3)[0][0] == "eft"
+    assert [doc for doc, _ in index.search("itiraz chargeback", top_k=3)] == ["chargeback"]
+    assert index.search("chargeback", top_k=3, category="TRANSFER_DELAY") == []
+    assert index.search("bilinmeyen kelime", top_k=3) == []
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    path = str(tmp_path / "bm25")
+    build().save(path)
+    build().save(path)  # replacing an existing index
+    loaded = load_lexical_index(path)
+    assert isinstance(loaded.postings_doc, np.memmap)
+    assert loaded.search("fast", top_k=1) == build().search("fast", top_k=1)
+    assert load_lexical_index(str(tmp_path / "missing")) is None
+
+
+def test_empty_chunks_do_not_divide_by_zero():
+    index = BM25Index.build(["a", "b"], ["", "[MASKED_IBAN] ?"], ["GENERAL", "GENERAL"])
+    assert index.avg_doc_len == 1.0
+    assert index.search("iban", top_k=2) == []
+
+
+def test_term_frequency_is_clipped_not_wrapped():
+    index = BM25Index.build(["long", "short"], ["limit " * 70000, "limit aşimi"], ["GENERAL", "GENERAL"])
+    assert int(index.postings_tf.max()) == 65535
+    assert index.search("limit", top_k=1)[0][0] == "long"
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = fuse_rankings([["a", "b", "c"], ["b", "d"]], k=60)
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return [[float(len(text)), float(text.count(" ")), 1.0] for text in texts]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sops = tmp_path / "data" / "sops"
+    sops.mkdir(parents=True)
+    (sops / "transfers.md").write_text("\n".join(DOCS.values()), encoding="utf-8")
+    embedder = CountingEmbedder()
+    monkeypatch.setattr(embedding_provider, "_embedding_fn", embedder)
+    monkeypatch.setattr(
+        ingest,
+        "chunk_document",
+        lambda text: [MarkdownChunk(line, []) for line in text.splitlines() if line.strip()],
+    )
+    ingest.ingest_data()
+    from app.services.rag_service import RAGManager
+    manager = RAGManager()
+    embedder.calls = 0
+    return manager, embedder
+
+
+def test_lexical_mode_skips_the_embedding(rag):
+    manager, embedder = rag
+    sources = manager.retrieve("chargeback itiraz süreci", mode="lexical")
+    assert sources[0]["snippet"].startswith("Chargeback")
+    assert embedder.calls == 0
+
+
+def test_hybrid_short_exact_term_query_goes_lexical(rag):
+    manager, embedder = rag
+    assert manager.resolve_mode("FAST transfer", "hybrid") == "lexical"
+    assert manager.resolve_mode("param neden hala gelmedi", "hybrid") == "hybrid"
+    sources = manager.retrieve("param neden hala gelmedi FAST", mode="hybrid")
+    assert embedder.calls == 1
+    assert "FAST" in sources[0]["snippet"]
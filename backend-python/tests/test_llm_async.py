@@ -0,0 +1,68 @@
+import asyncio
+
+from app.services.llm_providers.base import AbstractLLMProvider
+from app.services.llm_service import LLMClient
+
+
+class SlowProvider(AbstractLLMProvider):
+    """Sync-only provider; exercises the default threaded agenerate_response."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def generate_response(self, text, category, urgency, snippets):
+        import time
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        self.in_flight -= 1
+        return {
+            "action_plan": ["step"],
+            "customer_reply_draft": "ok",
+            "risk_flags": ["NONE"],
+            "sources": [],
+            "error_code": None,
+        }
+
+
+def _client_with(provider, max_concurrency):
+    client = LLMClient()
+    client.mock_mode = False
+    client.provider = provider
+    client.max_concurrency = max_concurrency
+    return client
+
+
+def test_agenerate_falls_back_to_sync_provider():
+    client = _client_with(SlowProvider(), max_concurrency=2)
+    result = asyncio.run(client.agenerate_response("metin", "UNKNOWN", "LOW", []))
+    assert result["customer_reply_draft"] == "ok"
+
+
+def test_agenerate_respects_concurrency_limit():
+    provider = SlowProvider()
+
+    async def run_many():
+        client = _client_with(provider, max_concurrency=2)
+        await asyncio.gather(*[
+            client.agenerate_response("metin", "UNKNOWN", "LOW", []) for _ in range(6)
+        ])
+
+    asyncio.run(run_many())
+    assert provider.max_in_flight == 2
+
+
+def test_semaphore_is_created_in_each_running_loop():
+    provider = SlowProvider()
+    client = _client_with(provider, max_concurrency=2)
+
+    async def run_many():
+        await asyncio.gather(*[
+            client.agenerate_response("metin", "UNKNOWN", "LOW", []) for _ in range(4)
+        ])
+
+    # A semaphore bound to the first loop would fail under contention in the second
+    asyncio.run(run_many())
+    asyncio.run(run_many())
+    assert provider.max_in_flight == 2
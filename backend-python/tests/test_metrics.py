@@ -0,0 +1,71 @@
+import contextvars
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.metrics import Histogram, finish_request, stage_timer, start_request
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test histogram.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5.0, "a")
+
+    lines = histogram.render()
+    assert '# TYPE test_seconds histogram' in lines
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+
+
+def test_stage_timer_sums_stages_per_request():
+    def handle():
+        timings = start_request()
+        with stage_timer("unit_stage"):
+            pass
+        with stage_timer("unit_stage"):
+            pass
+        assert set(timings) == {"unit_stage"}
+        finish_request("/unit-test", 200, 0.01, timings)
+
+    contextvars.copy_context().run(handle)
+    body = metrics.render_metrics()
+    assert 'complaintops_stage_duration_seconds_count{stage="unit_stage",route="/unit-test"} 1' in body
+
+
+def test_metrics_endpoint_exposes_stage_and_route_histograms():
+    response = client.post("/mask", json={"text": "Telefonum 0532 123 45 67"})
+    assert response.status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'complaintops_stage_duration_seconds_count{stage="presidio_analyze",route="/mask"}' in body
+    assert 'complaintops_stage_duration_seconds_count{stage="regex_failsafe",route="/mask"}' in body
+    assert 'complaintops_request_duration_seconds_count{route="/mask",status="200"}' in body
+
+
+def test_path_parameters_use_route_template():
+    client.get("/similar/complaint-123", params={"query_text": "kart"})
+    body = client.get("/metrics").text
+    assert 'route="/similar/{complaint_id}"' in body
+    assert "complaint-123" not in body
+
+
+def test_slow_request_is_logged_with_stage_breakdown(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="complaintops.metrics"):
+        client.post("/mask", json={"text": "Merhaba"}, headers={"X-Request-ID": "slow-req-1"})
+
+    messages = [r.getMessage() for r in caplog.records if "slow_request" in r.getMessage()]
+    assert messages
+    assert "route=/mask" in messages[-1]
+    assert "request_id=slow-req-1" in messages[-1]
+    assert "regex_failsafe:" in messages[-1]
@@ -0,0 +1,83 @@
+import chromadb
+import os
+
+import pytest
+
+from app.rag import ingest
+from app.rag.chunking import MarkdownChunk
+from app.rag.partitions import CategoryPartitions, partition_name
+from app.services.embedding_provider import embedding_provider
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), float(text.count(" ")), 1.0] for text in texts]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sops = tmp_path / "data" / "sops"
+    sops.mkdir(parents=True)
+    (sops / "credit_card.md").write_text("Kart limiti artırımı\nKredi kartı aidatı", encoding="utf-8")
+    (sops / "transfer.md").write_text("EFT gecikmesi\nFAST işlemi\nHavale iadesi", encoding="utf-8")
+    embedder = CountingEmbedder()
+    monkeypatch.setattr(embedding_provider, "_embedding_fn", embedder)
+    monkeypatch.setattr(
+        ingest,
+        "chunk_document",
+        lambda text: [MarkdownChunk(line, []) for line in text.splitlines() if line.strip()],
+    )
+    return sops, embedder
+
+
+def _client():
+    return chromadb.PersistentClient(path=os.path.join(os.getcwd(), "chroma_db"))
+
+
+def _partition_counts():
+    partitions = CategoryPartitions(_client())
+    return {category: collection.count() for category, collection in partitions.collections.items()}
+
+
+def test_ingest_writes_category_partitions(workspace):
+    sops, embedder = workspace
+    stats = ingest.ingest_data()
+    assert stats["partitions"] == 2
+    assert _partition_counts() == {"CARD_LIMIT_CREDIT": 2, "TRANSFER_DELAY": 3}
+    assert len(embedder.texts) == 5  # partitions reuse the same vectors
+
+    (sops / "transfer.md").write_text("EFT gecikmesi", encoding="utf-8")
+    ingest.ingest_data()
+    assert _partition_counts() == {"CARD_LIMIT_CREDIT": 2, "TRANSFER_DELAY": 1}
+
+
+def test_missing_partitions_are_rebuilt_without_reembedding(workspace):
+    _, embedder = workspace
+    ingest.ingest_data()
+    client = _client()
+    client.delete_collection(partition_name("TRANSFER_DELAY"))
+
+    ingest.ingest_data()
+    assert _partition_counts() == {"CARD_LIMIT_CREDIT": 2, "TRANSFER_DELAY": 3}
+    assert len(embedder.texts) == 5
+
+
+def test_router_queries_partition_and_falls_back_to_global(workspace):
+    ingest.ingest_data()
+    from app.services.rag_service import RAGManager
+    manager = RAGManager()
+
+    assert manager.route_category("TRANSFER_DELAY") == "TRANSFER_DELAY"
+    sources = manager.retrieve("gecikme", n_results=10, category="TRANSFER_DELAY", mode="vector")
+    assert {source["doc_name"] for source in sources} == {"transfer.md"}
+    assert len(sources) == 3
+
+    # No SOPs for this category: search everything instead of returning nothing
+    assert manager.route_category("FRAUD_UNAUTHORIZED_TX") is None
+    sources = manager.retrieve("gecikme", n_results=10, category="FRAUD_UNAUTHORIZED_TX", mode="vector")
+    assert len(sources) == 5
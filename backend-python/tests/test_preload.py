@@ -0,0 +1,51 @@
+import gc
+
+import pytest
+
+from app.core import lazy, preload
+from app.core.lazy import LazyService
+from app.core.preload import memory_report, prepare_preload, reopen_after_fork
+
+
+class Handle:
+    def __init__(self):
+        self.reopened = 0
+
+    def reopen_after_fork(self):
+        self.reopened += 1
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(lazy, "_registry", {})
+    return lazy._registry
+
+
+def test_reopen_after_fork_only_touches_loaded_services(registry):
+    loaded = LazyService("loaded", Handle)
+    pending = LazyService("pending", Handle)
+    loaded.load_service()
+
+    reopen_after_fork()
+
+    assert loaded.reopened == 1
+    assert not pending.service_loaded
+
+
+def test_prepare_preload_loads_and_freezes(registry, monkeypatch):
+    service = LazyService("handle", Handle)
+    monkeypatch.setattr(preload, "_preload_pid", None)
+    try:
+        prepare_preload()
+        assert service.service_loaded
+        assert gc.get_freeze_count() > 0
+        # The process that preloaded is the master, not a preloaded worker
+        assert memory_report()["preloaded"] is False
+    finally:
+        gc.unfreeze()
+
+
+def test_memory_report_fields():
+    report = memory_report()
+    assert set(report) >= {"pid", "rss_mb", "pss_mb", "shared_mb", "private_mb", "peak_rss_mb"}
+    assert report["peak_rss_mb"] > 0
@@ -0,0 +1,64 @@
+import pytest
+
+from app.rag import ingest
+from app.rag.chunking import MarkdownChunk
+from app.services.embedding_provider import embedding_provider
+
+
+def embed(texts):
+    return [[float(len(text)), float(text.count(" ")), 1.0] for text in texts]
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sops = tmp_path / "data" / "sops"
+    sops.mkdir(parents=True)
+    (sops / "transfer.md").write_text("EFT gecikmesi yaşandı\nFAST işlemi", encoding="utf-8")
+    monkeypatch.setattr(embedding_provider, "_embedding_fn", embed)
+    monkeypatch.setattr(
+        ingest,
+        "chunk_document",
+        lambda text: [MarkdownChunk(line, []) for line in text.splitlines() if line.strip()],
+    )
+    ingest.ingest_data()
+    from app.services.rag_service import RAGManager
+    manager = RAGManager()
+    manager.version_check_seconds = 0
+    return manager, sops
+
+
+def test_repeated_queries_are_served_from_cache(manager):
+    manager, _ = manager
+    calls = []
+    retrieve_many = manager.retrieve_many
+    manager.batcher.batch_fn = lambda requests: calls.append(requests) or retrieve_many(requests)
+
+    first = manager.retrieve("[MASKED_NAME]  EFT   gecikmesi", category="TRANSFER_DELAY")
+    second = manager.retrieve("[MASKED_NAME] EFT gecikmesi", category="TRANSFER_DELAY")
+    assert first == second and first
+    assert len(calls) == 1
+    assert manager.cache_stats()["hits"] == 1
+
+    # Different top_k or mode is a different entry
+    manager.retrieve("[MASKED_NAME] EFT gecikmesi", n_results=1, category="TRANSFER_DELAY")
+    manager.retrieve("[MASKED_NAME] EFT gecikmesi", category="TRANSFER_DELAY", mode="vector")
+    assert len(calls) == 3
+
+
+def test_ingestion_bumps_version_and_invalidates(manager):
+    manager, sops = manager
+    version = manager.current_index_version()
+    assert version is not None
+    before = manager.retrieve("EFT gecikmesi", mode="lexical")
+    assert before[0]["snippet"] == "EFT gecikmesi yaşandı"
+
+    (sops / "transfer.md").write_text("EFT gecikmesi iade edildi\nFAST işlemi", encoding="utf-8")
+    ingest.ingest_data()
+    after = manager.retrieve("EFT gecikmesi", mode="lexical")
+    assert manager.index_version != version
+    assert after[0]["snippet"] == "EFT gecikmesi iade edildi"
+
+    # Nothing changed: the version stays and cached results remain valid
+    ingest.ingest_data()
+    assert manager.current_index_version() == manager.index_version
@@ -0,0 +1,353 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.review_service import ReviewStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("REVIEW_DB_PATH", str(tmp_path / "reviews.db"))
+    store = ReviewStore()
+    yield store
+    store.close()
+
+
+def _create(store, review_id):
+    return store.create_review(review_id, "[MASKED_NAME] kartım bloke oldu", "CARD_LIMIT_CREDIT", 0.4, "HIGH", 0.5)
+
+
+def test_connections_are_wal_and_reused_per_thread(store):
+    conn = store._pool.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == store._pool.busy_timeout_ms
+    assert store._pool.connection() is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store._pool.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+
+def test_create_update_get_roundtrip(store):
+    _create(store, "r1")
+    updated = store.update_review("r1", "APPROVED", notes="ok")
+    assert updated.status == "APPROVED"
+    assert updated.masked_text == "[MASKED_NAME] kartım bloke oldu"
+    assert store.get_review("r1").notes == "ok"
+    assert store.update_review("missing", "APPROVED") is None
+
+
+def test_failed_write_is_rolled_back(store):
+    _create(store, "r1")
+    with pytest.raises(sqlite3.IntegrityError):
+        _create(store, "r1")
+    audit = store._pool.connection().execute("SELECT COUNT(*) FROM review_audit").fetchone()[0]
+    assert audit == 1
+
+
+def test_concurrent_writers_across_stores(store, tmp_path):
+    # A second store on the same file stands in for another gunicorn worker
+    other = ReviewStore()
+    errors = []
+
+    def write(target, prefix):
+        try:
+            for i in range(25):
+                _create(target, f"{prefix}-{i}")
+                target.update_review(f"{prefix}-{i}", "APPROVED")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=write, args=(target, f"{name}{n}"))
+        for name, target in (("a", store), ("b", other))
+        for n in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    other.close()
+
+    assert errors == []
+    count = store._pool.connection().execute("SELECT COUNT(*) FROM review_records").fetchone()[0]
+    assert count == 150
+
+
+def test_connections_of_exited_threads_are_closed(store):
+    import gc
+    import os
+
+    def open_fds():
+        return len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else 0
+
+    def short_lived_worker():
+        # Like a threadpool worker that served one request and retired
+        thread = threading.Thread(target=store.get_review, args=("missing",))
+        thread.start()
+        thread.join()
+
+    store.get_review("warm")  # this thread's connection
+    # SQLite keeps the file descriptor of a closed connection for reuse while
+    # other connections in the process hold locks on the file
+    short_lived_worker()
+    gc.collect()
+    before = (len(store._pool._connections), open_fds())
+    for _ in range(50):
+        short_lived_worker()
+    gc.collect()
+    assert (len(store._pool._connections), open_fds()) == before
+
+
+def test_reopen_after_fork_opens_new_connections(store):
+    inherited = store._pool.connection()
+    store.reopen_after_fork()
+    assert store._pool.connection() is not inherited
+    assert store.get_review("missing") is None
+
+
+def _seed_queue(store):
+    for i in range(7):
+        category = "CARD_LIMIT_CREDIT" if i % 2 else "TRANSFER_DELAY"
+        store.create_review(f"q{i}", f"metin {i}", category, 0.3, "HIGH" if i < 4 else "LOW", 0.4)
+    store.update_review("q0", "APPROVED")
+
+
+def test_list_reviews_pages_with_keyset_cursor(store):
+    _seed_queue(store)
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.list_reviews(status="PENDING_REVIEW", after_cursor=cursor, limit=2)
+        seen.extend(record.review_id for record in page)
+        if cursor is None:
+            break
+    assert seen == [f"q{i}" for i in range(1, 7)]
+    assert page[-1].masked_text == "metin 6"
+
+    page, _ = store.list_reviews(category="CARD_LIMIT_CREDIT", urgency="HIGH")
+    assert [record.review_id for record in page] == ["q1", "q3"]
+
+    with pytest.raises(ValueError):
+        store.list_reviews(after_cursor="not-a-cursor")
+
+
+def test_list_reviews_uses_indexes_and_decrypts_only_returned_rows(store, monkeypatch):
+    from app.services import review_service
+
+    _seed_queue(store)
+    conn = store._pool.connection()
+    plan = " ".join(
+        row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM review_records WHERE status = ? "
+            "AND (created_at, review_id) > (?, ?) ORDER BY created_at, review_id LIMIT 3",
+            ("PENDING_REVIEW", "", ""),
+        )
+    )
+    assert "idx_review_status_created" in plan and "TEMP B-TREE" not in plan
+    plan = " ".join(
+        row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM review_records WHERE category = ? AND urgency = ? "
+            "ORDER BY created_at, review_id LIMIT 3",
+            ("CARD_LIMIT_CREDIT", "HIGH"),
+        )
+    )
+    assert "idx_review_category_urgency_created" in plan and "TEMP B-TREE" not in plan
+
+    decrypted = []
+    decrypt_many = review_service._decrypt_many
+    monkeypatch.setattr(
+        review_service, "_decrypt_many", lambda texts: decrypted.extend(texts) or decrypt_many(texts)
+    )
+    store.list_reviews(status="PENDING_REVIEW", limit=2)
+    assert len(decrypted) == (2 if review_service.ENCRYPTION_ENABLED else 0)
+
+
+def test_review_queue_route(store, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api import routes
+    from app.main import app
+
+    _seed_queue(store)
+    monkeypatch.setattr(routes, "review_store", store)
+    client = TestClient(app)
+
+    body = client.get("/review/queue", params={"limit": 4}).json()
+    assert [item["review_id"] for item in body["items"]] == ["q1", "q2", "q3", "q4"]
+    body = client.get("/review/queue", params={"limit": 4, "cursor": body["next_cursor"]}).json()
+    assert [item["review_id"] for item in body["items"]] == ["q5", "q6"]
+    assert body["next_cursor"] is None
+
+    assert len(client.get("/review/queue", params={"status": ""}).json()["items"]) == 7
+    assert client.get("/review/queue", params={"cursor": "bogus"}).status_code == 400
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    from cryptography.fernet import Fernet
+    from app.services import review_service
+
+    old, new = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    monkeypatch.setattr(review_service, "ENCRYPTION_ENABLED", True)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_KEY", old)
+    review_service.reset_cipher()
+    yield old, new
+    review_service.reset_cipher()
+
+
+def _stored_text(store, review_id):
+    return store._pool.connection().execute(
+        "SELECT masked_text FROM review_records WHERE review_id = ?", (review_id,)
+    ).fetchone()[0]
+
+
+def test_cipher_is_built_once(keys):
+    from app.services import review_service
+
+    assert review_service._get_cipher() is review_service._get_cipher()
+    token = review_service._encrypt("metin")
+    assert review_service._decrypt_many([token, "", "legacy plaintext"]) == ["metin", "", "legacy plaintext"]
+
+
+def test_key_rotation_and_reencryption(store, keys, monkeypatch):
+    from app.services import review_service
+
+    old, new = keys
+    _create(store, "r1")
+    _create(store, "r2")
+    # A row written before encryption was enabled
+    store._pool.connection().execute(
+        "UPDATE review_records SET masked_text = 'düz metin' WHERE review_id = 'r2'"
+    )
+
+    monkeypatch.setenv("REVIEW_ENCRYPTION_KEY", new)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS", old)
+    review_service.reset_cipher()
+    assert store.get_review("r1").masked_text == "[MASKED_NAME] kartım bloke oldu"
+    _create(store, "r3")
+
+    stats = store.reencrypt_reviews(batch_size=2)
+    assert stats == {"scanned": 3, "rotated": 2, "unreadable": 0}
+    assert store.reencrypt_reviews(batch_size=2)["rotated"] == 0
+
+    # The old key can now be dropped
+    monkeypatch.delenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS")
+    review_service.reset_cipher()
+    assert store.get_review("r1").masked_text == "[MASKED_NAME] kartım bloke oldu"
+    assert store.get_review("r2").masked_text == "düz metin"
+    assert _stored_text(store, "r2").startswith(review_service.FERNET_TOKEN_PREFIX)
+
+
+def test_reencryption_leaves_unreadable_tokens_alone(store, keys, monkeypatch):
+    from cryptography.fernet import Fernet
+    from app.services import review_service
+
+    _create(store, "r1")
+    before = _stored_text(store, "r1")
+    monkeypatch.setenv("REVIEW_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    review_service.reset_cipher()
+
+    assert store.reencrypt_reviews()["unreadable"] == 1
+    assert _stored_text(store, "r1") == before
+
+
+def test_startup_reencryption_runs_once_per_rotation(store, keys, monkeypatch):
+    from cryptography.fernet import Fernet
+    from app.services import review_service
+
+    old, new = keys
+    _create(store, "r1")
+    monkeypatch.setattr(review_service, "review_store", store)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_KEY", new)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS", old)
+    review_service.reset_cipher()
+
+    assert review_service.run_startup_reencryption()["rotated"] == 1
+    # Other workers starting with the same keys skip the pass
+    assert review_service.run_startup_reencryption() is None
+
+    # The next rotation is a new job
+    monkeypatch.setenv("REVIEW_ENCRYPTION_KEY", old)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS", new)
+    review_service.reset_cipher()
+    assert review_service.run_startup_reencryption()["rotated"] == 1
+
+    # Same primary, another retired key: the key set changed
+    monkeypatch.setenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS", f"{new},{Fernet.generate_key().decode()}")
+    review_service.reset_cipher()
+    assert review_service.run_startup_reencryption() is not None
+
+
+def test_failed_reencryption_releases_its_claim(store, keys, monkeypatch):
+    from app.services import review_service
+
+    old, new = keys
+    monkeypatch.setattr(review_service, "review_store", store)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_KEY", new)
+    monkeypatch.setenv("REVIEW_ENCRYPTION_PREVIOUS_KEYS", old)
+    review_service.reset_cipher()
+
+    reencrypt = store.reencrypt_reviews
+    failures = [sqlite3.OperationalError("disk I/O error")]
+
+    def flaky(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return reencrypt(*args, **kwargs)
+
+    monkeypatch.setattr(store, "reencrypt_reviews", flaky)
+    with pytest.raises(sqlite3.OperationalError):
+        review_service.run_startup_reencryption()
+    # The next worker or restart retries instead of waiting out the claim
+    assert review_service.run_startup_reencryption() is not None
+
+
+def _age_rows(store, days):
+    from datetime import datetime, timedelta, timezone
+
+    old = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    conn = store._pool.connection()
+    conn.execute("UPDATE review_records SET created_at = ?", (old,))
+    conn.execute("UPDATE review_audit SET created_at = ?", (old,))
+
+
+def test_purge_expired_deletes_in_batches_and_audits(store):
+    for i in range(7):
+        _create(store, f"old-{i}")
+    _age_rows(store, 400)
+    _create(store, "fresh")
+
+    plan = " ".join(
+        row[3] for row in store._pool.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT review_id FROM review_records "
+            "WHERE created_at < ? ORDER BY created_at LIMIT 3",
+            ("2020-01-01",),
+        )
+    )
+    assert "idx_review_created" in plan
+
+    stats = store.purge_expired(batch_size=3, pause_seconds=0)
+    assert stats["reviews_deleted"] == 7
+    # The 7 creation audit rows are past audit retention too
+    assert stats["audit_deleted"] == 7
+    assert stats["batches"] == 3 + 3
+    assert stats["rows_per_second"] > 0
+
+    conn = store._pool.connection()
+    assert [row[0] for row in conn.execute("SELECT review_id FROM review_records")] == ["fresh"]
+    statuses = [row[0] for row in conn.execute("SELECT status FROM review_audit ORDER BY audit_id")]
+    assert statuses == ["PENDING_REVIEW"] + ["DELETED_RETENTION"] * 7
+    assert store.cleanup_expired_reviews() == 0
+
+
+def test_retention_job_is_claimed_once_per_interval(store):
+    other = ReviewStore()
+    try:
+        assert store.claim_job("retention_cleanup", 3600) is True
+        assert other.claim_job("retention_cleanup", 3600) is False
+        assert other.claim_job("retention_cleanup", 0) is True
+    finally:
+        other.close()
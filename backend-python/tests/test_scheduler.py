@@ -0,0 +1,26 @@
+import threading
+
+from app.core.scheduler import PeriodicJob
+
+
+def test_periodic_job_runs_until_stopped():
+    ran = threading.Event()
+    calls = []
+
+    def tick():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("one bad run does not stop the schedule")
+        ran.set()
+
+    job = PeriodicJob("tick", tick, interval_seconds=0.01, initial_delay_max=0).start()
+    assert ran.wait(2)
+    job.stop(timeout=2)
+    count = len(calls)
+    assert count >= 2
+    assert not any(thread.name == "job-tick" for thread in threading.enumerate())
+
+
+def test_zero_interval_disables_the_job():
+    job = PeriodicJob("off", lambda: None, interval_seconds=0).start()
+    assert job._thread is None
@@ -0,0 +1,61 @@
+import logging
+import uuid
+
+import chromadb
+
+from app.services.similarity_service import ComplaintSimilarityService
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(len(texts))
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+
+def _service(chunk_size):
+    service = ComplaintSimilarityService.__new__(ComplaintSimilarityService)
+    service.logger = logging.getLogger("test.similarity")
+    service.embedding_provider = FakeEmbedder()
+    service.collection = chromadb.EphemeralClient().create_collection(
+        name=f"test_{uuid.uuid4().hex[:8]}", embedding_function=None
+    )
+    service.index_chunk_size = chunk_size
+    return service
+
+
+def test_index_complaints_embeds_and_upserts_in_chunks():
+    service = _service(chunk_size=2)
+    items = [(f"c{i}", f"şikayet metni {i}", {"category": "TRANSFER_DELAY"}) for i in range(5)]
+
+    errors = service.index_complaints(items)
+
+    assert errors == [None] * 5
+    assert service.embedding_provider.calls == [2, 2, 1]
+    assert service.collection.count() == 5
+
+
+def test_failed_item_does_not_fail_its_chunk():
+    service = _service(chunk_size=10)
+    items = [
+        ("ok-1", "ilk şikayet", {"category": ""}),
+        ("bad", "geçersiz metadata", {"category": {"nested": "dict"}}),
+        ("ok-2", "ikinci şikayet", None),
+    ]
+
+    errors = service.index_complaints(items)
+
+    assert errors[0] is None and errors[2] is None
+    assert errors[1]
+    assert service.collection.count() == 2
+
+
+def test_unavailable_index_fails_every_item():
+    service = _service(chunk_size=10)
+    service.collection = None
+    assert service.index_complaints([("a", "x", None), ("b", "y", None)]) == [
+        "similarity index unavailable",
+        "similarity index unavailable",
+    ]
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services.triage_service import triage_engine
+
+TEXTS = [
+    "Kartımdan bilgim dışında para çekildi",
+    "EFT yaptım gitmedi",
+    "Limit arttırımı istiyorum",
+]
+
+
+@pytest.mark.skipif(not triage_engine.model_loaded, reason="triage models not available")
+def test_predict_batch_matches_single_predict():
+    batch = triage_engine.predict_batch(TEXTS).to_records()
+    assert len(batch) == len(TEXTS)
+    for text, record in zip(TEXTS, batch):
+        single = triage_engine.predict(text)
+        assert record["category"] == single["category"]
+        assert record["urgency"] == single["urgency"]
+        assert record["category_confidence"] == pytest.approx(single["category_confidence"])
+        assert record["urgency_confidence"] == pytest.approx(single["urgency_confidence"])
+
+
+@pytest.mark.skipif(not triage_engine.model_loaded, reason="triage models not available")
+def test_predict_batch_label_is_proba_argmax():
+    record = triage_engine.predict_batch(TEXTS[:1]).to_records()[0]
+    features = triage_engine._features(TEXTS[:1])
+    expected = triage_engine.category_model.predict(features)[0]
+    assert record["category"] == expected
+
+
+def test_predict_batch_empty():
+    assert len(triage_engine.predict_batch([])) == 0
+
+
+def test_shared_vectorizer_heads():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from app.services.triage_service import TriageEngine
+
+    texts = ["kart çalındı", "kart kayıp", "eft gitmedi", "havale gecikti"]
+    vectorizer = TfidfVectorizer().fit(texts)
+    features = vectorizer.transform(texts)
+
+    engine = TriageEngine.__new__(TriageEngine)
+    engine.vectorizer = vectorizer
+    engine.category_model = LogisticRegression().fit(
+        features, ["FRAUD_UNAUTHORIZED_TX"] * 2 + ["TRANSFER_DELAY"] * 2
+    )
+    engine.urgency_model = LogisticRegression().fit(features, ["RED", "RED", "GREEN", "GREEN"])
+    engine.model_loaded = True
+
+    records = engine.predict_batch(["kart çalındı", "eft gitmedi"]).to_records()
+    assert [r["category"] for r in records] == ["FRAUD_UNAUTHORIZED_TX", "TRANSFER_DELAY"]
+    assert [r["urgency"] for r in records] == ["HIGH", "LOW"]